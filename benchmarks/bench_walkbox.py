@@ -0,0 +1,101 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from game.model.game_model_walkbox import WalkboxMap
+
+### Benchmark of walkbox pathfinding over generated room layouts ###
+
+# Grid of square boxes with a share of cells removed, keeping the layout connected
+def generate_layout(columns, rows, size=16, holes=0.2, seed=0):
+    rng = random.Random(seed)
+    cells = {(column, row) for column in range(columns) for row in range(rows)}
+    for cell in rng.sample(sorted(cells), int(len(cells) * holes)):
+        cells.discard(cell)
+        if not is_connected(cells):
+            cells.add(cell)
+    return [[(c * size, r * size), ((c + 1) * size, r * size), ((c + 1) * size, (r + 1) * size), (c * size, (r + 1) * size)]
+            for c, r in sorted(cells)]
+
+
+def is_connected(cells):
+    if not cells:
+        return True
+    start = next(iter(cells))
+    seen, stack = {start}, [start]
+    while stack:
+        column, row = stack.pop()
+        for neighbour in ((column + 1, row), (column - 1, row), (column, row + 1), (column, row - 1)):
+            if neighbour in cells and neighbour not in seen:
+                seen.add(neighbour)
+                stack.append(neighbour)
+    return len(seen) == len(cells)
+
+
+def random_points(walkboxes, count, rng):
+    points = []
+    for _ in range(count):
+        box = rng.choice(walkboxes.boxes)
+        min_x, min_y, max_x, max_y = box.bounds
+        points.append((rng.uniform(min_x, max_x), rng.uniform(min_y, max_y)))
+    return points
+
+
+def bench_layout(columns, rows, queries, actors, seed):
+    rng = random.Random(seed)
+    boxes = generate_layout(columns, rows, seed=seed)
+
+    start = time.perf_counter()
+    walkboxes = WalkboxMap(boxes, path_cache_size=queries)
+    build_time = time.perf_counter() - start
+
+    pairs = list(zip(random_points(walkboxes, queries, rng), random_points(walkboxes, queries, rng)))
+
+    start = time.perf_counter()
+    for a, b in pairs:
+        walkboxes.find_path(a, b)
+    cold_time = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    for a, b in pairs:
+        walkboxes.find_path(a, b)
+    cached_time = (time.perf_counter() - start) / queries
+
+    # Several actors requesting new paths within the same tick
+    walkboxes.clear_cache()
+    tick_pairs = pairs[:actors]
+    start = time.perf_counter()
+    for a, b in tick_pairs:
+        walkboxes.find_path(a, b)
+    tick_time = time.perf_counter() - start
+
+    return {
+        "boxes": len(boxes),
+        "build_ms": build_time * 1000.0,
+        "cold_path_us": cold_time * 1e6,
+        "cached_path_us": cached_time * 1e6,
+        "tick_ms": tick_time * 1000.0,
+        "actors": len(tick_pairs),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark walkbox pathfinding on generated layouts")
+    parser.add_argument("--queries", type=int, default=1000, help="path queries per layout")
+    parser.add_argument("--actors", type=int, default=8, help="actors pathing in the same tick")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print(f"{'boxes':>6} {'build ms':>10} {'cold us':>10} {'cached us':>10} {'tick ms':>10}")
+    for columns, rows in ((4, 2), (8, 4), (16, 8), (20, 12)):
+        result = bench_layout(columns, rows, args.queries, args.actors, args.seed)
+        print(f"{result['boxes']:>6} {result['build_ms']:>10.2f} {result['cold_path_us']:>10.1f} "
+              f"{result['cached_path_us']:>10.1f} {result['tick_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,641 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Benchmarks run without a display. Must be set before any Qt import.
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIRECTORY)
+
+from PyQt6.QtWidgets import QApplication
+
+### Repeatable benchmark suite. Results go to JSON and can be compared against a stored baseline. ###
+
+BENCHMARKS = {}
+TEMPORARY_DIRECTORIES = []  # removed once the suite has run
+
+
+# Register a benchmark. The function returns a callable to time, plus how many operations one call covers.
+# Self timed callables measure themselves and return the time in seconds.
+def benchmark(name, repeat=5, self_timed=False):
+    def register(function):
+        BENCHMARKS[name] = (function, repeat, self_timed)
+        return function
+    return register
+
+
+# Directory for files a benchmark writes, kept until every benchmark has run
+def temporary_directory():
+    directory = tempfile.TemporaryDirectory(prefix="pyqtscumm-benchmark-", ignore_cleanup_errors=True)
+    TEMPORARY_DIRECTORIES.append(directory)
+    return directory.name
+
+
+def time_call(call, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+# Resource archive built from the resources folder into a temporary directory, for the archive mode benchmarks
+def temporary_archive():
+    from game.utils import build_archive
+    archive_path = os.path.join(temporary_directory(), "resources.pak")
+    build_archive(os.path.join(ROOT_DIRECTORY, "resources"), archive_path)
+    return archive_path
+
+
+# Process start to first painted frame of main.py. Uses the time reported by the probe rather than
+# the subprocess wall time, which would include shutdown. Resources come from loose files or an archive.
+def startup_benchmark(archive):
+    def setup():
+        probe = os.path.join(os.path.dirname(__file__), "startup_probe.py")
+        environment = dict(os.environ)
+        if archive:
+            environment.pop("PYQTSCUMM_LOOSE_FILES", None)
+            environment["PYQTSCUMM_ARCHIVE"] = temporary_archive()
+        else:
+            environment["PYQTSCUMM_LOOSE_FILES"] = "1"
+
+        def run():
+            start = time.time()
+            output = subprocess.run([sys.executable, probe], capture_output=True, text=True, check=True, cwd=ROOT_DIRECTORY,
+                                    env=environment).stdout
+            return float(output.strip().splitlines()[-1]) - start
+        return run, 1
+    return setup
+
+benchmark("startup_first_frame", repeat=3, self_timed=True)(startup_benchmark(False))
+benchmark("startup_first_frame_archive", repeat=3, self_timed=True)(startup_benchmark(True))
+
+
+# Cold loads of the starting room, with every image and data cache emptied first
+def room_load_benchmark(archive):
+    def setup():
+        from game.utils import resources
+        from game.utils.game_utils import START_ROOM
+        from game.view import RoomManager, pixmap_cache
+        from game.view import game_view_palette
+
+        archive_path = temporary_archive() if archive else None
+        loads = 20
+
+        def run():
+            previous = resources.archive.file_path if resources.archive is not None else None
+            if archive_path:
+                resources.open_archive(archive_path)
+            else:
+                resources.close()
+            try:
+                for _ in range(loads):
+                    pixmap_cache.clear()
+                    game_view_palette._indexed_images.clear()
+                    room_manager = RoomManager()
+                    room_manager.load_room(START_ROOM)
+                    room_manager.shutdown()
+            finally:
+                if previous:
+                    resources.open_archive(previous)
+                else:
+                    resources.close()
+        return run, loads
+    return setup
+
+benchmark("room_load_loose")(room_load_benchmark(False))
+benchmark("room_load_archive")(room_load_benchmark(True))
+
+
+# Reading every resource's bytes, without decoding, to isolate the file access cost
+def resource_read_benchmark(archive):
+    def setup():
+        from game.utils import Resources, get_file_path
+
+        source = os.path.join(ROOT_DIRECTORY, "resources")
+        file_paths = [get_file_path("resources", *os.path.relpath(os.path.join(directory, file_name), source).split(os.sep))
+                      for directory, _, file_names in os.walk(source) for file_name in file_names]
+        resources = Resources(archive_path=temporary_archive() if archive else None)
+        rounds = 200
+
+        def run():
+            for _ in range(rounds):
+                for file_path in file_paths:
+                    resources.read(file_path)
+        return run, rounds * len(file_paths)
+    return setup
+
+benchmark("resource_read_loose")(resource_read_benchmark(False))
+benchmark("resource_read_archive")(resource_read_benchmark(True))
+
+
+# Preparing every inventory sprite for a 4x screen: the scaled pixmap and, for sprites with transparency,
+# the hit mask. Either done at runtime or read from the output of the asset pipeline.
+def sprite_prepare_benchmark(baked):
+    def setup():
+        from PyQt6.QtCore import Qt
+        from PyQt6.QtGui import QImage, QPixmap
+        from game.utils import BakedAssets, build_assets
+        from game.utils.game_utils_assets import SCALED_FOLDERS
+        from game.view.game_view_helpers import AlphaMask
+
+        source = os.path.join(ROOT_DIRECTORY, "resources")
+        output = temporary_directory()
+        build_assets(source, output, log=lambda message: None)
+        baked_assets = BakedAssets(output, source)
+        file_paths = [os.path.join(source, folder, file_name) for folder in SCALED_FOLDERS
+                      for file_name in sorted(os.listdir(os.path.join(source, folder))) if file_name.endswith(".png")]
+        rounds = 10
+
+        def run():
+            for _ in range(rounds):
+                for file_path in file_paths:
+                    if baked:
+                        QPixmap(baked_assets.variant(file_path, 4))
+                        mask = baked_assets.mask(file_path)
+                        if mask is not None:
+                            AlphaMask(*mask)
+                    else:
+                        image = QImage(file_path)
+                        QPixmap.fromImage(image).scaled(image.width() * 4, image.height() * 4, Qt.AspectRatioMode.IgnoreAspectRatio,
+                                                        Qt.TransformationMode.FastTransformation)
+                        if image.hasAlphaChannel():
+                            AlphaMask.from_image(image)
+        return run, rounds * len(file_paths)
+    return setup
+
+benchmark("sprite_prepare_runtime")(sprite_prepare_benchmark(False))
+benchmark("sprite_prepare_baked")(sprite_prepare_benchmark(True))
+
+
+@benchmark("view_setup_scene")
+def bench_setup_scene():
+    from game.view import GameView
+    game_view = GameView()
+    return game_view.setup_scene, 1
+
+
+@benchmark("view_setup_layout")
+def bench_setup_layout():
+    from game.view import GameView
+    game_view = GameView()
+
+    def run():
+        game_view.setup_widgets()
+        game_view.setup_layout()
+    return run, 1
+
+
+@benchmark("model_hover_storm")
+def bench_hover_storm():
+    from game.model import GameModel
+    game_model = GameModel()
+    events = 10000
+
+    def run():
+        for _ in range(events // 4):
+            game_model.handle_prop_enter("bucket")
+            game_model.handle_prop_leave("bucket")
+            game_model.handle_hotspot_enter("Pirate")
+            game_model.handle_hotspot_leave("Pirate")
+    return run, events
+
+
+# Hover storm through the controller to the view. Notifications are batched and delivered once a frame.
+@benchmark("view_hover_storm")
+def bench_view_hover_storm():
+    from game.controller import GameController
+    from game.model import GameModel
+    from game.view import GameView
+    game_controller = GameController(GameModel(), GameView(), autosave=False)
+    events = 10000
+    events_per_frame = 40
+
+    def run():
+        for index in range(events // 4):
+            game_controller.handle_prop_enter("bucket")
+            game_controller.handle_prop_leave("bucket")
+            game_controller.handle_hotspot_enter("Pirate")
+            game_controller.handle_hotspot_leave("Pirate")
+            if index % (events_per_frame // 4) == 0:
+                game_controller.update_view()
+    return run, events
+
+
+@benchmark("model_click_storm")
+def bench_click_storm():
+    from game.model import GameModel
+    game_model = GameModel()
+    events = 5000
+
+    def run():
+        for _ in range(events // 2):
+            game_model.active_verb = "Look at"
+            game_model.handle_hotspot_click("Pirate")
+            game_model.active_verb = "Push"
+            game_model.handle_prop_click("bucket")
+    return run, events
+
+
+# Sentence line updates as the mouse moves over the scene, mostly repeating the same few strings
+@benchmark("info_label_updates")
+def bench_info_label():
+    from game.view import InfoLabel
+    info_label = InfoLabel()
+    texts = ["Walk to ", "Walk to bucket", "Walk to Pirate", "Pick up bucket"]
+    updates = 10000
+
+    def run():
+        for index in range(updates):
+            info_label.setText(texts[index % len(texts)])
+    return run, updates
+
+
+@benchmark("say_text_lines")
+def bench_say_text():
+    from game.view import SayTextItem
+    say_text = SayTextItem()
+    lines = [f"Line {index}: I could use this to hold things, or possibly as a really impractical hat." for index in range(50)]
+
+    def run():
+        for line in lines:
+            say_text.set_text(line)
+    return run, len(lines)
+
+
+# Sound effects started from decoded buffers, more at once than there are voices
+@benchmark("sound_effect_burst")
+def bench_sound_effects():
+    import struct
+    import wave
+    from game.view.game_view_audio import AudioManager
+
+    file_path = os.path.join(temporary_directory(), "footstep.wav")
+    with wave.open(file_path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(22050)
+        wav_file.writeframes(struct.pack("<h", 0) * 4410)
+
+    audio = AudioManager()
+    audio.preload([file_path])
+    audio.cache.wait()
+    sounds = 200
+
+    def run():
+        for _ in range(sounds):
+            audio.play_sound(file_path)
+    return run, sounds
+
+
+# Cost of instrumentation: a profiled function and a span block, with the profiler off and on
+def profiler_benchmark(enabled):
+    def setup():
+        from game.utils import profiler, profiled
+
+        @profiled("benchmark")
+        def work():
+            pass
+
+        calls = 100000
+
+        def run():
+            profiler.enabled = enabled
+            try:
+                for _ in range(calls):
+                    work()
+                    with profiler.span("benchmark", "block"):
+                        pass
+            finally:
+                profiler.enabled = False
+                profiler.reset()
+        return run, calls
+    return setup
+
+benchmark("profiler_disabled")(profiler_benchmark(False))
+benchmark("profiler_enabled")(profiler_benchmark(True))
+
+
+# Fast-forward replay of the recorded bucket and pirate playthrough, state hashes checked along the way
+@benchmark("replay_uncapped")
+def bench_replay():
+    from game.controller import load_replay, play_replay
+    replay = load_replay(os.path.join(ROOT_DIRECTORY, "playthroughs", "bucket_and_pirate.replay.json"))
+
+    def run():
+        result = play_replay(replay)
+        assert not result["divergences"], result["divergences"]
+    return run, replay["ticks"]
+
+
+# Model ticks with thousands of scripts sleeping on timers and waiting on events
+@benchmark("scripts_tick_5000")
+def bench_scripts():
+    from game.model import GameModel
+    from game.model.game_model_script import WaitTicks, WaitEvent
+
+    def sleeper(index):
+        while True:
+            yield WaitTicks(1 + index % 10)
+
+    def listener():
+        while True:
+            yield WaitEvent("door")
+
+    game_model = GameModel()
+    for index in range(2500):
+        game_model.scripts.start(sleeper, index)
+        game_model.scripts.start(listener)
+    ticks = 100
+
+    def run():
+        for tick in range(ticks):
+            if tick % 25 == 0:
+                game_model.scripts.emit("door")
+            game_model.update_model(0.1)
+    return run, ticks
+
+
+# 4096 flags and 256 integer variables: 64 set and read per tick, and a save snapshot every tick,
+# which only rereads the values changed since the previous one
+@benchmark("variables_4096_flags")
+def bench_variables():
+    from game.model import VariableStore
+
+    store = VariableStore()
+    for index in range(4096):
+        store.declare(f"flag{index}", False)
+    for index in range(256):
+        store.declare(f"variable{index}", 0)
+    names = [f"flag{index * 61 % 4096}" for index in range(64)]
+    ticks = 100
+
+    def run():
+        for tick in range(ticks):
+            for name in names:
+                store[name] = not store[name]
+            store["variable7"] = tick
+            store.snapshot()
+    return run, ticks
+
+
+# A crowd of 500 actors walking back and forth along three waypoints, one fixed step per operation.
+# Either the actor store's vectorised pass or advance_along_path called per actor.
+def crowd_walk_benchmark(vectorised):
+    def setup():
+        from game.model import ActorStore
+        from game.model.game_model_walkbox import advance_along_path
+
+        actors = 500
+        ticks = 200
+        paths = [[(10 + index % 50 * 6, 115 + index // 50 * 2), (300 - index % 50 * 5, 140), (160, 118)] for index in range(actors)]
+        store = ActorStore()
+        for index in range(actors):
+            store.spawn(f"actor{index}", 160, 130, 60.0 + index % 7, frame_count=8)
+        positions = [(160.0, 130.0)] * actors
+        walking = [list(path) for path in paths]
+
+        def run():
+            for _ in range(ticks):
+                if vectorised:
+                    for name in store.update(0.1):
+                        store.walk(name, paths[int(name[5:])])
+                    store.take_dirty()
+                else:
+                    for index in range(actors):
+                        if walking[index]:
+                            positions[index] = advance_along_path(positions[index], walking[index], 60.0 + index % 7, 0.1)
+                        else:
+                            walking[index] = list(paths[index])
+
+        for index in range(actors):
+            store.walk(f"actor{index}", paths[index])
+        return run, ticks
+    return setup
+
+benchmark("crowd_walk_500_store")(crowd_walk_benchmark(True))
+benchmark("crowd_walk_500_python")(crowd_walk_benchmark(False))
+
+
+# Syncing 200 walking actors to their scene items through the controller, one frame per operation
+@benchmark("crowd_sync_200")
+def bench_crowd_sync():
+    from PyQt6.QtGui import QImage
+    from game.controller import GameController
+    from game.model import GameModel
+    from game.view import AnimationClip, GameView, SpriteSheet, get_file_path
+    from game.view import game_view_animation
+
+    image = QImage(get_file_path("resources", "inventory", "bucket.png"))
+    game_view_animation._sheets["benchmark_crowd"] = SpriteSheet.pack([image, image.mirrored(False, True)], image.width(), image.height(),
+                                                                       {"walk": AnimationClip("walk", [0, 1])})
+    game_model = GameModel()
+    game_view = GameView()
+    game_controller = GameController(game_model, game_view, autosave=False)
+    for index in range(200):
+        game_model.actors.spawn(f"actor{index}", 10 + index % 20 * 15, 115 + index // 20 * 3, 40.0, "benchmark_crowd", 2)
+    frames = 30
+
+    def run(game_view=game_view):
+        for frame in range(frames):
+            if frame % 10 == 0:
+                for index in range(200):
+                    game_model.walk_actor(f"actor{index}", 300 - index % 20 * 15 if frame % 20 == 0 else 10, 140)
+            game_model.update_model(0.1)
+            game_controller.update_view()
+    return run, frames
+
+
+# Frame updates for dozens of animated props in a shown scene, including the repaint they cause
+@benchmark("animation_60_props")
+def bench_animation():
+    from PyQt6.QtGui import QImage
+    from PyQt6.QtWidgets import QGraphicsView
+    from game.view import AnimationClip, AnimatedProp, Animator, GameScene, SpriteSheet, get_file_path
+
+    image = QImage(get_file_path("resources", "inventory", "bucket.png"))
+    frames = [image, image.mirrored(True, False), image.mirrored(False, True), image.mirrored(True, True)]
+    clip = AnimationClip("spin", [0, 1, 2, 3], fps=12)
+    sheet = SpriteSheet.pack(frames, image.width(), image.height(), {"spin": clip})
+
+    scene = GameScene()
+    animator = Animator()
+    for index in range(60):
+        prop = AnimatedProp(f"prop{index}", sheet, "spin")
+        prop.setPos((index * 29) % 290, (index // 10) * 25)
+        scene.addItem(prop)
+        animator.play(prop)
+    view = QGraphicsView(scene)
+    view.show()
+    frames_run = 60
+    clock = [0.0]
+
+    # The scene and view are bound here to keep them alive for as long as the benchmark runs
+    def run(scene=scene, view=view):
+        for _ in range(frames_run):
+            clock[0] += 1 / 30
+            animator.update(clock[0])
+            QApplication.processEvents()
+    return run, frames_run
+
+
+# Palette cycling on the indexed room background, including the repaint of the shown scene
+@benchmark("palette_cycle_background")
+def bench_palette_cycle():
+    from game.view import GameGraphicsView, GameScene, IndexedBackgroundItem, PaletteCycle, get_file_path, get_indexed_image
+
+    scene = GameScene()
+    indexed = get_indexed_image(get_file_path("resources", "scenes", "scummbar_ega.png"))
+    background = IndexedBackgroundItem(indexed, scene.scale_factor, [PaletteCycle(1, 3, 30), PaletteCycle(9, 11, 30, reverse=True)])
+    scene.add_static_item(background)
+    view = GameGraphicsView(scene)
+    view.show()
+    frames_run = 60
+    clock = [0.0]
+
+    def run(scene=scene, view=view):
+        for _ in range(frames_run):
+            clock[0] += 1 / 30
+            if background.update_cycles(clock[0]):
+                scene.invalidate_background()
+            QApplication.processEvents()
+    return run, frames_run
+
+
+def inventory_benchmark(items):
+    def setup():
+        from game.view import InventoryScrollArea
+        scroll_area = InventoryScrollArea()
+        inventory = ["bucket"] * items
+
+        def run():
+            scroll_area.display_inventory([])
+            scroll_area.display_inventory(inventory)
+        return run, 1
+    return setup
+
+
+for _items in (5, 100, 1000):
+    benchmark(f"inventory_display_{_items}")(inventory_benchmark(_items))
+
+
+def scene_add_benchmark(props):
+    def setup():
+        from game.view import GameScene, Prop, get_file_path, pixmap_cache
+        pixmap = pixmap_cache.get_pixmap(get_file_path("resources", "inventory", "bucket.png"))
+
+        def run():
+            scene = GameScene()
+            for index in range(props):
+                prop = Prop(f"prop{index}", pixmap)
+                prop.setPos(index % 300, (index // 300) % 160)
+                scene.addItem(prop)
+        return run, props
+    return setup
+
+
+for _props in (1000, 5000):
+    benchmark(f"scene_add_props_{_props}", repeat=3)(scene_add_benchmark(_props))
+
+
+@benchmark("walkbox_find_path")
+def bench_walkbox():
+    import random
+    from benchmarks.bench_walkbox import generate_layout, random_points
+    from game.model.game_model_walkbox import WalkboxMap
+
+    walkboxes = WalkboxMap(generate_layout(16, 8), path_cache_size=0)
+    rng = random.Random(1)
+    pairs = list(zip(random_points(walkboxes, 500, rng), random_points(walkboxes, 500, rng)))
+
+    def run():
+        walkboxes.clear_cache()
+        for a, b in pairs:
+            walkboxes.find_path(a, b)
+    return run, len(pairs)
+
+
+def run_benchmarks(names=None):
+    results = {}
+    for name, (setup, repeat, self_timed) in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        call, operations = setup()
+        if self_timed:
+            times = [call() for _ in range(repeat)]
+        else:
+            call()  # warm up caches and imports
+            times = time_call(call, repeat)
+        results[name] = {
+            "median": statistics.median(times),
+            "min": min(times),
+            "max": max(times),
+            "repeat": repeat,
+            "operations": operations,
+            "per_operation": statistics.median(times) / operations,
+        }
+        print(f"{name:<28} {results[name]['median'] * 1000:>10.3f} ms  ({results[name]['per_operation'] * 1e6:.2f} us/op)")
+    return results
+
+
+# Benchmarks whose median grew by more than the threshold (a fraction) over the baseline
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        change = (result["median"] - base["median"]) / base["median"] if base["median"] else 0.0
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:<28} {base['median'] * 1000:>10.3f} -> {result['median'] * 1000:>10.3f} ms  {change * 100:+7.1f}%  {flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the PyQtSCUMM benchmark suite")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file to write results to")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before flagging, as a fraction")
+    parser.add_argument("--only", nargs="*", help="run only these benchmarks")
+    parser.add_argument("--list", action="store_true", help="list benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    try:
+        results = run_benchmarks(args.only)
+    finally:
+        for directory in TEMPORARY_DIRECTORIES:
+            directory.cleanup()
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "time": time.time()},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(report, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import os
+import runpy
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT_DIRECTORY)
+
+from PyQt6.QtCore import QObject, QEvent, QTimer
+from PyQt6.QtWidgets import QApplication
+
+### Runs main.py and prints the wall clock time of the first painted frame, then quits ###
+
+class FirstFrameFilter(QObject):
+
+    def __init__(self, app):
+        super().__init__()
+        self._app = app
+        self.first_frame = None
+
+    def eventFilter(self, watched, event):
+        if self.first_frame is None and event.type() == QEvent.Type.Paint:
+            self.first_frame = time.time()
+            # Let the paint finish before quitting
+            QTimer.singleShot(0, self._app.quit)
+        return False
+
+
+original_exec = QApplication.exec
+frame_filter = None
+
+
+# QApplication.exec is static, so the running app is looked up
+def probe_exec():
+    global frame_filter
+    app = QApplication.instance()
+    frame_filter = FirstFrameFilter(app)
+    app.installEventFilter(frame_filter)
+    return original_exec()
+
+
+if __name__ == "__main__":
+    QApplication.exec = staticmethod(probe_exec)
+    try:
+        runpy.run_path(os.path.join(ROOT_DIRECTORY, "main.py"), run_name="__main__")
+    except SystemExit:
+        pass
+    print(frame_filter.first_frame)
+    os._exit(0)  # skip teardown of audio and worker threads
@@ -0,0 +1,26 @@
+import argparse
+import os
+import time
+
+from game.utils.game_utils import get_file_path
+from game.utils.game_utils_resources import ARCHIVE_FILE, ResourceArchive, build_archive
+
+### Packs the resources folder into resources.pak, which the game then reads instead of loose files ###
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the PyQtSCUMM resource archive")
+    parser.add_argument("--source", default=get_file_path("resources"), help="resources folder to pack")
+    parser.add_argument("--output", default=get_file_path(ARCHIVE_FILE), help="archive to write")
+    parser.add_argument("--list", action="store_true", help="list the archive's index after building")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = build_archive(args.source, args.output)
+    print(f"{result['entries']} resources, {result['bytes']} bytes written to {os.path.relpath(args.output)} "
+          f"in {time.perf_counter() - start:.3f} s")
+
+    if args.list:
+        archive = ResourceArchive(args.output)
+        for entry in archive.entries.values():
+            print(f"  {entry.offset:10d} {entry.length:10d}  {entry.type:<6} {entry.id}")
+        archive.close()
@@ -0,0 +1,20 @@
+import argparse
+import os
+
+from game.utils.game_utils import get_file_path
+from game.utils.game_utils_assets import BUILD_DIRECTORY, build_assets
+
+### Bakes scaled sprites, indexed scene art, hit masks and converted sound effects into build/assets ###
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the PyQtSCUMM asset pipeline")
+    parser.add_argument("--source", default=get_file_path("resources"), help="resources folder to bake")
+    parser.add_argument("--output", default=BUILD_DIRECTORY, help="folder for the baked assets and manifest")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="rebuild everything, not just changed sources")
+    args = parser.parse_args()
+
+    result = build_assets(args.source, args.output, workers=args.workers, force=args.force)
+    print(f"{result['sources']} sources: {result['built']} baked, {result['skipped']} up to date, "
+          f"{result['removed']} removed, {result['failed']} failed in {result['elapsed']:.3f} s "
+          f"({os.path.relpath(args.output)})")
@@ -1 +1,2 @@
 from .game_controller import GameController
+from .game_controller_replay import InputRecorder, ReplayPlayer, load_replay, play_replay
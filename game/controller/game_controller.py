@@ -1,28 +1,56 @@
-import sys
-from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtCore import pyqtSignal, QCoreApplication, QObject, QTimer, Qt
+
+from ..model.game_model_actors import FACING_WEST
+from ..model.game_model_save import SaveManager
+from ..utils.game_utils import get_file_path
+from ..utils.game_utils_profiler import profiled
+from .game_controller_helpers import EventBus, GameLoop
+
+# Seconds of game time between autosaves
+AUTOSAVE_INTERVAL = 60.0
 
 ### Provides the primary controller that interacts with the GameModel and GameView ###
 class GameController(QObject):
+    input_received = pyqtSignal(str, object)  # input name as in SCRIPT_INPUTS, value
+    ticked = pyqtSignal(int)                  # after each fixed model step, with the loop's tick
 
-    def __init__(self, game_model, game_view):
+    def __init__(self, game_model, game_view, tick_rate=100, frame_rate=33, max_catch_up=5, autosave=True):
         super().__init__()
         self._game_model = game_model
         self._game_view = game_view
+        self._save_manager = SaveManager(get_file_path("saves"))
+        self._autosave = autosave
+        self._autosave_timer = 0.0
         self.init_model()
         self.init_view()
-        self.setup_game_loop()
+        self.setup_game_loop(tick_rate, frame_rate, max_catch_up)
 
+    # Model notifications are batched on the event bus and reach the view once per frame
     def init_model(self):
 
+        self._event_bus = EventBus()
+        self._event_bus.register("info", self._game_view.display_info)
+        self._event_bus.register("inventory", self._game_view.display_inventory)
+        self._event_bus.register("say", self._game_view.display_character_say)
+        self._event_bus.register("room", self._game_view.load_room, dedupe=False, clears=("prop_removed",))
+        self._event_bus.register("prop_removed", self._game_view.remove_prop, coalesce=False)
+        self._event_bus.register("verb_highlight", self._game_view.highlight_verb)
+        self._event_bus.register("sound", self._game_view.play_sound, coalesce=False)
+
         self._game_model.info_updated.connect(self.handle_info_updated)
         self._game_model.inventory_updated.connect(self.handle_inventory_updated)
         self._game_model.character_say.connect(self.handle_character_say)
+        self._game_model.prop_removed.connect(self.handle_prop_removed)
+        self._game_model.sound_played.connect(self.handle_sound_played)
+        self._game_model.room_changed.connect(self.handle_room_changed)
+        self._game_model.verb_highlighted.connect(self.handle_verb_highlighted)
 
     # Connect UI signals to controller methods
     def init_view(self):
      
         self._game_view.verb_button_clicked.connect(self.handle_verb_button_click)
         self._game_view.quit_button.clicked.connect(self.handle_quit_button_click)
+        self._game_view.save_button.clicked.connect(self.handle_save_button_click)
         self._game_view.inv_scroll_area.inventory_label_clicked.connect(self.handle_inventory_label_click)
         self._game_view.prop_clicked.connect(self.handle_prop_click)
         self._game_view.prop_entered.connect(self.handle_prop_enter)
@@ -30,68 +58,174 @@ class GameController(QObject):
         self._game_view.hotspot_clicked.connect(self.handle_hotspot_click)
         self._game_view.hotspot_entered.connect(self.handle_hotspot_enter)
         self._game_view.hotspot_left.connect(self.handle_hotspot_leave)
+        self._game_view.exit_clicked.connect(self.handle_exit_click)
+        self._game_view.walk_clicked.connect(self.handle_walk_click)
+        self._game_view.default_verb_clicked.connect(self.handle_default_verb_click)
         # TODO - a lot more to fully enable scene and UI
 
-    def setup_game_loop(self):
+    # Tick and frame rates are in milliseconds. The model always advances in fixed tick steps,
+    # the view is updated at the frame rate, independent of how late the timer fires.
+    def setup_game_loop(self, tick_rate=100, frame_rate=33, max_catch_up=5):
+        self._game_loop = GameLoop(self.update_model, self.update_view, tick_rate, frame_rate, max_catch_up)
+
         self._timer = QTimer()
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
         self._timer.timeout.connect(self.game_loop_tick)
 
-        # Define the tick rate in milliseconds
-        self._tick_rate = 100  # Adjust as needed
-
     def start_game_loop(self):
-        self._timer.start(self._tick_rate)
+        self._game_loop.start()
+        self._timer.start(self._game_loop.timer_interval)
 
-    def game_loop_tick(self):
-        # Update game based on the elapsed time
-        self._game_model.update_model(self._tick_rate / 1000.0)  # Convert to seconds
+    def stop_game_loop(self):
+        self._timer.stop()
+        self._game_loop.stop()
 
-        # Update UI based on game state changes
-        self._game_view.update_view()
+    def set_loop_rates(self, tick_rate, frame_rate):
+        self._game_loop.set_rates(tick_rate, frame_rate)
+        if self._timer.isActive():
+            self._timer.setInterval(self._game_loop.timer_interval)
+
+    @property
+    def game_loop(self):
+        return self._game_loop
+
+    @property
+    def loop_stats(self):
+        return self._game_loop.stats
+
+    def game_loop_tick(self):
+        self._game_loop.advance()
+
+    # Update game based on the fixed elapsed time step (seconds)
+    def update_model(self, elapsed_time):
+        self._game_model.update_model(elapsed_time)
+        self.ticked.emit(self._game_loop.tick)
+
+        self._autosave_timer += elapsed_time
+        if self._autosave and self._autosave_timer >= AUTOSAVE_INTERVAL:
+            self._autosave_timer = 0.0
+            self.autosave_game()
+
+    # Update UI based on game state changes, delivering the frame's batch of model notifications first.
+    # Only actors whose position, frame or visibility changed since the last frame are synced.
+    def update_view(self):
+        self._event_bus.flush()
+        actors = self._game_model.actors
+        rows = actors.take_dirty()
+        if rows.size:
+            states = []
+            for row in rows.tolist():
+                name, sheet, x, y, facing, frame, visible = actors.state(row)
+                states.append((row, name, sheet, x, y, facing == FACING_WEST, frame, visible))
+            self._game_view.sync_actors(states)
+        self._game_view.update_view(self._game_loop.game_time)
+
+    @property
+    def event_bus(self):
+        return self._event_bus
 
     # Update the info label providing active verb + mouseover (prop, hotspot, etc.)
     def handle_info_updated(self, info):
-        self._game_view.display_info(info)
+        self._event_bus.post("info", info)
 
     # Update the inventory panel with current inventory items list
     def handle_inventory_updated(self, inventory_list):
-        self._game_view.display_inventory(inventory_list)
+        self._event_bus.post("inventory", inventory_list)
 
     # Update the character say text in the scene
     def handle_character_say(self, text):
-        self._game_view.display_character_say(text)
+        self._event_bus.post("say", text)
+
+    # Remove a prop from the scene, e.g. once it has been picked up
+    def handle_prop_removed(self, prop_name):
+        self._event_bus.post("prop_removed", prop_name)
+
+    def handle_sound_played(self, name):
+        self._event_bus.post("sound", name)
+
+    # Build and show the scene for the room the model moved to. The new scene has no actor items yet.
+    def handle_room_changed(self, room_name):
+        self._event_bus.post("room", room_name)
+        self._game_model.actors.mark_all_dirty()
+
+    def handle_verb_highlighted(self, verb):
+        self._event_bus.post("verb_highlight", verb)
+
+    # Player inputs. Each is announced on input_received first, which is what an InputRecorder records.
 
     # Update the active verb. Subsequent info change event takes care of view update to streamline changes.
     def handle_verb_button_click(self, verb):
+        self.input_received.emit("verb", verb)
         self._game_model.active_verb = verb
   
-    # Exits at system level when quit button clicked. TODO: more specific handeling of save warning, etc.
+    @property
+    def save_manager(self):
+        return self._save_manager
+
+    # Saves are written on the save manager's worker thread, only the snapshot is taken here
+    @profiled("controller")
+    def save_game(self, slot="save"):
+        return self._save_manager.save(self._game_model.snapshot(), slot)
+
+    @profiled("controller")
+    def autosave_game(self):
+        return self._save_manager.autosave(self._game_model.snapshot())
+
+    @profiled("controller")
+    def load_game(self, slot="save"):
+        self._game_model.restore(self._save_manager.load(slot))
+
+    def handle_save_button_click(self):
+        self.save_game()
+
+    # Quits the application when quit button clicked, so aboutToQuit handlers still run. TODO: more specific handeling of save warning, etc.
     def handle_quit_button_click(self):
-        sys.exit()
+        QCoreApplication.quit()
 
     # Handle click on inventory  
     def handle_inventory_label_click(self, inventory_name):
+        self.input_received.emit("inventory_click", inventory_name)
         self._game_model.handle_inventory_click(inventory_name)
 
     # Prop interaction handling
 
     def handle_prop_click(self, prop_name):
+        self.input_received.emit("prop_click", prop_name)
         self._game_model.handle_prop_click(prop_name)
 
     def handle_prop_enter(self, prop_name):
+        self.input_received.emit("prop_enter", prop_name)
         self._game_model.handle_prop_enter(prop_name)
    
     def handle_prop_leave(self, prop_name):
+        self.input_received.emit("prop_leave", prop_name)
         self._game_model.handle_prop_leave(prop_name)
 
 
     # Hotspot interaction handling
    
     def handle_hotspot_click(self, hotspot_name):
+        self.input_received.emit("hotspot_click", hotspot_name)
         self._game_model.handle_hotspot_click(hotspot_name)
 
     def handle_hotspot_enter(self, hotspot_name):
+        self.input_received.emit("hotspot_enter", hotspot_name)
         self._game_model.handle_hotspot_enter(hotspot_name)
 
     def handle_hotspot_leave(self, hotspot_name):
+        self.input_received.emit("hotspot_leave", hotspot_name)
         self._game_model.handle_hotspot_leave(hotspot_name)
+
+    def handle_exit_click(self, room_name):
+        self.input_received.emit("exit_click", room_name)
+        self._game_model.handle_exit_click(room_name)
+
+    # Clicks on the room outside any prop or hotspot, in logical room coordinates
+    def handle_walk_click(self, x, y):
+        self.input_received.emit("walk_click", [x, y])
+        self._game_model.handle_walk_click(x, y)
+
+    # Right clicks, target type is "prop", "hotspot" or "exit"
+    def handle_default_verb_click(self, target_type, target):
+        self.input_received.emit("default_verb", [target_type, target])
+        self._game_model.handle_default_verb(target_type, target)
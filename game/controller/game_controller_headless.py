@@ -0,0 +1,166 @@
+import json
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from ..model import GameModel
+from .game_controller import GameController
+
+### Headless view stub and runner to drive the model and controller without rendering or audio ###
+
+# Stand-in for a button; only its clicked signal is used by the controller
+class HeadlessButton(QObject):
+    clicked = pyqtSignal()
+
+
+class HeadlessInventory(QObject):
+    inventory_label_clicked = pyqtSignal(str)
+
+
+# Implements the GameView interface the controller uses. Output is recorded instead of drawn.
+class HeadlessView(QObject):
+    verb_button_clicked = pyqtSignal(str)
+    prop_clicked = pyqtSignal(str)
+    prop_entered = pyqtSignal(str)
+    prop_left = pyqtSignal(str)
+    hotspot_entered = pyqtSignal(str)
+    hotspot_left = pyqtSignal(str)
+    hotspot_clicked = pyqtSignal(str)
+    exit_clicked = pyqtSignal(str)
+    walk_clicked = pyqtSignal(float, float)
+    default_verb_clicked = pyqtSignal(str, str)
+
+    def __init__(self):
+        super().__init__()
+        self.quit_button = HeadlessButton()
+        self.save_button = HeadlessButton()
+        self.inv_scroll_area = HeadlessInventory()
+
+        self.info = ""
+        self.inventory = []
+        self.say_lines = []
+        self.removed_props = []
+        self.sounds = []
+        self.room = None
+        self.highlighted_verb = ""
+        self.actor_syncs = 0
+        self.frames = 0
+
+    def update_view(self, game_time=0.0):
+        self.frames += 1
+
+    def display_info(self, info):
+        self.info = info
+
+    def display_inventory(self, inventory_list):
+        self.inventory = list(inventory_list)
+
+    def display_character_say(self, text):
+        self.say_lines.append(text)
+
+    def remove_prop(self, prop_name):
+        self.removed_props.append(prop_name)
+
+    def load_room(self, room_name):
+        self.room = room_name
+
+    def highlight_verb(self, verb):
+        self.highlighted_verb = verb
+
+    def play_sound(self, name):
+        self.sounds.append(name)
+
+    def sync_actors(self, states):
+        self.actor_syncs += len(states)
+
+
+# Scripted inputs, by the controller handler they drive. Walk clicks take an [x, y] value and
+# default verb clicks a [target type, target] value.
+SCRIPT_INPUTS = {
+    "verb": "handle_verb_button_click",
+    "inventory_click": "handle_inventory_label_click",
+    "prop_click": "handle_prop_click",
+    "prop_enter": "handle_prop_enter",
+    "prop_leave": "handle_prop_leave",
+    "hotspot_click": "handle_hotspot_click",
+    "hotspot_enter": "handle_hotspot_enter",
+    "hotspot_leave": "handle_hotspot_leave",
+    "exit_click": "handle_exit_click",
+    "walk_click": "handle_walk_click",
+    "default_verb": "handle_default_verb_click",
+}
+
+
+def load_script(file_path):
+    with open(file_path, "r", encoding="utf-8") as script_file:
+        return json.load(script_file)
+
+
+# Runs playthroughs as fast as the CPU allows. Each tick feeds the scripted inputs for that tick, runs one
+# fixed model step and one view update, without any timer or wall clock pacing.
+class HeadlessRunner:
+
+    def __init__(self, tick_rate=100):
+        self._tick_rate = tick_rate
+
+    def create_game(self):
+        game_model = GameModel()
+        game_view = HeadlessView()
+        game_controller = GameController(game_model, game_view, tick_rate=self._tick_rate, frame_rate=self._tick_rate, autosave=False)
+        return game_model, game_view, game_controller
+
+    # Script events are {"tick": n, "input": one of SCRIPT_INPUTS, "value": argument}. An InputRecorder
+    # given records the playthrough as a replay.
+    def run(self, script, ticks=None, recorder=None):
+        game_model, game_view, game_controller = self.create_game()
+        if recorder is not None:
+            recorder.attach(game_model, game_controller)
+
+        events = sorted(script, key=lambda event: event["tick"])
+        if ticks is None:
+            ticks = events[-1]["tick"] + 1 if events else 0
+
+        game_loop = game_controller.game_loop
+        event_index = 0
+        start = time.perf_counter()
+        for tick in range(ticks):
+            while event_index < len(events) and events[event_index]["tick"] <= tick:
+                self.dispatch(game_controller, events[event_index])
+                event_index += 1
+            game_loop.step()
+            game_loop.render()
+        elapsed = time.perf_counter() - start
+        if recorder is not None:
+            recorder.detach()
+
+        return {
+            "ticks": ticks,
+            "elapsed": elapsed,
+            "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+            "model": game_model,
+            "view": game_view,
+            "controller": game_controller,
+        }
+
+    def run_many(self, script, runs, ticks=None):
+        total_ticks = 0
+        start = time.perf_counter()
+        for _ in range(runs):
+            total_ticks += self.run(script, ticks)["ticks"]
+        elapsed = time.perf_counter() - start
+        return {
+            "runs": runs,
+            "ticks": total_ticks,
+            "elapsed": elapsed,
+            "ticks_per_second": total_ticks / elapsed if elapsed > 0 else float("inf"),
+            "runs_per_minute": runs * 60.0 / elapsed if elapsed > 0 else float("inf"),
+        }
+
+    @staticmethod
+    def dispatch(game_controller, event):
+        handler = getattr(game_controller, SCRIPT_INPUTS[event["input"]])
+        value = event.get("value")
+        if isinstance(value, (list, tuple)):
+            handler(*value)
+        else:
+            handler(value)
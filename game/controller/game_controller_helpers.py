@@ -1,2 +1,293 @@
+import time
+
+from ..utils.game_utils_profiler import profiler
+
 ### All classes supporting the GameController ###
 
+# Per-tick timing counters kept by the GameLoop. All times are in seconds.
+class GameLoopStats:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0              # fixed simulation steps run
+        self.frames = 0             # render updates run
+        self.model_time = 0.0       # total time spent in the model update
+        self.view_time = 0.0        # total time spent in the view update
+        self.last_model_time = 0.0
+        self.last_view_time = 0.0
+        self.overruns = 0           # loop passes that took longer than one tick
+        self.dropped_ticks = 0      # simulation steps discarded by the catch-up limit
+        self.dropped_frames = 0     # render updates missed because the loop ran late
+
+    @property
+    def average_model_time(self):
+        return self.model_time / self.ticks if self.ticks else 0.0
+
+    @property
+    def average_view_time(self):
+        return self.view_time / self.frames if self.frames else 0.0
+
+    def as_dict(self):
+        return {
+            "ticks": self.ticks,
+            "frames": self.frames,
+            "model_time": self.model_time,
+            "view_time": self.view_time,
+            "last_model_time": self.last_model_time,
+            "last_view_time": self.last_view_time,
+            "average_model_time": self.average_model_time,
+            "average_view_time": self.average_view_time,
+            "overruns": self.overruns,
+            "dropped_ticks": self.dropped_ticks,
+            "dropped_frames": self.dropped_frames,
+        }
+
+
+# Fixed timestep loop scheduler. Real elapsed time from a monotonic clock is accumulated and
+# consumed in fixed simulation steps, while render updates run at their own frame rate.
+# Rates are given in milliseconds, matching the original QTimer tick rate.
+class GameLoop:
+
+    def __init__(self, update_callback, render_callback, tick_rate=100, frame_rate=33, max_catch_up=5, clock=time.perf_counter):
+        self._update_callback = update_callback
+        self._render_callback = render_callback
+        self._clock = clock
+        self.max_catch_up = max_catch_up
+        self.set_rates(tick_rate, frame_rate)
+
+        self._stats = GameLoopStats()
+        self._running = False
+        self._accumulator = 0.0
+        self._last_time = 0.0
+        self._last_render_time = 0.0
+        self._game_time = 0.0
+        self._tick = 0
+
+    def set_rates(self, tick_rate, frame_rate):
+        self._tick_rate = tick_rate
+        self._frame_rate = frame_rate
+        self._tick_step = tick_rate / 1000.0  # Convert to seconds
+        self._frame_step = frame_rate / 1000.0
+
+    @property
+    def tick_rate(self):
+        return self._tick_rate
+
+    @property
+    def frame_rate(self):
+        return self._frame_rate
+
+    @property
+    def max_catch_up(self):
+        return self._max_catch_up
+
+    @max_catch_up.setter
+    def max_catch_up(self, max_catch_up):
+        self._max_catch_up = max(1, max_catch_up)
+
+    # Interval the driving timer should fire at so neither ticks nor frames are missed
+    @property
+    def timer_interval(self):
+        return min(self._tick_rate, self._frame_rate)
+
+    # Fraction of a tick left in the accumulator. Useful for interpolating rendered positions.
+    @property
+    def alpha(self):
+        return self._accumulator / self._tick_step
+
+    # Seconds of simulated time, including the part of a tick in the accumulator. Advances smoothly
+    # between ticks for frame based work such as animation.
+    @property
+    def game_time(self):
+        return self._game_time + self._accumulator
+
+    # Fixed steps run since the loop was created, counting the one in progress. Unlike the stats it is
+    # never reset, so inputs and checkpoints can be placed on it.
+    @property
+    def tick(self):
+        return self._tick
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        self._running = True
+        self._accumulator = 0.0
+        self._last_time = self._clock()
+        self._last_render_time = self._last_time
+
+    def stop(self):
+        self._running = False
+
+    # Called from the driving timer. Runs as many fixed steps as the elapsed time allows
+    # (up to the catch-up limit) and renders once if a frame is due.
+    def advance(self):
+        if not self._running:
+            return
+
+        now = self._clock()
+        pass_start = now
+        self._accumulator += now - self._last_time
+        self._last_time = now
+
+        steps = 0
+        while self._accumulator >= self._tick_step:
+            if steps >= self._max_catch_up:
+                # Too far behind. Drop the backlog rather than spiral trying to catch up.
+                dropped = int(self._accumulator / self._tick_step)
+                self._stats.dropped_ticks += dropped
+                self._accumulator -= dropped * self._tick_step
+                break
+            self.step()
+            self._accumulator -= self._tick_step
+            steps += 1
+
+        since_render = self._clock() - self._last_render_time
+        if since_render >= self._frame_step:
+            missed = int(since_render / self._frame_step) - 1
+            if missed > 0:
+                self._stats.dropped_frames += missed
+            self.render()
+            self._last_render_time = self._clock()
+
+        if self._clock() - pass_start > self._tick_step:
+            self._stats.overruns += 1
+
+    # Run exactly one fixed simulation step. Also used directly when driving the loop uncapped.
+    def step(self):
+        self._tick += 1
+        start = self._clock()
+        self._update_callback(self._tick_step)
+        end = self._clock()
+        elapsed = end - start
+        self._game_time += self._tick_step
+        if profiler.enabled:
+            profiler.add_span("loop", "tick", start, end)
+            profiler.add_tick(elapsed)
+
+        self._stats.ticks += 1
+        self._stats.model_time += elapsed
+        self._stats.last_model_time = elapsed
+
+    def render(self):
+        start = self._clock()
+        self._render_callback()
+        end = self._clock()
+        elapsed = end - start
+        if profiler.enabled:
+            profiler.add_span("loop", "frame", start, end)
+            profiler.end_frame()
+
+        self._stats.frames += 1
+        self._stats.view_time += elapsed
+        self._stats.last_view_time = elapsed
+
+
+# Per event type delivery counters of the EventBus
+class EventStats:
+
+    def __init__(self):
+        self.posted = 0      # notifications received from the model
+        self.coalesced = 0   # replaced by a later notification in the same frame
+        self.deduped = 0     # dropped because the value equals what the view already shows
+        self.dropped = 0     # discarded by a later event that makes them moot
+        self.delivered = 0   # handler calls made
+
+    def as_dict(self):
+        return {"posted": self.posted, "coalesced": self.coalesced, "deduped": self.deduped,
+                "dropped": self.dropped, "delivered": self.delivered}
+
+
+# Collects model notifications and delivers them to the view in one batch per frame. Coalesced event
+# types keep only their latest value, deduped types are skipped if the value matches the last one
+# delivered, and other types are delivered in order. An event type can clear pending events of other types, e.g. a room
+# change drops prop removals meant for the scene it replaces.
+class EventBus:
+
+    def __init__(self):
+        self._handlers = {}  # event type -> (handler, coalesce, dedupe, clears)
+        self._pending = []   # [event type, value] in posting order
+        self._latest = {}    # coalesced event type -> its pending entry
+        self._delivered = {} # coalesced event type -> last value delivered
+        self._stats = {}
+        self.flushes = 0
+
+    def register(self, event_type, handler, coalesce=True, dedupe=None, clears=()):
+        dedupe = coalesce if dedupe is None else dedupe
+        self._handlers[event_type] = (handler, coalesce, dedupe, tuple(clears))
+        self._stats[event_type] = EventStats()
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def post(self, event_type, value):
+        _, coalesce, _, clears = self._handlers[event_type]
+        stats = self._stats[event_type]
+        stats.posted += 1
+
+        # Lists are copied as the model passes its own
+        if isinstance(value, list):
+            value = list(value)
+
+        for cleared in clears:
+            self._drop(cleared)
+
+        if coalesce:
+            entry = self._latest.get(event_type)
+            if entry is not None:
+                entry[1] = value
+                stats.coalesced += 1
+                return
+            entry = self._latest[event_type] = [event_type, value]
+            self._pending.append(entry)
+        else:
+            self._pending.append([event_type, value])
+
+    # Deliver everything posted since the last flush. Events posted by handlers wait for the next flush.
+    def flush(self):
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, []
+        self._latest.clear()
+        self.flushes += 1
+
+        delivered = 0
+        for event_type, value in pending:
+            handler, _, dedupe, _ = self._handlers[event_type]
+            stats = self._stats[event_type]
+            if dedupe:
+                if event_type in self._delivered and self._delivered[event_type] == value:
+                    stats.deduped += 1
+                    continue
+                self._delivered[event_type] = value
+            if profiler.enabled:
+                start = profiler.now()
+                handler(value)
+                profiler.add_span("controller", f"deliver {event_type}", start, profiler.now())
+            else:
+                handler(value)
+            stats.delivered += 1
+            delivered += 1
+        return delivered
+
+    # Forget what was delivered, so the next value of every type reaches the view
+    def reset(self):
+        self._delivered.clear()
+
+    def stats(self):
+        return {event_type: stats.as_dict() for event_type, stats in self._stats.items()}
+
+    def _drop(self, event_type):
+        kept = [entry for entry in self._pending if entry[0] != event_type]
+        self._stats[event_type].dropped += len(self._pending) - len(kept)
+        self._pending = kept
+        self._latest.pop(event_type, None)
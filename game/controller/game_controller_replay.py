@@ -0,0 +1,197 @@
+import hashlib
+import json
+import time
+
+from .game_controller_headless import HeadlessRunner
+
+### Records player inputs at the controller with their tick, and replays them deterministically ###
+#
+# The model only advances in fixed ticks and every player input reaches it through a GameController
+# handler, so a log of (tick, input) pairs replays to the same state. A hash of the model's snapshot
+# is stored every CHECKPOINT_INTERVAL ticks and once at the end, and a replay reports every
+# checkpoint it does not reproduce.
+#
+# Replays are JSON:
+#   {"version": 1, "tick_rate": ms, "checkpoint_interval": ticks, "ticks": ticks recorded,
+#    "start": model snapshot, "inputs": [[tick, game time, input, value], ...],
+#    "checkpoints": [[tick, hash], ...], "final": hash}
+# Input names and values are those of the scripted playthroughs (SCRIPT_INPUTS). Ticks count from
+# the start of the recording. The hash at tick n is taken after n ticks, before inputs given on tick n.
+
+REPLAY_VERSION = 1
+CHECKPOINT_INTERVAL = 50  # ticks, five seconds at the default tick rate
+
+
+def state_hash(game_model):
+    data = json.dumps(game_model.snapshot(), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def load_replay(file_path):
+    with open(file_path, "r", encoding="utf-8") as replay_file:
+        replay = json.load(replay_file)
+    if replay.get("version") != REPLAY_VERSION:
+        raise ValueError(f"{file_path} is replay version {replay.get('version')}, expected {REPLAY_VERSION}")
+    return replay
+
+
+# One input per line, so replays kept as regression tests diff well
+def save_replay(replay, file_path):
+    header = {key: value for key, value in replay.items() if key != "inputs"}
+    lines = [json.dumps(entry, separators=(",", ":")) for entry in replay["inputs"]]
+    with open(file_path, "w", encoding="utf-8") as replay_file:
+        replay_file.write(json.dumps(header, separators=(",", ":"))[:-1])
+        replay_file.write(',"inputs":[\n' + ",\n".join(lines) + "\n]}\n")
+
+
+# Records the inputs a GameController receives, from the tick it is attached on until it is detached
+class InputRecorder:
+
+    def __init__(self, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self._checkpoint_interval = checkpoint_interval
+        self._game_model = None
+        self._game_controller = None
+        self._replay = None
+
+    @property
+    def recording(self):
+        return self._game_controller is not None
+
+    def attach(self, game_model, game_controller):
+        self.detach()
+        self._game_model = game_model
+        self._game_controller = game_controller
+        game_loop = game_controller.game_loop
+        self._start_tick = game_loop.tick
+        self._start_time = game_loop.game_time
+        self._replay = {"version": REPLAY_VERSION, "tick_rate": game_loop.tick_rate, "checkpoint_interval": self._checkpoint_interval,
+                        "ticks": 0, "start": game_model.snapshot(), "inputs": [], "checkpoints": [[0, state_hash(game_model)]]}
+        game_controller.input_received.connect(self.record_input)
+        game_controller.ticked.connect(self.record_tick)
+
+    # Stop recording. The final hash covers the inputs given after the last tick.
+    def detach(self):
+        if self._game_controller is None:
+            return
+        self._game_controller.input_received.disconnect(self.record_input)
+        self._game_controller.ticked.disconnect(self.record_tick)
+        self._replay["final"] = state_hash(self._game_model)
+        self._game_controller = None
+        self._game_model = None
+
+    def record_input(self, name, value):
+        game_loop = self._game_controller.game_loop
+        self._replay["inputs"].append([game_loop.tick - self._start_tick, round(game_loop.game_time - self._start_time, 3), name, value])
+
+    def record_tick(self, tick):
+        tick -= self._start_tick
+        self._replay["ticks"] = tick
+        if tick % self._checkpoint_interval == 0:
+            self._replay["checkpoints"].append([tick, state_hash(self._game_model)])
+
+    @property
+    def replay(self):
+        return self._replay
+
+    def save(self, file_path):
+        if self.recording:
+            self.detach()
+        save_replay(self._replay, file_path)
+
+
+# Feeds a replay's inputs to a GameController on their ticks and checks the state at every checkpoint.
+# Works with whatever drives the game loop: the timer at normal speed or a headless loop uncapped.
+class ReplayPlayer:
+
+    def __init__(self, replay, on_finished=None):
+        self._replay = replay
+        self._inputs = replay["inputs"]
+        self._checkpoints = dict(replay["checkpoints"])
+        self._on_finished = on_finished
+        self._game_model = None
+        self._game_controller = None
+        self.divergences = []  # (tick, expected hash, actual hash), tick None for the final state
+        self.finished = False
+
+    # Start playing on the next tick. A game not in the recorded start state is restored to it first.
+    def attach(self, game_model, game_controller):
+        self._game_model = game_model
+        self._game_controller = game_controller
+        game_loop = game_controller.game_loop
+        if game_loop.tick_rate != self._replay["tick_rate"]:
+            game_controller.set_loop_rates(self._replay["tick_rate"], game_loop.frame_rate)
+        if state_hash(game_model) != self._checkpoints.get(0):
+            game_model.restore(self._replay["start"])
+
+        self._start_tick = game_loop.tick
+        self._index = 0
+        self.divergences = []
+        self.finished = False
+        game_controller.ticked.connect(self.play_tick)
+        self.play_tick(self._start_tick)
+
+    def detach(self):
+        if self._game_controller is not None:
+            self._game_controller.ticked.disconnect(self.play_tick)
+            self._game_controller = None
+
+    @property
+    def ticks(self):
+        return self._replay["ticks"]
+
+    def play_tick(self, tick):
+        tick -= self._start_tick
+        expected = self._checkpoints.get(tick)
+        if expected is not None:
+            self.check(tick, expected)
+
+        while self._index < len(self._inputs) and self._inputs[self._index][0] <= tick:
+            _, _, name, value = self._inputs[self._index]
+            HeadlessRunner.dispatch(self._game_controller, {"input": name, "value": value})
+            self._index += 1
+
+        if tick >= self._replay["ticks"]:
+            if "final" in self._replay:
+                self.check(None, self._replay["final"])
+            self.finished = True
+            self.detach()
+            if self._on_finished is not None:
+                self._on_finished(self)
+
+    def check(self, tick, expected):
+        actual = state_hash(self._game_model)
+        if actual != expected:
+            if not self.divergences:
+                print(f"Replay warning: state diverged {'at the end' if tick is None else f'at tick {tick}'}, "
+                      f"expected {expected}, got {actual}")
+            self.divergences.append((tick, expected, actual))
+
+
+# Play a replay on a headless game. Uncapped when speed is None, otherwise paced against the wall
+# clock at speed times the recorded tick rate, for realistic load profiles.
+def play_replay(replay, speed=None):
+    game_model, game_view, game_controller = HeadlessRunner(replay["tick_rate"]).create_game()
+    player = ReplayPlayer(replay)
+    player.attach(game_model, game_controller)
+
+    game_loop = game_controller.game_loop
+    tick_step = replay["tick_rate"] / 1000.0
+    start = time.perf_counter()
+    for tick in range(1, replay["ticks"] + 1):
+        game_loop.step()
+        game_loop.render()
+        if speed:
+            delay = start + tick * tick_step / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "ticks": replay["ticks"],
+        "elapsed": elapsed,
+        "ticks_per_second": replay["ticks"] / elapsed if elapsed > 0 else float("inf"),
+        "divergences": player.divergences,
+        "model": game_model,
+        "view": game_view,
+        "controller": game_controller,
+    }
@@ -1 +1,3 @@
 from .game_model import GameModel
+from .game_model_actors import ActorStore
+from .game_model_variables import VariableStore
@@ -1,18 +1,54 @@
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from ..utils.game_utils import get_file_path, START_ROOM
+from ..utils.game_utils_profiler import profiled
+from ..utils.game_utils_resources import resources
+from .game_model_actors import ActorStore, EGO
+from .game_model_helpers import InteractionEngine, DialogueQueue, ITEM_VERBS
+from .game_model_script import ScriptScheduler, LINE_FINISHED, ACTOR_ARRIVED, VARIABLE_CHANGED
+from .game_model_variables import VariableStore
+from .game_model_walkbox import WalkboxMap
+
+# Walking speed of the player character in logical pixels per second
+EGO_SPEED = 60.0
+
 ### Provides the primary model for game state and logic ###
 class GameModel(QObject):
     info_updated = pyqtSignal(str)
     inventory_updated = pyqtSignal(list)
     character_say = pyqtSignal(str)
+    prop_removed = pyqtSignal(str)
+    room_changed = pyqtSignal(str)
+    sound_played = pyqtSignal(str)
+    verb_highlighted = pyqtSignal(str)  # default verb of the target under the mouse, "" for none
 
-    def __init__(self):
+    def __init__(self, interactions_file_path=None):
         super().__init__()
         self._active_verb = "Walk to"
         self._active_mouseover = ""
+        self._mouseover_type = None
+        self._highlighted_verb = ""
+        self._active_item = None  # inventory item held for Use/Give
+        self._room = START_ROOM
+        self._walkboxes = WalkboxMap([])
+        self._actors = ActorStore()  # the ego and the current room's actors
+        self._actors.spawn(EGO, 0.0, 0.0, EGO_SPEED, visible=False)  # not drawn yet
         self._inventory_list = []
-        self._got_bucket = False
-        self._talked_to_pirate = False
+        self._removed_props = {}  # room name -> names of props taken out of the room
+        self._dialogue = DialogueQueue()
+        self._scripts = ScriptScheduler()
+
+        # Interactions and the game variables they test are defined in data. Scripts waiting on a
+        # variable wake when it changes.
+        if interactions_file_path is None:
+            interactions_file_path = get_file_path("resources", "data", "interactions.json")
+        self._interactions = InteractionEngine.from_file(interactions_file_path)
+        self._variables = VariableStore(self.emit_variable_changed)
+        self._variables.declare_all(self._interactions.initial_state)
+
+        self.load_room_data(self._room)
+        for issue in self._interactions.validate(self._variables.names()):
+            print(f"Interaction warning: {issue}")
 
     @property
     def active_verb(self):
@@ -22,6 +58,7 @@ class GameModel(QObject):
     def active_verb(self, verb):
         if self._active_verb != verb:
             self._active_verb = verb
+            self._active_item = None  # a held item only applies to the verb it was picked with
             self.update_info()
 
     @property
@@ -34,65 +71,273 @@ class GameModel(QObject):
             self._active_mouseover = mouseover
             self.update_info()
 
+    @property
+    def active_item(self):
+        return self._active_item
+
+    @property
+    def room(self):
+        return self._room
+
+    @property
+    def walkboxes(self):
+        return self._walkboxes
+
+    @property
+    def actors(self):
+        return self._actors
+
+    @property
+    def ego_position(self):
+        return self._actors.position(EGO)
+
+    @property
+    def ego_walking(self):
+        return self._actors.walking(EGO)
+
+    @property
+    def interactions(self):
+        return self._interactions
+
+    # Global and current room variables, read and set by name
+    @property
+    def state(self):
+        return self._variables
+
+    @property
+    def dialogue(self):
+        return self._dialogue
+
+    @property
+    def scripts(self):
+        return self._scripts
+
     def update_info(self):
-        info = f"{self.active_verb} {self.active_mouseover}"
+        if self._active_item is not None:
+            info = f"{self.active_verb} {self._active_item} {ITEM_VERBS[self.active_verb]} {self.active_mouseover}"
+        else:
+            info = f"{self.active_verb} {self.active_mouseover}"
         self.info_updated.emit(info)
 
     def reset_info(self):
         self._active_verb = "Walk to"
         self._active_mouseover = ""
+        self._active_item = None
         self.update_info()
 
     def add_inventory(self, name):
         self._inventory_list.append(name)
         self.inventory_updated.emit(self._inventory_list)
 
+    def remove_inventory(self, name):
+        if name in self._inventory_list:
+            self._inventory_list.remove(name)
+            self.inventory_updated.emit(self._inventory_list)
+
+    # Walkable areas, the player's start point, the room's actors and its local variables come from its data file
+    def load_room_data(self, room_name):
+        data = resources.load_json(get_file_path("resources", "rooms", f"{room_name}.json"))
+        self._walkboxes = WalkboxMap.from_data(data.get("walkboxes", []))
+        self._variables.enter_room(room_name, data.get("variables"))
+        self._actors.clear(keep=(EGO,))
+        self._actors.set_position(EGO, *data.get("ego_start", (0.0, 0.0)))
+        for actor in data.get("actors", []):
+            self._actors.spawn(actor["name"], actor["x"], actor["y"], actor.get("speed", EGO_SPEED), actor.get("sheet"),
+                               actor.get("walk_frames", 1))
+
+    @profiled("model")
+    def change_room(self, room_name):
+        if self._room != room_name:
+            self._room = room_name
+            self.load_room_data(room_name)
+            self.room_changed.emit(room_name)
+            self.emit_removed_props()
+
+    def remove_prop(self, prop_name):
+        removed = self._removed_props.setdefault(self._room, [])
+        if prop_name not in removed:
+            removed.append(prop_name)
+        self.prop_removed.emit(prop_name)
+
+    # Props taken earlier stay gone when a room's scene is rebuilt
+    def emit_removed_props(self):
+        for prop_name in self._removed_props.get(self._room, []):
+            self.prop_removed.emit(prop_name)
+
+    # All game state as plain values, for the save system
+    @profiled("model")
+    def snapshot(self):
+        return {
+            "room": self._room,
+            "active_verb": self._active_verb,
+            "active_item": self._active_item,
+            "inventory": list(self._inventory_list),
+            "removed_props": {room: list(props) for room, props in self._removed_props.items()},
+            "state": self._variables.snapshot(),
+            "room_state": self._variables.room_snapshot(),
+            "ego_position": list(self._actors.position(EGO)),
+            "ego_path": [list(point) for point in self._actors.path(EGO)],
+            "actors": self._actors.snapshot(),
+        }
+
+    # Restore state from a snapshot directly, then bring the view in line with it
+    @profiled("model")
+    def restore(self, snapshot):
+        self._room = snapshot["room"]
+        self.load_room_data(self._room)
+        self._active_verb = snapshot["active_verb"]
+        self._active_item = snapshot["active_item"]
+        self._active_mouseover = ""
+        self._inventory_list = list(snapshot["inventory"])
+        self._removed_props = {room: list(props) for room, props in snapshot["removed_props"].items()}
+        self._variables.reset()
+        self._variables.restore(snapshot["state"], snapshot.get("room_state"))
+        self._actors.set_position(EGO, *snapshot["ego_position"])
+        self._actors.walk(EGO, [tuple(point) for point in snapshot["ego_path"]])
+        self._actors.restore(snapshot.get("actors", {}))
+
+        self._scripts.stop_all()
+        if self._dialogue.clear() is not None:
+            self.character_say.emit("")
+        self.room_changed.emit(self._room)
+        self.emit_removed_props()
+        self.inventory_updated.emit(self._inventory_list)
+        self.update_info()
+
+    def walk_ego(self, x, y):
+        self.walk_actor(EGO, x, y)
+
+    @profiled("model")
+    def walk_actor(self, name, x, y):
+        self._actors.walk(name, self._walkboxes.find_path(self._actors.position(name), (x, y)))
+
+    # Wake only the scripts waiting on the variable. Room variables are keyed by (room, name), so they
+    # do not wake scripts waiting on a global of the same name.
+    def emit_variable_changed(self, room, name, value):
+        self._scripts.emit(VARIABLE_CHANGED, name if room is None else (room, name))
+
+    # Lines are queued and shown one after another, each for as long as it takes to read
     def say_character(self, text):
-        self.character_say.emit(text)
+        shown = self._dialogue.say(text)
+        if shown is not None:
+            self.character_say.emit(shown)
+
+    # Sound effect file in resources/audio, e.g. from a rule's sound action
+    def play_sound(self, name):
+        self.sound_played.emit(name)
 
+    # Start a script registered with the scheduler, e.g. from a rule's script action
+    def start_script(self, name, *args):
+        if not self._scripts.registered(name):
+            print(f"Script warning: no script named '{name}'")
+            return None
+        return self._scripts.start(name, self, *args)
+
+    # One fixed step: dialogue and walking first, so scripts waiting on them wake in the same tick.
+    # All walking actors move in one pass over the actor store.
+    @profiled("model")
     def update_model(self, elapsed_time):
-        pass
+        shown = self._dialogue.update(elapsed_time)
+        if shown is not None:
+            self.character_say.emit(shown)
+            self._scripts.emit(LINE_FINISHED)
+
+        for name in self._actors.update(elapsed_time):
+            self._scripts.emit(ACTOR_ARRIVED, name)
+
+        self._scripts.update(elapsed_time)
+
+    # Look up the rule for a click and apply its actions. Returns False if no rule matched.
+    @profiled("model")
+    def interact(self, target_type, target):
+        rule = self._interactions.lookup(self.active_verb, target_type, target, self._variables, self._active_item)
+        if rule is None:
+            return False
+
+        actions = rule.actions
+        self._variables.update(actions.get("set", {}))
+        if "add_inventory" in actions:
+            self.add_inventory(actions["add_inventory"])
+        if "remove_inventory" in actions:
+            self.remove_inventory(actions["remove_inventory"])
+        if "remove_prop" in actions:
+            self.remove_prop(actions["remove_prop"])
+        if "say" in actions:
+            self.say_character(actions["say"])
+        if "script" in actions:
+            self.start_script(actions["script"])
+        if "sound" in actions:
+            self.play_sound(actions["sound"])
+        return True
 
     def handle_inventory_click(self, inventory_name):
-        if(inventory_name == "bucket"):
-            self.say_character("It's a nice bucket.")
+        # Use/Give pick the item up as the held item, unless a rule handles the verb on the item alone
+        if (self.active_verb in ITEM_VERBS and self._active_item is None
+                and not self._interactions.has_rule(self.active_verb, "inventory", inventory_name)):
+            self._active_item = inventory_name
+            self.update_info()
+            return
+
+        self.interact("inventory", inventory_name)
+        self.reset_info()
 
     def handle_prop_click(self, prop_name):
-        print("reached 2")
-        if(prop_name == "bucket"):
-            if self.active_verb == "Pick up":
-                self.add_inventory(prop_name)
-                self.say_character("Yeah! A bucket!")
-                self._got_bucket = True
-            elif self.active_verb == "Look at":
-                self.say_character("I want it!")
-            else:
-                self.say_character("That doesn't seem to work.")
+        self.interact("prop", prop_name)
         self.reset_info()
 
+    # The active_mouseover setter updates the info line
     def handle_prop_enter(self, prop_name):
+        self._mouseover_type = "prop"
         self.active_mouseover = prop_name
-        self.update_info()
+        self.update_verb_highlight()
 
     def handle_prop_leave(self, prop_name):
+        self._mouseover_type = None
         self.active_mouseover = ""
-        self.update_info()
+        self.update_verb_highlight()
 
     def handle_hotspot_click(self, hotspot_name):
-        if hotspot_name == "Pirate":
-            if self.active_verb == "Talk to":
-                self.say_character("I'm Guybrush Threpwood, mighty pirate!")
-                self._talked_to_pirate = True
-            elif self.active_verb == "Look at":
-                self.say_character("He's mighty. But not as mighty as me.")
-            else:
-                self.say_character("He doesn't seem interested.")
+        self.interact("hotspot", hotspot_name)
         self.reset_info()
 
+    # The active_mouseover setter updates the info line
     def handle_hotspot_enter(self, hotspot_name):
+        self._mouseover_type = "hotspot"
         self.active_mouseover = hotspot_name
-        self.update_info()
+        self.update_verb_highlight()
 
     def handle_hotspot_leave(self, hotspot_name):
+        self._mouseover_type = None
         self.active_mouseover = ""
-        self.update_info()
\ No newline at end of file
+        self.update_verb_highlight()
+
+    # Emitted only when the highlighted verb changes
+    def update_verb_highlight(self):
+        verb = self._interactions.default_verb(self._active_mouseover) if self._mouseover_type else ""
+        if verb != self._highlighted_verb:
+            self._highlighted_verb = verb
+            self.verb_highlighted.emit(verb)
+
+    # Right click: run the target's default verb. The active verb and held item stay as they were.
+    def handle_default_verb(self, target_type, target):
+        if target_type == "exit":
+            self.change_room(target)
+            self._mouseover_type = None
+            self._active_mouseover = ""  # the exit is gone with the room
+        else:
+            active_verb, active_item = self._active_verb, self._active_item
+            self._active_verb, self._active_item = self._interactions.default_verb(target), None
+            self.interact(target_type, target)
+            self._active_verb, self._active_item = active_verb, active_item
+        self.update_info()
+        self.update_verb_highlight()
+
+    def handle_exit_click(self, room_name):
+        if self.active_verb == "Walk to":
+            self.change_room(room_name)
+        self.reset_info()
+
+    def handle_walk_click(self, x, y):
+        if self.active_verb == "Walk to":
+            self.walk_ego(x, y)
+        self.reset_info()
\ No newline at end of file
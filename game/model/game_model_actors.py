@@ -0,0 +1,329 @@
+import numpy as np
+
+from ..utils.game_utils_profiler import profiled
+from .game_model_walkbox import advance_along_path
+
+### Actors held as struct-of-arrays NumPy buffers, moved in one vectorised pass per tick ###
+#
+# One row per actor. Rows of removed actors are reused, and the buffers double when they run out.
+# Only walking actors carry a Python list, their remaining waypoints. Rows whose position, facing,
+# frame or visibility changed are marked dirty, and the view only syncs those.
+
+ACTOR_CAPACITY = 16    # rows allocated up front
+WALK_FPS = 8.0         # walk cycle frames per second
+SCALAR_WALKERS = 8     # up to this many walking actors are moved one by one, below the cost of a vectorised pass
+EGO = "ego"
+NO_ROWS = np.zeros(0, dtype=np.intp)
+
+# Facing, as SCUMM numbers it
+FACING_WEST, FACING_EAST, FACING_SOUTH, FACING_NORTH = range(4)
+
+# Per actor buffers. Positions and speeds are float64, so walking stays as precise as with plain floats.
+ACTOR_FIELDS = {
+    "x": np.float64,
+    "y": np.float64,
+    "target_x": np.float64,    # waypoint being walked to
+    "target_y": np.float64,
+    "speed": np.float64,       # logical pixels per second
+    "vx": np.float32,          # velocity over the last tick, logical pixels per second
+    "vy": np.float32,
+    "frame_time": np.float32,  # seconds into the walk cycle
+    "frame": np.uint16,
+    "frame_count": np.uint16,  # frames in the walk cycle
+    "facing": np.uint8,
+    "alive": np.bool_,
+    "visible": np.bool_,
+    "walking": np.bool_,
+    "dirty": np.bool_,
+}
+
+
+class ActorStore:
+
+    def __init__(self, capacity=ACTOR_CAPACITY):
+        self._capacity = 0
+        self._count = 0          # rows in use or freed, rows beyond are untouched
+        self._names = []         # row -> actor name, None for a free row
+        self._sheets = []        # row -> sprite sheet name or None
+        self._paths = {}         # row -> waypoints after the target, only while walking
+        self._rows = {}          # name -> row
+        self._free = []
+        for field, dtype in ACTOR_FIELDS.items():
+            setattr(self, f"_{field}", np.zeros(0, dtype=dtype))
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        for field in ACTOR_FIELDS:
+            old = getattr(self, f"_{field}")
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, f"_{field}", new)
+        self._capacity = capacity
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, name):
+        return name in self._rows
+
+    @property
+    def names(self):
+        return list(self._rows)
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    # Bytes held by the buffers, and per allocated row
+    @property
+    def nbytes(self):
+        return sum(getattr(self, f"_{field}").nbytes for field in ACTOR_FIELDS)
+
+    @staticmethod
+    def bytes_per_actor():
+        return sum(np.dtype(dtype).itemsize for dtype in ACTOR_FIELDS.values())
+
+    def row(self, name):
+        return self._rows[name]
+
+    def spawn(self, name, x, y, speed=60.0, sheet=None, frame_count=1, facing=FACING_SOUTH, visible=True):
+        if name in self._rows:
+            self.remove(name)
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._count == self._capacity:
+                self._grow(self._capacity * 2)
+            row = self._count
+            self._count += 1
+            self._names.append(None)
+            self._sheets.append(None)
+
+        self._names[row] = name
+        self._sheets[row] = sheet
+        self._rows[name] = row
+        self._x[row] = self._target_x[row] = x
+        self._y[row] = self._target_y[row] = y
+        self._speed[row] = speed
+        self._vx[row] = self._vy[row] = 0.0
+        self._frame_time[row] = 0.0
+        self._frame[row] = 0
+        self._frame_count[row] = max(1, frame_count)
+        self._facing[row] = facing
+        self._alive[row] = True
+        self._visible[row] = visible
+        self._walking[row] = False
+        self._dirty[row] = True
+        return row
+
+    # Removed actors stay dirty, so the view drops their items on the next sync
+    def remove(self, name):
+        row = self._rows.pop(name, None)
+        if row is None:
+            return
+        self._paths.pop(row, None)
+        self._alive[row] = False
+        self._walking[row] = False
+        self._visible[row] = False
+        self._dirty[row] = True
+        self._names[row] = None
+        self._free.append(row)
+
+    # Remove every actor except the ones named, e.g. when the ego leaves a room
+    def clear(self, keep=()):
+        for name in [name for name in self._rows if name not in keep]:
+            self.remove(name)
+
+    def position(self, name):
+        row = self._rows[name]
+        return (float(self._x[row]), float(self._y[row]))
+
+    def set_position(self, name, x, y):
+        row = self._rows[name]
+        self.stop(name)
+        self._x[row] = self._target_x[row] = x
+        self._y[row] = self._target_y[row] = y
+        self._dirty[row] = True
+
+    def sheet(self, name):
+        return self._sheets[self._rows[name]]
+
+    def facing(self, name):
+        return int(self._facing[self._rows[name]])
+
+    def frame(self, name):
+        return int(self._frame[self._rows[name]])
+
+    def visible(self, name):
+        return bool(self._visible[self._rows[name]])
+
+    def set_visible(self, name, visible):
+        row = self._rows[name]
+        if self._visible[row] != visible:
+            self._visible[row] = visible
+            self._dirty[row] = True
+
+    def walking(self, name):
+        return bool(self._walking[self._rows[name]])
+
+    # Waypoints still ahead, the one being walked to first
+    def path(self, name):
+        row = self._rows[name]
+        if not self._walking[row]:
+            return []
+        return [(float(self._target_x[row]), float(self._target_y[row]))] + self._paths[row]
+
+    def walk(self, name, path):
+        row = self._rows[name]
+        if not path:
+            self.stop(name)
+            return
+        self._target_x[row], self._target_y[row] = path[0]
+        self._paths[row] = [tuple(point) for point in path[1:]]
+        self._walking[row] = True
+
+    def stop(self, name):
+        row = self._rows[name]
+        self._paths.pop(row, None)
+        if self._walking[row]:
+            self._walking[row] = False
+            self._vx[row] = self._vy[row] = 0.0
+            self._frame_time[row] = 0.0
+            self._frame[row] = 0
+            self._dirty[row] = True
+
+    # Move every walking actor by one fixed step. The first pass runs over the whole buffers under a
+    # mask. Actors that reach a waypoint carry the distance left over to the next one, as
+    # advance_along_path does, so further passes run only for the few that do. Returns the names of
+    # the actors that arrived at the end of their path.
+    @profiled("model")
+    def update(self, elapsed_time):
+        if elapsed_time <= 0 or not self._paths:
+            return []
+        if len(self._paths) <= SCALAR_WALKERS:
+            return [self._names[row] for row in list(self._paths) if self._update_row(row, elapsed_time)]
+
+        count = self._count
+        walked = self._walking[:count].copy()
+
+        x, y = self._x[:count], self._y[:count]
+        start_x, start_y = x.copy(), y.copy()
+        self._dirty[:count] |= walked
+        remaining = self._speed[:count] * elapsed_time
+        dx = self._target_x[:count] - x
+        dy = self._target_y[:count] - y
+        distance = np.hypot(dx, dy)
+        reached = walked & (distance <= remaining)
+        moving = walked & ~reached
+        x += np.divide(dx * remaining, distance, out=np.zeros(count), where=moving)
+        y += np.divide(dy * remaining, distance, out=np.zeros(count), where=moving)
+
+        arrived = []
+        active = np.flatnonzero(reached)
+        remaining = remaining[active] - distance[active]
+        while active.size:
+            self._x[active] = self._target_x[active]
+            self._y[active] = self._target_y[active]
+
+            # Next waypoint, or the end of the walk. Only runs for the actors that reached one.
+            carry = np.zeros(active.size, dtype=bool)
+            for position, row in enumerate(active.tolist()):
+                path = self._paths.get(row)
+                if path:
+                    self._target_x[row], self._target_y[row] = path.pop(0)
+                    carry[position] = remaining[position] > 0
+                else:
+                    self._paths.pop(row, None)
+                    self._walking[row] = False
+                    arrived.append(self._names[row])
+            active, remaining = active[carry], remaining[carry]
+            if not active.size:
+                break
+
+            dx = self._target_x[active] - self._x[active]
+            dy = self._target_y[active] - self._y[active]
+            distance = np.hypot(dx, dy)
+            reached = distance <= remaining
+            moving = ~reached
+            moved = active[moving]
+            self._x[moved] += dx[moving] * remaining[moving] / distance[moving]
+            self._y[moved] += dy[moving] * remaining[moving] / distance[moving]
+            active, remaining = active[reached], remaining[reached] - distance[reached]
+
+        # Velocity and facing from the whole tick's movement, walk cycle frames from the time walked
+        dx, dy = x - start_x, y - start_y
+        walking = self._walking[:count]
+        still = walked & walking
+        stopped = walked & ~walking
+        self._vx[:count] = np.where(still, dx / elapsed_time, 0.0)
+        self._vy[:count] = np.where(still, dy / elapsed_time, 0.0)
+        facing = np.where(np.abs(dx) >= np.abs(dy), FACING_WEST + (dx > 0), FACING_SOUTH + (dy < 0))  # east and north follow
+        np.copyto(self._facing[:count], facing, where=(dx != 0) | (dy != 0), casting="unsafe")
+
+        frame_time = self._frame_time[:count]
+        frame_time += np.where(still, elapsed_time, 0.0).astype(np.float32)
+        frame_time[stopped] = 0.0
+        self._frame[:count] = np.where(walked, (frame_time * WALK_FPS).astype(np.int64) % self._frame_count[:count], self._frame[:count])
+        return arrived
+
+    # One walking actor moved on its own, as update does for all of them. True if it arrived.
+    def _update_row(self, row, elapsed_time):
+        x, y = self._x.item(row), self._y.item(row)
+        path = [(self._target_x.item(row), self._target_y.item(row))] + self._paths[row]
+        new_x, new_y = advance_along_path((x, y), path, self._speed.item(row), elapsed_time)
+        self._x[row], self._y[row] = new_x, new_y
+        self._dirty[row] = True
+
+        dx, dy = new_x - x, new_y - y
+        if dx or dy:
+            self._facing[row] = FACING_WEST + (dx > 0) if abs(dx) >= abs(dy) else FACING_SOUTH + (dy < 0)
+        if path:
+            self._target_x[row], self._target_y[row] = path[0]
+            self._paths[row] = path[1:]
+            self._vx[row], self._vy[row] = dx / elapsed_time, dy / elapsed_time
+            self._frame_time[row] += elapsed_time
+            self._frame[row] = int(self._frame_time[row] * WALK_FPS) % self._frame_count.item(row)
+            return False
+
+        self._paths.pop(row, None)
+        self._walking[row] = False
+        self._vx[row] = self._vy[row] = 0.0
+        self._frame_time[row] = 0.0
+        self._frame[row] = 0
+        return True
+
+    # Every live actor needs syncing, e.g. after the view rebuilt the room's scene
+    def mark_all_dirty(self):
+        self._dirty[:self._count] |= self._alive[:self._count]
+
+    # Rows changed since the last call, cleared as they are handed out
+    def take_dirty(self):
+        dirty = self._dirty[:self._count]
+        if not dirty.any():
+            return NO_ROWS
+        rows = dirty.nonzero()[0]
+        dirty[rows] = False
+        return rows
+
+    # What the view draws for a row. Name is None for a removed actor.
+    def state(self, row):
+        return (self._names[row], self._sheets[row], float(self._x[row]), float(self._y[row]), int(self._facing[row]),
+                int(self._frame[row]), bool(self._visible[row]))
+
+    # Plain values for the save system, the ego excluded as the model saves it on its own
+    def snapshot(self):
+        return {name: {"position": list(self.position(name)), "path": [list(point) for point in self.path(name)],
+                       "facing": self.facing(name), "visible": self.visible(name)}
+                for name in self._rows if name != EGO}
+
+    def restore(self, snapshot):
+        for name, data in snapshot.items():
+            if name in self._rows:
+                self.set_position(name, *data["position"])
+                self.walk(name, [tuple(point) for point in data["path"]])
+                self._facing[self._rows[name]] = data["facing"]
+                self.set_visible(name, data["visible"])
+
+    def stats(self):
+        return {"actors": len(self._rows), "walking": int(np.count_nonzero(self._walking[:self._count])),
+                "capacity": self._capacity, "bytes": self.nbytes, "bytes_per_actor": self.bytes_per_actor()}
@@ -0,0 +1,242 @@
+from collections import deque
+
+from ..utils.game_utils_resources import resources
+
+### All classes supporting the GameModel ###
+
+# Verbs of the SCUMM interface. Wildcard matches any verb in a rule.
+VERBS = ('Walk to', 'Give', 'Pick up', 'Use', 'Open', 'Look at', 'Push', 'Close', 'Talk to', 'Pull')
+WILDCARD = "*"
+
+# Verbs that take a held inventory item, e.g. "Use bucket with Pirate"
+ITEM_VERBS = {'Use': "with", 'Give': "to"}
+
+TARGET_TYPES = ("prop", "hotspot", "inventory")
+
+# Verb used by a right click when the data names no default verb for the target
+DEFAULT_VERB = "Look at"
+
+# Game variables hold booleans or signed 32 bit integers
+VARIABLE_MIN, VARIABLE_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def is_variable_value(value):
+    return isinstance(value, bool) or (isinstance(value, int) and VARIABLE_MIN <= value <= VARIABLE_MAX)
+
+
+# A single interaction rule loaded from data. The key is (verb, target type, target, held item),
+# conditions are state values that must all match for the rule to apply.
+class InteractionRule:
+
+    def __init__(self, verb, target_type, target, item=None, conditions=None, actions=None, index=0):
+        self.verb = verb
+        self.target_type = target_type
+        self.target = target
+        self.item = item
+        self.conditions = dict(conditions or {})
+        self.actions = dict(actions or {})
+        self.index = index  # position in the source data, used as tie breaker and in messages
+
+    @classmethod
+    def from_data(cls, data, index=0):
+        actions = {key: value for key, value in data.items() if key in InteractionEngine.ACTIONS}
+        return cls(data["verb"], data["type"], data["target"], data.get("item"), data.get("conditions"), actions, index)
+
+    @property
+    def key(self):
+        return (self.verb, self.target_type, self.target, self.item)
+
+    def matches(self, state):
+        for name, value in self.conditions.items():
+            if state.get(name) != value:
+                return False
+        return True
+
+    def __repr__(self):
+        return f"rule {self.index} ({self.verb} {self.target_type} {self.target} item={self.item} conditions={self.conditions})"
+
+
+# Compiles interaction rules into hashed dispatch tables. A lookup probes at most four keys
+# (exact, without item, wildcard verb, wildcard verb without item), so its cost does not grow with
+# the number of rules. Rules sharing a key are kept most specific first.
+class InteractionEngine:
+
+    # Recognised rule actions, applied by the model in this order
+    ACTIONS = ("set", "add_inventory", "remove_inventory", "remove_prop", "say", "script", "sound")
+
+    # Values a game variable cannot hold are left out of the initial state and of "set" actions as they
+    # load, and reported by validate, so applying a rule never fails
+    def __init__(self, rules=None, initial_state=None, default_verbs=None):
+        self._rules = []
+        self._table = {}
+        self._initial_state = {}
+        self._invalid_values = []  # (rule or None for the initial state, name, value) left out
+        self._default_verbs = dict(default_verbs or {})  # target name -> verb for a right click
+        if rules:
+            self.add_rules(rules)
+        if initial_state:
+            self._initial_state.update(self._valid_values(None, initial_state))
+
+    @classmethod
+    def from_file(cls, file_path):
+        data = resources.load_json(file_path)
+        rules = [InteractionRule.from_data(rule, index) for index, rule in enumerate(data.get("rules", []))]
+        return cls(rules, data.get("state"), data.get("default_verbs"))
+
+    @property
+    def rules(self):
+        return list(self._rules)
+
+    @property
+    def initial_state(self):
+        return dict(self._initial_state)
+
+    def add_rules(self, rules):
+        for rule in rules:
+            if "set" in rule.actions:
+                rule.actions["set"] = self._valid_values(rule, rule.actions["set"])
+            self._rules.append(rule)
+            bucket = self._table.setdefault(rule.key, [])
+            bucket.append(rule)
+            # Most conditions first, then source order
+            bucket.sort(key=lambda r: (-len(r.conditions), r.index))
+
+    def _valid_values(self, rule, values):
+        valid = {}
+        for name, value in values.items():
+            if is_variable_value(value):
+                valid[name] = value
+            else:
+                self._invalid_values.append((rule, name, value))
+        return valid
+
+    def default_verb(self, target):
+        return self._default_verbs.get(target, DEFAULT_VERB)
+
+    def has_rule(self, verb, target_type, target, item=None):
+        return (verb, target_type, target, item) in self._table
+
+    # Return the first matching rule for a click, or None
+    def lookup(self, verb, target_type, target, state, item=None):
+        probes = [(verb, target_type, target, item), (WILDCARD, target_type, target, item)]
+        if item is not None:
+            probes.insert(1, (verb, target_type, target, None))
+            probes.append((WILDCARD, target_type, target, None))
+
+        for key in probes:
+            for rule in self._table.get(key, ()):
+                if rule.matches(state):
+                    return rule
+        return None
+
+    # Flag rules that can never fire or that clash with another rule for the same key
+    def validate(self, state_names=None):
+        if state_names is None:
+            state_names = self._initial_state.keys()
+        issues = []
+
+        for rule in self._rules:
+            if rule.verb != WILDCARD and rule.verb not in VERBS:
+                issues.append(f"Unreachable {rule}: unknown verb '{rule.verb}'")
+            if rule.target_type not in TARGET_TYPES:
+                issues.append(f"Unreachable {rule}: unknown target type '{rule.target_type}'")
+            if rule.item is not None and rule.verb not in ITEM_VERBS and rule.verb != WILDCARD:
+                issues.append(f"Unreachable {rule}: verb '{rule.verb}' does not take an item")
+            for name in rule.conditions:
+                if name not in state_names:
+                    issues.append(f"Unreachable {rule}: unknown state '{name}'")
+            for name in rule.actions.get("set", {}):
+                if name not in state_names:
+                    issues.append(f"Invalid {rule}: sets unknown state '{name}'")
+
+        for rule, name, value in self._invalid_values:
+            where = "initial state" if rule is None else str(rule)
+            issues.append(f"Invalid {where}: '{name}' cannot be {value!r}, variables hold booleans or 32 bit integers")
+
+        for target, verb in self._default_verbs.items():
+            if verb not in VERBS:
+                issues.append(f"Invalid default verb '{verb}' for '{target}'")
+
+        for bucket in self._table.values():
+            for position, rule in enumerate(bucket):
+                for earlier in bucket[:position]:
+                    if earlier.conditions == rule.conditions:
+                        issues.append(f"Conflicting {rule}: shadowed by {earlier} with the same conditions")
+                    elif len(earlier.conditions) == len(rule.conditions) and self._compatible(earlier, rule):
+                        issues.append(f"Conflicting {rule}: can match together with {earlier}")
+
+        return issues
+
+    @staticmethod
+    def _compatible(first, second):
+        for name, value in first.conditions.items():
+            if name in second.conditions and second.conditions[name] != value:
+                return False
+        return True
+
+
+# Timed queue of dialogue lines. Each line stays up for a time based on its length and the reading
+# speed, then the next queued line is shown. Lines are advanced by the model tick, not by timers.
+class DialogueQueue:
+
+    # Seconds a line is shown: base time plus time to read it, never less than the minimum
+    BASE_DURATION = 1.0
+    MIN_DURATION = 1.5
+    READING_SPEED = 15.0  # characters per second
+
+    def __init__(self, reading_speed=READING_SPEED):
+        self._reading_speed = reading_speed
+        self._lines = deque()
+        self._current = None
+        self._remaining = 0.0
+
+    @property
+    def current(self):
+        return self._current
+
+    @property
+    def remaining(self):
+        return self._remaining
+
+    def __len__(self):
+        return len(self._lines)
+
+    def duration(self, text):
+        return max(self.MIN_DURATION, self.BASE_DURATION + len(text) / self._reading_speed)
+
+    # Queue a line. Returns it if it is shown right away, otherwise None.
+    def say(self, text, duration=None):
+        self._lines.append((text, duration if duration is not None else self.duration(text)))
+        if self._current is None:
+            return self._next()
+        return None
+
+    # Advance by elapsed seconds. Returns the line now shown ("" once the queue runs dry) if it changed,
+    # otherwise None. A long step can skip past several short lines.
+    def update(self, elapsed_time):
+        if self._current is None:
+            return None
+
+        self._remaining -= elapsed_time
+        changed = None
+        while self._current is not None and self._remaining <= 0:
+            overshoot = -self._remaining
+            changed = self._next()
+            self._remaining -= overshoot
+        return changed
+
+    # Drop the current line and everything queued. Returns "" if a line was showing.
+    def clear(self):
+        self._lines.clear()
+        showing = self._current is not None
+        self._current = None
+        self._remaining = 0.0
+        return "" if showing else None
+
+    def _next(self):
+        if self._lines:
+            self._current, self._remaining = self._lines.popleft()
+            return self._current
+        self._current = None
+        self._remaining = 0.0
+        return ""
@@ -0,0 +1,274 @@
+import os
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+### Versioned binary save format with full and delta snapshots ###
+
+SAVE_MAGIC = b"PQSV"
+SAVE_VERSION = 1
+
+SAVE_FULL = 0
+SAVE_DELTA = 1
+
+# magic, version, kind, sequence, base sequence (deltas only, 0 for full saves)
+HEADER = struct.Struct("<4sBBII")
+
+# Value type tags
+TAG_NONE, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_FLOAT, TAG_STR, TAG_LIST, TAG_DICT = range(8)
+
+# Separator for flattened nested keys in delta snapshots. Names holding it are escaped, "~" as "~0"
+# and "/" as "~1", so room, prop and variable names may contain either.
+KEY_SEPARATOR = "/"
+KEY_ESCAPE = "~"
+
+
+class SaveError(Exception):
+    pass
+
+
+def write_varint(buffer, value):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            buffer.append(byte | 0x80)
+        else:
+            buffer.append(byte)
+            return
+
+
+def read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def encode_value(buffer, value):
+    if value is None:
+        buffer.append(TAG_NONE)
+    elif value is True:
+        buffer.append(TAG_TRUE)
+    elif value is False:
+        buffer.append(TAG_FALSE)
+    elif isinstance(value, int):
+        buffer.append(TAG_INT)
+        write_varint(buffer, value << 1 if value >= 0 else ((-value) << 1) - 1)  # zigzag
+    elif isinstance(value, float):
+        buffer.append(TAG_FLOAT)
+        buffer += struct.pack("<d", value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        buffer.append(TAG_STR)
+        write_varint(buffer, len(data))
+        buffer += data
+    elif isinstance(value, (list, tuple)):
+        buffer.append(TAG_LIST)
+        write_varint(buffer, len(value))
+        for item in value:
+            encode_value(buffer, item)
+    elif isinstance(value, dict):
+        buffer.append(TAG_DICT)
+        write_varint(buffer, len(value))
+        for key, item in value.items():
+            encode_value(buffer, str(key))
+            encode_value(buffer, item)
+    else:
+        raise SaveError(f"Cannot save value of type {type(value).__name__}")
+
+
+def decode_value(data, offset):
+    tag = data[offset]
+    offset += 1
+    if tag == TAG_NONE:
+        return None, offset
+    if tag == TAG_TRUE:
+        return True, offset
+    if tag == TAG_FALSE:
+        return False, offset
+    if tag == TAG_INT:
+        value, offset = read_varint(data, offset)
+        return (value >> 1) ^ -(value & 1), offset
+    if tag == TAG_FLOAT:
+        return struct.unpack_from("<d", data, offset)[0], offset + 8
+    if tag == TAG_STR:
+        length, offset = read_varint(data, offset)
+        return bytes(data[offset:offset + length]).decode("utf-8"), offset + length
+    if tag == TAG_LIST:
+        count, offset = read_varint(data, offset)
+        items = []
+        for _ in range(count):
+            item, offset = decode_value(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == TAG_DICT:
+        count, offset = read_varint(data, offset)
+        items = {}
+        for _ in range(count):
+            key, offset = decode_value(data, offset)
+            items[key], offset = decode_value(data, offset)
+        return items, offset
+    raise SaveError(f"Unknown value tag {tag}")
+
+
+def encode_save(kind, sequence, base_sequence, payload):
+    body = bytearray()
+    encode_value(body, payload)
+    return HEADER.pack(SAVE_MAGIC, SAVE_VERSION, kind, sequence, base_sequence) + zlib.compress(bytes(body), 9)
+
+
+def decode_save(data):
+    if len(data) < HEADER.size:
+        raise SaveError("Save file is truncated")
+    magic, version, kind, sequence, base_sequence = HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC:
+        raise SaveError("Not a save file")
+    if version > SAVE_VERSION:
+        raise SaveError(f"Save version {version} is newer than supported version {SAVE_VERSION}")
+    payload, _ = decode_value(zlib.decompress(data[HEADER.size:]), 0)
+    return kind, sequence, base_sequence, payload
+
+
+def escape_key(key):
+    return str(key).replace(KEY_ESCAPE, KEY_ESCAPE + "0").replace(KEY_SEPARATOR, KEY_ESCAPE + "1")
+
+
+def unescape_key(key):
+    return key.replace(KEY_ESCAPE + "1", KEY_SEPARATOR).replace(KEY_ESCAPE + "0", KEY_ESCAPE)
+
+
+# Nested dicts become single level dicts with "parent/child" keys, so deltas can track single flags
+def flatten(snapshot, prefix=""):
+    flat = {}
+    for key, value in snapshot.items():
+        key = escape_key(key)
+        if isinstance(value, dict) and value:
+            flat.update(flatten(value, f"{prefix}{key}{KEY_SEPARATOR}"))
+        else:
+            flat[f"{prefix}{key}"] = list(value) if isinstance(value, (list, tuple)) else value
+    return flat
+
+
+def unflatten(flat):
+    snapshot = {}
+    for key, value in flat.items():
+        parts = [unescape_key(part) for part in key.split(KEY_SEPARATOR)]
+        node = snapshot
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return snapshot
+
+
+# Writes and reads save slots. Encoding and file IO run on a single worker thread so saves never block
+# the GUI thread and complete in order. Autosaves write a delta holding only the values changed since
+# the last full save of the slot.
+class SaveManager:
+
+    def __init__(self, save_directory):
+        self._save_directory = save_directory
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save-writer")
+        self._lock = threading.Lock()
+        self._bases = {}      # slot -> (sequence, flattened snapshot) of the last full save
+        self._sequence = 0
+        self._stats = {"saves": 0, "deltas": 0, "last_save_bytes": 0, "last_save_time": 0.0,
+                       "last_load_bytes": 0, "last_load_time": 0.0}
+
+    @property
+    def save_directory(self):
+        return self._save_directory
+
+    @property
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def slot_path(self, slot, kind=SAVE_FULL):
+        return os.path.join(self._save_directory, f"{slot}.{'sav' if kind == SAVE_FULL else 'delta'}")
+
+    def has_save(self, slot):
+        return os.path.exists(self.slot_path(slot))
+
+    # Queue a full save of a model snapshot. Returns a future resolving to the number of bytes written.
+    def save(self, snapshot, slot="save"):
+        flat = flatten(snapshot)
+        self._sequence += 1
+        self._bases[slot] = (self._sequence, flat)
+        return self._executor.submit(self._write, slot, SAVE_FULL, self._sequence, 0, flat)
+
+    # Queue a delta against the last full save of the slot, falling back to a full save if there is none
+    def autosave(self, snapshot, slot="autosave"):
+        base = self._bases.get(slot)
+        if base is None:
+            return self.save(snapshot, slot)
+
+        base_sequence, base_flat = base
+        flat = flatten(snapshot)
+        changed = {key: value for key, value in flat.items() if base_flat.get(key, None) != value or key not in base_flat}
+        removed = [key for key in base_flat if key not in flat]
+        self._sequence += 1
+        return self._executor.submit(self._write, slot, SAVE_DELTA, self._sequence, base_sequence, {"changed": changed, "removed": removed})
+
+    def wait(self):
+        self._executor.submit(lambda: None).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def _write(self, slot, kind, sequence, base_sequence, payload):
+        start = time.perf_counter()
+        data = encode_save(kind, sequence, base_sequence, payload)
+
+        os.makedirs(self._save_directory, exist_ok=True)
+        path = self.slot_path(slot, kind)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as save_file:
+            save_file.write(data)
+        os.replace(temp_path, path)
+
+        # A new full save makes any older delta stale
+        if kind == SAVE_FULL and os.path.exists(self.slot_path(slot, SAVE_DELTA)):
+            os.remove(self.slot_path(slot, SAVE_DELTA))
+
+        with self._lock:
+            self._stats["saves"] += 1
+            if kind == SAVE_DELTA:
+                self._stats["deltas"] += 1
+            self._stats["last_save_bytes"] = len(data)
+            self._stats["last_save_time"] = time.perf_counter() - start
+        return len(data)
+
+    # Read a slot back into a snapshot, applying its delta if it belongs to the full save
+    def load(self, slot="save"):
+        start = time.perf_counter()
+        with open(self.slot_path(slot), "rb") as save_file:
+            data = save_file.read()
+        kind, sequence, _, flat = decode_save(data)
+        if kind != SAVE_FULL:
+            raise SaveError(f"{slot} does not hold a full save")
+        loaded_bytes = len(data)
+
+        delta_path = self.slot_path(slot, SAVE_DELTA)
+        if os.path.exists(delta_path):
+            with open(delta_path, "rb") as delta_file:
+                delta_data = delta_file.read()
+            delta_kind, _, base_sequence, delta = decode_save(delta_data)
+            if delta_kind == SAVE_DELTA and base_sequence == sequence:
+                flat.update(delta["changed"])
+                for key in delta["removed"]:
+                    flat.pop(key, None)
+                loaded_bytes += len(delta_data)
+
+        self._bases[slot] = (sequence, dict(flat))
+        self._sequence = max(self._sequence, sequence)
+        with self._lock:
+            self._stats["last_load_bytes"] = loaded_bytes
+            self._stats["last_load_time"] = time.perf_counter() - start
+        return unflatten(flat)
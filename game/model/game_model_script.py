@@ -0,0 +1,243 @@
+import heapq
+import time
+from collections import deque
+
+from ..utils.game_utils_profiler import profiled
+
+### Cooperative script runtime, modelled on SCUMM's script slots ###
+
+# Events scripts can wait on. The key narrows an event down, e.g. to one actor.
+LINE_FINISHED = "line_finished"
+ACTOR_ARRIVED = "actor_arrived"
+VARIABLE_CHANGED = "variable_changed"  # keyed by the name of a global, (room, name) for a room variable
+
+
+# Wait conditions a script yields. Yielding None waits for the next tick.
+class WaitTicks:
+
+    def __init__(self, ticks):
+        self.ticks = max(1, int(ticks))
+
+
+class WaitSeconds:
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+
+class WaitEvent:
+
+    def __init__(self, name, key=None):
+        self.name = name
+        self.key = key
+
+
+# A running script: a generator plus its bookkeeping. Time is the wall time spent inside the script.
+class Script:
+
+    def __init__(self, script_id, name, generator):
+        self.id = script_id
+        self.name = name
+        self.generator = generator
+        self.finished = False
+        self.waiting = None  # the wait condition the script is parked on
+        self.resumes = 0
+        self.time = 0.0
+
+    def __repr__(self):
+        return f"script {self.id} ({self.name})"
+
+
+# Runs scripts cooperatively, one fixed step per model tick. Sleeping scripts sit in timer heaps and
+# scripts waiting on an event sit in a wait-list for that event, so a tick only touches the scripts
+# that are due rather than polling every script.
+class ScriptScheduler:
+
+    def __init__(self):
+        self._scripts = {}       # id -> Script
+        self._next_id = 1
+        self._tick = 0
+        self._time = 0.0         # game time in seconds
+        self._tick_timers = []   # heap of (wake tick, sequence, script)
+        self._time_timers = []   # heap of (wake time, sequence, script)
+        self._waiting = {}       # (event, key) -> scripts
+        self._ready = deque()
+        self._sequence = 0
+        self._registry = {}      # name -> script function
+        self._finished = {}      # name -> profile totals of scripts that have ended
+        self._running = None     # script being resumed
+
+        self.last_update_time = 0.0
+        self.last_resumes = 0
+
+    @property
+    def tick(self):
+        return self._tick
+
+    @property
+    def time(self):
+        return self._time
+
+    @property
+    def scripts(self):
+        return list(self._scripts.values())
+
+    def __len__(self):
+        return len(self._scripts)
+
+    def __contains__(self, script_id):
+        return script_id in self._scripts
+
+    # Named script functions, so data (e.g. interaction rules) can start them
+    def register(self, name, function):
+        self._registry[name] = function
+
+    def registered(self, name):
+        return name in self._registry
+
+    # Start a generator, or a registered script by name with arguments. The script first runs on the
+    # next update. Returns its id.
+    def start(self, script, *args, name=None):
+        if isinstance(script, str):
+            name = name or script
+            script = self._registry[script](*args)
+        elif callable(script):
+            name = name or script.__name__
+            script = script(*args)
+
+        script_id = self._next_id
+        self._next_id += 1
+        entry = self._scripts[script_id] = Script(script_id, name or getattr(script, "__name__", "script"), script)
+        self._ready.append(entry)
+        return script_id
+
+    # A script stopping itself, or the script that is running, is closed once it yields
+    def stop(self, script_id):
+        script = self._scripts.get(script_id)
+        if script is not None:
+            if script is self._running:
+                script.finished = True
+                return
+            # Timer heap entries are skipped lazily, a wait-list entry is dropped now as its event may never come
+            if isinstance(script.waiting, WaitEvent):
+                self._unwait(script)
+            self._finish(script)
+            script.generator.close()
+
+    def stop_all(self):
+        for script_id in list(self._scripts):
+            self.stop(script_id)
+        self._tick_timers.clear()
+        self._time_timers.clear()
+        self._waiting.clear()
+        self._ready.clear()
+
+    def is_running(self, name):
+        return any(script.name == name for script in self._scripts.values())
+
+    # Wake every script waiting on the event. They run in the current update if one is in progress,
+    # otherwise in the next.
+    def emit(self, name, key=None):
+        waiters = self._waiting.pop((name, key), None)
+        if waiters:
+            self._ready.extend(waiters)
+        if key is not None:
+            # Scripts waiting on the event without a key hear every instance of it
+            waiters = self._waiting.pop((name, None), None)
+            if waiters:
+                self._ready.extend(waiters)
+
+    @profiled("model", "ScriptScheduler.update")
+    def update(self, elapsed_time):
+        start = time.perf_counter()
+        self._tick += 1
+        self._time += elapsed_time
+
+        while self._tick_timers and self._tick_timers[0][0] <= self._tick:
+            self._ready.append(heapq.heappop(self._tick_timers)[2])
+        while self._time_timers and self._time_timers[0][0] <= self._time:
+            self._ready.append(heapq.heappop(self._time_timers)[2])
+
+        resumes = 0
+        ready = self._ready
+        while ready:
+            script = ready.popleft()
+            if not script.finished:
+                self._resume(script)
+                resumes += 1
+
+        self.last_resumes = resumes
+        self.last_update_time = time.perf_counter() - start
+
+    def _resume(self, script):
+        script.waiting = None
+        script.resumes += 1
+        start = time.perf_counter()
+        ended = False
+        self._running = script
+        try:
+            condition = next(script.generator)
+        except StopIteration:
+            condition, ended = None, True
+        except Exception as error:
+            print(f"Script error in {script}: {error!r}")
+            condition, ended = None, True
+        finally:
+            self._running = None
+        script.time += time.perf_counter() - start
+
+        if script.finished:
+            # Stopped while it ran
+            self._finish(script)
+            script.generator.close()
+        elif ended:
+            self._finish(script)
+        else:
+            self._park(script, condition)
+
+    def _park(self, script, condition):
+        script.waiting = condition
+        self._sequence += 1
+        if condition is None:
+            heapq.heappush(self._tick_timers, (self._tick + 1, self._sequence, script))
+        elif isinstance(condition, WaitTicks):
+            heapq.heappush(self._tick_timers, (self._tick + condition.ticks, self._sequence, script))
+        elif isinstance(condition, WaitSeconds):
+            heapq.heappush(self._time_timers, (self._time + condition.seconds, self._sequence, script))
+        elif isinstance(condition, WaitEvent):
+            self._waiting.setdefault((condition.name, condition.key), []).append(script)
+        else:
+            print(f"Script error in {script}: cannot wait on {condition!r}")
+            self._finish(script)
+
+    def _unwait(self, script):
+        key = (script.waiting.name, script.waiting.key)
+        waiters = self._waiting.get(key)
+        if waiters and script in waiters:
+            waiters.remove(script)
+            if not waiters:
+                del self._waiting[key]
+
+    def _finish(self, script):
+        script.finished = True
+        if self._scripts.pop(script.id, None) is not None:
+            self._add_profile(self._finished, script)
+
+    @staticmethod
+    def _add_profile(totals, script):
+        entry = totals.setdefault(script.name, {"scripts": 0, "resumes": 0, "time": 0.0})
+        entry["scripts"] += 1
+        entry["resumes"] += script.resumes
+        entry["time"] += script.time
+
+    # Time used per script name, heaviest first, for finding scripts that hog the tick
+    def profile(self):
+        totals = {name: dict(entry) for name, entry in self._finished.items()}
+        for script in self._scripts.values():
+            self._add_profile(totals, script)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["time"]))
+
+    def stats(self):
+        return {"scripts": len(self._scripts), "tick": self._tick, "sleeping": len(self._tick_timers) + len(self._time_timers),
+                "waiting": sum(len(scripts) for scripts in self._waiting.values()),
+                "last_resumes": self.last_resumes, "last_update_time": self.last_update_time}
@@ -0,0 +1,209 @@
+from array import array
+
+from .game_model_helpers import is_variable_value
+
+### Game variables and flags, held in typed arrays as SCUMM keeps them ###
+#
+# Booleans are flags, one bit each in a bitset. Integers are variables, in a signed 32 bit array.
+# Every declared name gets a number in its array, so thousands of flags fit in a few hundred bytes
+# and reading or writing one is a dict lookup plus an array access.
+#
+# Variables are global, or local to a room. A room's locals shadow globals of the same name while it is
+# the current room, and keep their values when the room is left.
+#
+# A change calls only the watchers of that variable. Changed names are kept in a dirty set, so a
+# snapshot only refreshes the values that changed since the previous one.
+
+FLAG_CAPACITY = 1024      # flags allocated up front, the bitset doubles when they run out
+VARIABLE_CAPACITY = 64    # integer variables allocated up front
+
+GLOBAL = None             # room of the global variables
+
+
+class VariableStore:
+
+    def __init__(self, on_change=None):
+        self._flags = bytearray(FLAG_CAPACITY // 8)
+        self._variables = array("i", [0] * VARIABLE_CAPACITY)
+        self._flag_count = 0
+        self._variable_count = 0
+        self._slots = {}       # (room, name) -> (is flag, number)
+        self._initial = {}     # (room, name) -> value at declaration, for reset
+        self._watchers = {}    # (room, name) -> callbacks
+        self._dirty = set()    # (room, name) changed since the last snapshot
+        self._snapshot = {}    # room -> {name: value}, refreshed from the dirty set
+        self._room = GLOBAL
+        self._on_change = on_change  # called as on_change(room, name, value) after every change
+
+    @property
+    def room(self):
+        return self._room
+
+    # Bytes holding the values, names excluded
+    @property
+    def nbytes(self):
+        return len(self._flags) + self._variables.itemsize * len(self._variables)
+
+    @property
+    def dirty(self):
+        return {name for room, name in self._dirty}
+
+    # Names visible from the current room
+    def names(self):
+        return {name for room, name in self._slots if room is GLOBAL or room == self._room}
+
+    def __contains__(self, name):
+        return self._key(name) in self._slots
+
+    # Declare a flag (bool) or an integer variable. Declaring a name again keeps its value.
+    def declare(self, name, value, room=GLOBAL):
+        key = (room, name)
+        if key in self._slots:
+            return self._slots[key]
+        if not is_variable_value(value):
+            raise ValueError(f"Variable '{name}' must be a boolean or a 32 bit integer, not {value!r}")
+        if isinstance(value, bool):
+            if self._flag_count == len(self._flags) * 8:
+                self._flags += bytes(len(self._flags))
+            slot = (True, self._flag_count)
+            self._flag_count += 1
+        else:
+            if self._variable_count == len(self._variables):
+                self._variables.extend([0] * len(self._variables))
+            slot = (False, self._variable_count)
+            self._variable_count += 1
+
+        self._slots[key] = slot
+        self._initial[key] = value
+        self._write(slot, value)
+        self._snapshot.setdefault(room, {})[name] = value
+        return slot
+
+    def declare_all(self, values, room=GLOBAL):
+        for name, value in values.items():
+            self.declare(name, value, room)
+
+    # Make a room current, declaring the locals it has not declared yet
+    def enter_room(self, room, variables=None):
+        self._room = room
+        if variables:
+            self.declare_all(variables, room)
+
+    # Numbered access, for scripts that look a name up once
+    def number(self, name):
+        return self._slots[self._key(name)][1]
+
+    def flag(self, number):
+        return bool(self._flags[number >> 3] >> (number & 7) & 1)
+
+    def variable(self, number):
+        return self._variables[number]
+
+    def get(self, name, default=None):
+        slot = self._slots.get(self._key(name))
+        if slot is None:
+            return default
+        return self._read(slot)
+
+    def __getitem__(self, name):
+        return self._read(self._slots[self._key(name)])
+
+    # Set a variable. An unknown name is declared as a global from the value.
+    def set(self, name, value):
+        key = self._key(name)
+        slot = self._slots.get(key)
+        if slot is None:
+            self.declare(name, value)
+            self._changed((GLOBAL, name), value)
+            return
+        if slot[0]:
+            value = bool(value)
+        if self._read(slot) != value:
+            self._write(slot, value)
+            self._changed(key, value)
+
+    def __setitem__(self, name, value):
+        self.set(name, value)
+
+    def update(self, values):
+        for name, value in values.items():
+            self.set(name, value)
+
+    # Call back on every change of a variable, as callback(name, value)
+    def watch(self, name, callback, room=GLOBAL):
+        self._watchers.setdefault((room, name), []).append(callback)
+
+    def unwatch(self, name, callback, room=GLOBAL):
+        watchers = self._watchers.get((room, name))
+        if watchers and callback in watchers:
+            watchers.remove(callback)
+
+    # All variables back to their declared values, quietly, e.g. before restoring a save
+    def reset(self):
+        for key, value in self._initial.items():
+            self._write(self._slots[key], value)
+            self._snapshot[key[0]][key[1]] = value
+        self._dirty.clear()
+
+    # Global values as plain values for the save system. Only names changed since the last call are read.
+    def snapshot(self):
+        self._refresh()
+        return dict(self._snapshot.get(GLOBAL, {}))
+
+    def room_snapshot(self):
+        self._refresh()
+        return {room: dict(values) for room, values in self._snapshot.items() if room is not GLOBAL}
+
+    def restore(self, values, room_values=None):
+        for name, value in values.items():
+            self._restore(GLOBAL, name, value)
+        for room, local_values in (room_values or {}).items():
+            for name, value in local_values.items():
+                self._restore(room, name, value)
+
+    def stats(self):
+        return {"flags": self._flag_count, "variables": self._variable_count, "bytes": self.nbytes,
+                "dirty": len(self._dirty), "watchers": sum(len(watchers) for watchers in self._watchers.values())}
+
+    # Current room's local first, then the global
+    def _key(self, name):
+        if self._room is not GLOBAL and (self._room, name) in self._slots:
+            return (self._room, name)
+        return (GLOBAL, name)
+
+    def _read(self, slot):
+        is_flag, number = slot
+        if is_flag:
+            return bool(self._flags[number >> 3] >> (number & 7) & 1)
+        return self._variables[number]
+
+    def _write(self, slot, value):
+        is_flag, number = slot
+        if is_flag:
+            if value:
+                self._flags[number >> 3] |= 1 << (number & 7)
+            else:
+                self._flags[number >> 3] &= ~(1 << (number & 7)) & 0xFF
+        else:
+            self._variables[number] = value
+
+    def _changed(self, key, value):
+        self._dirty.add(key)
+        for callback in self._watchers.get(key, ()):
+            callback(key[1], value)
+        if self._on_change is not None:
+            self._on_change(key[0], key[1], value)
+
+    def _restore(self, room, name, value):
+        key = (room, name)
+        slot = self._slots.get(key)
+        if slot is None:
+            self.declare(name, value, room)
+        else:
+            self._write(slot, bool(value) if slot[0] else value)
+            self._dirty.add(key)
+
+    def _refresh(self):
+        for room, name in self._dirty:
+            self._snapshot[room][name] = self._read(self._slots[(room, name)])
+        self._dirty.clear()
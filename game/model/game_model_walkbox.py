@@ -0,0 +1,284 @@
+import math
+from collections import OrderedDict, deque
+
+### Walkable areas and pathfinding, modelled on SCUMM walk boxes and the box matrix ###
+
+# Twice the signed area of triangle a, b, c. Used to orient points against a line.
+def triarea2(a, b, c):
+    return (c[0] - a[0]) * (b[1] - a[1]) - (b[0] - a[0]) * (c[1] - a[1])
+
+
+def distance(a, b):
+    return math.hypot(b[0] - a[0], b[1] - a[1])
+
+
+# Closest point to p on segment a-b
+def closest_point_on_segment(p, a, b):
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length2 = dx * dx + dy * dy
+    if length2 == 0:
+        return a
+    t = max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / length2))
+    return (a[0] + t * dx, a[1] + t * dy)
+
+
+# A convex walkable polygon in logical room coordinates
+class Walkbox:
+
+    def __init__(self, points):
+        self.points = [(float(x), float(y)) for x, y in points]
+        xs = [x for x, _ in self.points]
+        ys = [y for _, y in self.points]
+        self.bounds = (min(xs), min(ys), max(xs), max(ys))
+        self.centroid = (sum(xs) / len(xs), sum(ys) / len(ys))
+
+        # Side of the edges the inside lies on, so contains() works for either winding order
+        self._winding = 1 if triarea2(self.points[0], self.points[1], self.centroid) >= 0 else -1
+
+    @property
+    def edges(self):
+        return [(self.points[i], self.points[(i + 1) % len(self.points)]) for i in range(len(self.points))]
+
+    def contains(self, x, y):
+        min_x, min_y, max_x, max_y = self.bounds
+        if x < min_x or x > max_x or y < min_y or y > max_y:
+            return False
+        for a, b in self.edges:
+            if triarea2(a, b, (x, y)) * self._winding < 0:
+                return False
+        return True
+
+    def closest_point(self, x, y):
+        if self.contains(x, y):
+            return (x, y)
+        return min((closest_point_on_segment((x, y), a, b) for a, b in self.edges), key=lambda p: distance(p, (x, y)))
+
+
+# Walkboxes of a room with precomputed connectivity. Adjacent boxes share part of an edge (the portal).
+# The next-hop table gives, for every pair of boxes, the box to step into next, so a route is read off
+# the table in one lookup per box crossed. Routes are smoothed with the funnel algorithm and solved
+# paths are kept in an LRU cache.
+class WalkboxMap:
+
+    def __init__(self, boxes, path_cache_size=256, tolerance=0.5):
+        self._boxes = [box if isinstance(box, Walkbox) else Walkbox(box) for box in boxes]
+        self._tolerance = tolerance
+        self._portals = {}  # (box, neighbour) -> (a, b) shared segment
+        self._adjacency = [[] for _ in self._boxes]
+        self._build_adjacency()
+        self._next_hop = self._build_next_hop()
+
+        self._path_cache = OrderedDict()
+        self._path_cache_size = path_cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @classmethod
+    def from_data(cls, data, **kwargs):
+        return cls([box["points"] if isinstance(box, dict) else box for box in data], **kwargs)
+
+    @property
+    def boxes(self):
+        return self._boxes
+
+    @property
+    def adjacency(self):
+        return self._adjacency
+
+    @property
+    def next_hop(self):
+        return self._next_hop
+
+    def _build_adjacency(self):
+        for i, box in enumerate(self._boxes):
+            for j in range(i + 1, len(self._boxes)):
+                portal = self._shared_segment(box, self._boxes[j])
+                if portal is not None:
+                    self._portals[(i, j)] = portal
+                    self._portals[(j, i)] = portal
+                    self._adjacency[i].append(j)
+                    self._adjacency[j].append(i)
+
+    # Overlap of two collinear edges, one from each box, or None
+    def _shared_segment(self, first, second):
+        tolerance = self._tolerance
+        for a, b in first.edges:
+            length = distance(a, b)
+            if length == 0:
+                continue
+            ux, uy = (b[0] - a[0]) / length, (b[1] - a[1]) / length
+            for c, d in second.edges:
+                # Both ends of the other edge must lie on this edge's line
+                if abs(triarea2(a, b, c)) / length > tolerance or abs(triarea2(a, b, d)) / length > tolerance:
+                    continue
+                t_c = (c[0] - a[0]) * ux + (c[1] - a[1]) * uy
+                t_d = (d[0] - a[0]) * ux + (d[1] - a[1]) * uy
+                start, end = max(0.0, min(t_c, t_d)), min(length, max(t_c, t_d))
+                if end - start > tolerance:
+                    return ((a[0] + ux * start, a[1] + uy * start), (a[0] + ux * end, a[1] + uy * end))
+        return None
+
+    # All-pairs next-hop table built with a breadth first search from every box, like SCUMM's box matrix.
+    # next_hop[a][b] is the neighbour of a on the shortest route to b, a itself when a == b, -1 if unreachable.
+    def _build_next_hop(self):
+        count = len(self._boxes)
+        table = []
+        for source in range(count):
+            row = [-1] * count
+            row[source] = source
+            queue = deque()
+            for neighbour in self._adjacency[source]:
+                row[neighbour] = neighbour
+                queue.append(neighbour)
+            while queue:
+                box = queue.popleft()
+                for neighbour in self._adjacency[box]:
+                    if row[neighbour] == -1:
+                        row[neighbour] = row[box]
+                        queue.append(neighbour)
+            table.append(row)
+        return table
+
+    def box_at(self, x, y):
+        for index, box in enumerate(self._boxes):
+            if box.contains(x, y):
+                return index
+        return -1
+
+    # Nearest walkable point and its box, for clicks outside every walkbox
+    def closest_walkable(self, x, y):
+        best = None
+        for index, box in enumerate(self._boxes):
+            point = box.closest_point(x, y)
+            d = distance(point, (x, y))
+            if best is None or d < best[0]:
+                best = (d, point, index)
+        if best is None:
+            return (x, y), -1
+        return best[1], best[2]
+
+    def box_route(self, start_box, end_box):
+        route = [start_box]
+        box = start_box
+        while box != end_box:
+            box = self._next_hop[box][end_box]
+            if box == -1:
+                return None
+            route.append(box)
+        return route
+
+    # Waypoints from start to end, excluding the start point. Empty if there is no route.
+    # Paths are cached per whole pixel, a cached path ends at the sub-pixel end point asked for.
+    def find_path(self, start, end):
+        key = (int(start[0]), int(start[1]), int(end[0]), int(end[1]))
+        path = self._path_cache.get(key)
+        if path is not None:
+            self._path_cache.move_to_end(key)
+            self.cache_hits += 1
+            path = list(path)
+            if path:
+                path[-1] = tuple(end) if self.box_at(*end) != -1 else self.closest_walkable(*end)[0]
+            return path
+
+        self.cache_misses += 1
+        path = self._solve(start, end)
+        self._path_cache[key] = tuple(path)
+        if len(self._path_cache) > self._path_cache_size:
+            self._path_cache.popitem(last=False)
+        return path
+
+    def clear_cache(self):
+        self._path_cache.clear()
+
+    def _solve(self, start, end):
+        start_box = self.box_at(*start)
+        if start_box == -1:
+            start, start_box = self.closest_walkable(*start)
+        end_box = self.box_at(*end)
+        if end_box == -1:
+            end, end_box = self.closest_walkable(*end)
+        if start_box == -1 or end_box == -1:
+            return []
+
+        route = self.box_route(start_box, end_box)
+        if route is None:
+            return []
+        if len(route) == 1:
+            return [tuple(end)]
+
+        return self._funnel(tuple(start), tuple(end), self._oriented_portals(route))
+
+    # Portals along a box route as (left, right) pairs relative to the direction of travel
+    def _oriented_portals(self, route):
+        portals = []
+        for current, following in zip(route, route[1:]):
+            a, b = self._portals[(current, following)]
+            origin = self._boxes[current].centroid
+            if triarea2(origin, a, b) < 0:
+                a, b = b, a
+            portals.append((a, b))
+        return portals
+
+    # Simple stupid funnel algorithm: pull the path taut through the portal sequence
+    def _funnel(self, start, end, portals):
+        portals = [(start, start)] + portals + [(end, end)]
+        path = []
+        apex = left = right = start
+        apex_index = left_index = right_index = 0
+
+        i = 1
+        while i < len(portals):
+            portal_left, portal_right = portals[i]
+
+            # Tighten the right side
+            if triarea2(apex, right, portal_right) <= 0:
+                if apex == right or triarea2(apex, left, portal_right) > 0:
+                    right, right_index = portal_right, i
+                else:
+                    # Right crossed over left: left becomes a corner of the path
+                    self._append_point(path, left)
+                    apex, apex_index = left, left_index
+                    left = right = apex
+                    left_index = right_index = apex_index
+                    i = apex_index + 1
+                    continue
+
+            # Tighten the left side
+            if triarea2(apex, left, portal_left) >= 0:
+                if apex == left or triarea2(apex, right, portal_left) < 0:
+                    left, left_index = portal_left, i
+                else:
+                    self._append_point(path, right)
+                    apex, apex_index = right, right_index
+                    left = right = apex
+                    left_index = right_index = apex_index
+                    i = apex_index + 1
+                    continue
+
+            i += 1
+
+        self._append_point(path, end)
+        return path
+
+    @staticmethod
+    def _append_point(path, point):
+        if not path or path[-1] != point:
+            path.append(point)
+
+
+# Moves a point along a list of waypoints at a fixed speed in logical pixels per second
+def advance_along_path(position, path, speed, elapsed_time):
+    remaining = speed * elapsed_time
+    x, y = position
+    while path and remaining > 0:
+        target = path[0]
+        d = distance((x, y), target)
+        if d <= remaining:
+            x, y = target
+            remaining -= d
+            path.pop(0)
+        else:
+            x += (target[0] - x) * remaining / d
+            y += (target[1] - y) * remaining / d
+            remaining = 0
+    return (x, y)
@@ -1 +1,4 @@
-# from .game_utils import GameUtils
\ No newline at end of file
+from .game_utils import get_file_path, START_ROOM, StartupTrace, startup_trace
+from .game_utils_assets import BakedAssets, baked_assets, build_assets
+from .game_utils_profiler import Profiler, profiler, profiled
+from .game_utils_resources import ResourceArchive, Resources, resources, build_archive
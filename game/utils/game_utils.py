@@ -1,2 +1,74 @@
+import os
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 
+### Utilities shared by the model, view and controller ###
 
+# Room the game starts in
+START_ROOM = "scumm_bar"
+
+ROOT_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Two levels up
+
+# Paths are asked for again and again (every sprite, sound and room load), so each is built once
+@lru_cache(maxsize=1024)
+def get_file_path(*path_segments):
+    return os.path.join(ROOT_DIRECTORY, *path_segments)
+
+
+# Records where startup time goes, by category (import, widgets, assets, ...) and named marks such as
+# the first frame. Times are seconds from the start passed to reset, normally the top of main.py.
+class StartupTrace:
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.reset()
+
+    def reset(self, start=None):
+        self._start = self._clock() if start is None else start
+        self._spans = []  # (category, name, start, end)
+        self._marks = {}
+
+    def now(self):
+        return self._clock()
+
+    def add_span(self, category, name, start, end):
+        self._spans.append((category, name, start - self._start, end - self._start))
+
+    @contextmanager
+    def span(self, category, name):
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.add_span(category, name, start, self._clock())
+
+    def mark(self, name):
+        self._marks.setdefault(name, self._clock() - self._start)
+
+    @property
+    def spans(self):
+        return list(self._spans)
+
+    @property
+    def marks(self):
+        return dict(self._marks)
+
+    def totals(self):
+        totals = {}
+        for category, _, start, end in self._spans:
+            totals[category] = totals.get(category, 0.0) + end - start
+        return totals
+
+    def report(self):
+        lines = ["Startup trace (ms from process start):"]
+        for category, name, start, end in sorted(self._spans, key=lambda span: span[2]):
+            lines.append(f"  {start * 1000:8.1f} {(end - start) * 1000:8.1f}  {category:<8} {name}")
+        for category, total in self.totals().items():
+            lines.append(f"  total {category:<8} {total * 1000:8.1f}")
+        for name, at in self._marks.items():
+            lines.append(f"  mark  {name:<8} {at * 1000:8.1f}")
+        return "\n".join(lines)
+
+# Shared trace filled in during startup
+startup_trace = StartupTrace()
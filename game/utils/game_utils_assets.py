@@ -0,0 +1,357 @@
+import hashlib
+import json
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .game_utils import get_file_path
+
+### Asset pipeline: bakes runtime work on the resources tree ahead of time, and finds the results at runtime ###
+#
+# Inventory art, which is drawn pre-scaled, gets nearest-neighbour copies at the common integer scale
+# factors (name@4x.png). Scene art is stored as 8-bit indexed images, and sprites with transparency get
+# their hit mask (name.mask.json). Props and backgrounds are scaled when drawn, so get no copies.
+# WAV sound effects are converted to 16-bit PCM at one sample rate, so every effect shares one output
+# format. MP3 music is streamed and decoded by QMediaPlayer and is left alone.
+#
+# Outputs mirror the resources tree under build/assets. The manifest records a content hash per
+# source, so a rebuild only redoes sources that changed. Sources are baked in parallel on a process pool.
+
+PIPELINE_VERSION = 1
+BUILD_DIRECTORY = get_file_path("build", "assets")
+MANIFEST_FILE = "manifest.json"
+BAKED_SCALES = (2, 3, 4, 5, 6, 8)  # 360p to 1440p at the 180 line logical resolution
+AUDIO_SAMPLE_RATE = 22050
+INDEXED_FOLDERS = ("scenes",)      # art drawn with a palette, kept indexed for palette cycling
+SCALED_FOLDERS = ("inventory",)    # art the pixmap cache loads at screen scale
+MAX_PALETTE = 256
+
+
+# What gets baked for a resource id (its path under resources/), or an empty tuple for nothing
+def asset_steps(resource_id):
+    extension = os.path.splitext(resource_id)[1].lower()
+    if extension == ".png":
+        folder = resource_id.split("/")[0]
+        if folder in INDEXED_FOLDERS:
+            return ("indexed",)
+        return ("scale", "mask") if folder in SCALED_FOLDERS else ("mask",)
+    if extension == ".wav":
+        return ("audio",)
+    return ()
+
+
+def variant_id(resource_id, scale):
+    stem, extension = os.path.splitext(resource_id)
+    return f"{stem}@{scale}x{extension}"
+
+
+def mask_id(resource_id):
+    return f"{os.path.splitext(resource_id)[0]}.mask.json"
+
+
+def content_hash(file_path, steps):
+    digest = hashlib.sha256(f"{PIPELINE_VERSION}:{','.join(steps)}:{BAKED_SCALES}:{AUDIO_SAMPLE_RATE}".encode("utf-8"))
+    with open(file_path, "rb") as source_file:
+        for chunk in iter(lambda: source_file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Pixels of a QImage as a (height, width) array: palette indices for indexed images, ARGB otherwise
+def image_pixels(image):
+    import numpy as np
+    from PyQt6.QtGui import QImage
+
+    if image.format() != QImage.Format.Format_Indexed8:
+        image = image.convertToFormat(QImage.Format.Format_ARGB32)
+    dtype, depth = (np.uint8, 1) if image.format() == QImage.Format.Format_Indexed8 else (np.uint32, 4)
+    data = image.constBits()
+    data.setsize(image.sizeInBytes())
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+    return rows[:, :image.width() * depth].copy().view(dtype)
+
+
+def pixels_image(pixels, color_table=None):
+    from PyQt6.QtGui import QImage
+
+    height, width = pixels.shape
+    if color_table is None:
+        return QImage(pixels.tobytes(), width, height, width * 4, QImage.Format.Format_ARGB32).copy()
+
+    import numpy as np
+    stride = (width + 3) & ~3  # QImage rows are 32-bit aligned
+    padded = np.zeros((height, stride), dtype=np.uint8)
+    padded[:, :width] = pixels
+    image = QImage(padded.tobytes(), width, height, stride, QImage.Format.Format_Indexed8).copy()
+    image.setColorTable(color_table)
+    return image
+
+
+# Indexed copy of an image. True colour art is only converted if it uses at most MAX_PALETTE colours,
+# with an exact palette, since quantising would dither it. Returns None otherwise.
+def to_indexed(image):
+    import numpy as np
+    from PyQt6.QtGui import QImage
+
+    if image.format() in (QImage.Format.Format_Indexed8, QImage.Format.Format_Mono, QImage.Format.Format_MonoLSB):
+        return image.convertToFormat(QImage.Format.Format_Indexed8)
+
+    colors, indices = np.unique(image_pixels(image), return_inverse=True)
+    if len(colors) > MAX_PALETTE:
+        return None
+    return pixels_image(indices.reshape(image.height(), image.width()).astype(np.uint8), [int(color) for color in colors])
+
+
+# Rows of bits, bit x set where pixel x is not fully transparent, as AlphaMask uses them
+def alpha_mask_rows(image):
+    import numpy as np
+
+    alpha = (image_pixels(image) >> 24) != 0
+    return [int.from_bytes(np.packbits(row, bitorder="little").tobytes(), "little") for row in alpha]
+
+
+# 24-bit little-endian samples as 32-bit, each one shifted up a byte so the sign and scale carry over
+def widen_pcm24(frames):
+    widened = bytearray(len(frames) // 3 * 4)
+    for byte in range(3):
+        widened[byte + 1::4] = frames[byte::3]
+    return bytes(widened)
+
+
+def convert_wav(source_path, output_path):
+    import numpy as np
+
+    with wave.open(source_path, "rb") as wav_file:
+        channels, width, rate = wav_file.getnchannels(), wav_file.getsampwidth(), wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+    if width == 3:
+        frames, width = widen_pcm24(frames), 4
+
+    if width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif width == 2:
+        samples = np.frombuffer(frames, dtype="<i2")
+    elif width == 4:
+        samples = (np.frombuffer(frames, dtype="<i4") >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"unsupported sample width {width}")
+    samples = samples.reshape(-1, channels)
+
+    if rate != AUDIO_SAMPLE_RATE and len(samples):
+        # Linear interpolation is plenty for short effects
+        count = max(1, round(len(samples) * AUDIO_SAMPLE_RATE / rate))
+        positions = np.linspace(0, len(samples) - 1, count)
+        samples = np.stack([np.interp(positions, np.arange(len(samples)), samples[:, channel]) for channel in range(channels)], axis=1)
+        samples = np.round(samples).astype(np.int16)
+
+    with wave.open(output_path, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(AUDIO_SAMPLE_RATE)
+        wav_file.writeframes(samples.astype("<i2").tobytes())
+
+
+# One source through its steps. Runs on a pool process, so it only takes and returns plain values.
+# Returns the ids of the files written.
+def bake_asset(resource_id, source_path, output_directory, steps):
+    start = time.perf_counter()
+    outputs = []
+
+    def output_path(output_id):
+        path = os.path.join(output_directory, *output_id.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        outputs.append(output_id)
+        return path
+
+    if "audio" in steps:
+        convert_wav(source_path, output_path(resource_id))
+        return resource_id, outputs, time.perf_counter() - start
+
+    import numpy as np
+    from PyQt6.QtGui import QImage
+
+    image = QImage(source_path)
+    if image.isNull():
+        raise ValueError(f"could not decode {source_path}")
+
+    color_table = None
+    if "indexed" in steps:
+        indexed = to_indexed(image)
+        if indexed is not None:
+            image = indexed
+            color_table = image.colorTable()
+            image.save(output_path(resource_id))
+
+    if "mask" in steps and image.hasAlphaChannel():
+        with open(output_path(mask_id(resource_id)), "w", encoding="utf-8") as mask_file:
+            json.dump({"width": image.width(), "height": image.height(),
+                       "rows": [format(row, "x") for row in alpha_mask_rows(image)]}, mask_file)
+
+    if "scale" in steps:
+        pixels = image_pixels(image)
+        for scale in BAKED_SCALES:
+            scaled = np.repeat(np.repeat(pixels, scale, axis=0), scale, axis=1)
+            pixels_image(scaled, color_table).save(output_path(variant_id(resource_id, scale)))
+
+    return resource_id, outputs, time.perf_counter() - start
+
+
+def load_manifest(output_directory):
+    try:
+        with open(os.path.join(output_directory, MANIFEST_FILE), "r", encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        return {"version": PIPELINE_VERSION, "assets": {}}
+    if manifest.get("version") != PIPELINE_VERSION:
+        return {"version": PIPELINE_VERSION, "assets": {}}
+    return manifest
+
+
+def save_manifest(output_directory, manifest):
+    file_path = os.path.join(output_directory, MANIFEST_FILE)
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(temp_path, file_path)
+
+
+def remove_outputs(output_directory, output_ids):
+    for output_id in output_ids:
+        try:
+            os.remove(os.path.join(output_directory, *output_id.split("/")))
+        except FileNotFoundError:
+            pass
+
+
+# Bake every source that changed since the last build. A source is unchanged when its size and
+# modification time match the manifest, or failing that its content hash does, its steps are the same
+# and all its outputs still exist. Outputs of sources that were deleted are removed.
+def build_assets(source_directory=None, output_directory=BUILD_DIRECTORY, workers=None, force=False, log=print):
+    source_directory = source_directory or get_file_path("resources")
+    start = time.perf_counter()
+    os.makedirs(output_directory, exist_ok=True)
+    manifest = load_manifest(output_directory)
+    assets = manifest["assets"]
+
+    sources = {}
+    for directory, directory_names, file_names in os.walk(source_directory):
+        directory_names.sort()
+        for file_name in sorted(file_names):
+            full_path = os.path.join(directory, file_name)
+            resource_id = os.path.relpath(full_path, source_directory).replace(os.sep, "/")
+            steps = asset_steps(resource_id)
+            if steps:
+                sources[resource_id] = (full_path, steps)
+
+    jobs = []
+    skipped = 0
+    for resource_id, (full_path, steps) in sources.items():
+        status = os.stat(full_path)
+        entry = assets.get(resource_id)
+        outputs_exist = entry is not None and entry.get("steps") == list(steps) and all(
+            os.path.exists(os.path.join(output_directory, *output_id.split("/"))) for output_id in entry["outputs"])
+        if not force and outputs_exist and entry["size"] == status.st_size and entry["mtime"] == status.st_mtime_ns:
+            skipped += 1
+            continue
+
+        digest = content_hash(full_path, steps)
+        if not force and outputs_exist and entry["hash"] == digest:
+            entry["size"], entry["mtime"] = status.st_size, status.st_mtime_ns  # touched, not changed
+            skipped += 1
+            continue
+        jobs.append((resource_id, full_path, steps, digest, status))
+
+    removed = 0
+    for resource_id in [resource_id for resource_id in assets if resource_id not in sources]:
+        remove_outputs(output_directory, assets.pop(resource_id)["outputs"])
+        removed += 1
+
+    failed = 0
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(bake_asset, resource_id, full_path, output_directory, steps): (resource_id, steps, digest, status)
+                       for resource_id, full_path, steps, digest, status in jobs}
+            for future in as_completed(futures):
+                resource_id, steps, digest, status = futures[future]
+                try:
+                    _, outputs, elapsed = future.result()
+                except Exception as error:
+                    log(f"  failed  {resource_id}: {type(error).__name__}: {error}")
+                    assets.pop(resource_id, None)
+                    failed += 1
+                    continue
+
+                previous = assets.get(resource_id)
+                if previous is not None:
+                    remove_outputs(output_directory, set(previous["outputs"]) - set(outputs))
+                assets[resource_id] = {"hash": digest, "size": status.st_size, "mtime": status.st_mtime_ns, "steps": list(steps),
+                                       "outputs": outputs}
+                log(f"  baked   {resource_id} ({len(outputs)} outputs, {elapsed * 1000:.1f} ms)")
+
+    save_manifest(output_directory, manifest)
+    return {"sources": len(sources), "built": len(jobs) - failed, "skipped": skipped, "removed": removed,
+            "failed": failed, "elapsed": time.perf_counter() - start}
+
+
+# Baked outputs as seen by the running game. The manifest is read once. An output is only used while
+# its source still has the size and modification time it was baked from, so a source edited without
+# rebuilding is handled at runtime. Everything falls back to doing the work at runtime when the
+# pipeline has not been run or a source has no such output.
+class BakedAssets:
+
+    def __init__(self, output_directory=BUILD_DIRECTORY, source_directory=None):
+        self._directory = output_directory
+        self._source_root = os.path.join(source_directory or get_file_path("resources"), "")
+        self._outputs = {}  # output id -> (source path, size, modification time) it was baked from
+        for resource_id, entry in load_manifest(output_directory)["assets"].items():
+            source = (os.path.join(self._source_root, *resource_id.split("/")), entry["size"], entry["mtime"])
+            for output_id in entry["outputs"]:
+                self._outputs[output_id] = source
+
+    def __len__(self):
+        return len(self._outputs)
+
+    def resource_id(self, file_path):
+        if file_path.startswith(self._source_root):
+            return file_path[len(self._source_root):].replace(os.sep, "/")
+        return None
+
+    def path(self, output_id):
+        source = self._outputs.get(output_id)
+        if source is None:
+            return None
+        source_path, size, mtime = source
+        try:
+            status = os.stat(source_path)
+        except FileNotFoundError:
+            status = None  # shipped without loose sources, e.g. next to a resource archive
+        if status is not None and (status.st_size != size or status.st_mtime_ns != mtime):
+            return None
+        return os.path.join(self._directory, *output_id.split("/"))
+
+    # Pre-scaled copy of an image for an integer scale factor
+    def variant(self, file_path, scale_factor):
+        resource_id = self.resource_id(file_path)
+        if resource_id is None or abs(scale_factor - round(scale_factor)) > 1e-6:
+            return None
+        return self.path(variant_id(resource_id, round(scale_factor)))
+
+    # Indexed copy of scene art, or the converted copy of a sound effect
+    def converted(self, file_path):
+        resource_id = self.resource_id(file_path)
+        return self.path(resource_id) if resource_id is not None else None
+
+    # Hit mask as (width, height, rows), for building an AlphaMask
+    def mask(self, file_path):
+        resource_id = self.resource_id(file_path)
+        mask_path = self.path(mask_id(resource_id)) if resource_id is not None else None
+        if mask_path is None:
+            return None
+        with open(mask_path, "r", encoding="utf-8") as mask_file:
+            data = json.load(mask_file)
+        return data["width"], data["height"], [int(row, 16) for row in data["rows"]]
+
+
+# Shared lookup of what the pipeline has baked into build/assets
+baked_assets = BakedAssets()
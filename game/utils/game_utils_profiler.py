@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+### Engine profiler: timing spans around hot paths, frame history and Chrome trace export ###
+#
+# Off by default. Instrumented code checks profiler.enabled before it reads the clock, so a disabled
+# profiler costs one attribute lookup per span. Spans from worker threads (e.g. asset decodes) are
+# recorded with their thread id. Exported traces open in chrome://tracing or https://ui.perfetto.dev.
+
+SPAN_BUFFER_SIZE = 200000        # spans kept for export, oldest dropped first
+FRAME_HISTORY = 240              # frame and tick times kept for the overlay
+HISTOGRAM_BOUNDS = (8.3, 16.7, 33.3, 50.0, 100.0)  # upper bounds of the frame time buckets in ms, plus one open bucket
+
+
+# Context manager handed out while the profiler is disabled
+class NullSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    __slots__ = ("_profiler", "_category", "_name", "_start")
+
+    def __init__(self, profiler, category, name):
+        self._profiler = profiler
+        self._category = category
+        self._name = name
+
+    def __enter__(self):
+        self._start = self._profiler.now()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profiler.add_span(self._category, self._name, self._start, self._profiler.now())
+        return False
+
+
+class Profiler:
+
+    def __init__(self, clock=time.perf_counter, buffer_size=SPAN_BUFFER_SIZE, frame_history=FRAME_HISTORY):
+        self._clock = clock
+        self.enabled = False
+        self._spans = deque(maxlen=buffer_size)        # (category, name, start, end, thread id)
+        self._frame_times = deque(maxlen=frame_history)
+        self._tick_times = deque(maxlen=frame_history)
+        self._last_frame = None
+        self._origin = clock()
+
+    def enable(self):
+        if not self.enabled:
+            self._last_frame = None
+            self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self._spans.clear()
+        self._frame_times.clear()
+        self._tick_times.clear()
+        self._last_frame = None
+        self._origin = self._clock()
+
+    def now(self):
+        return self._clock()
+
+    # Record a span timed by the caller, for code that measures itself anyway. Callers check enabled.
+    def add_span(self, category, name, start, end):
+        self._spans.append((category, name, start, end, threading.get_ident()))
+
+    # with profiler.span("assets", "load_room"): ...
+    def span(self, category, name):
+        return Span(self, category, name) if self.enabled else NULL_SPAN
+
+    def add_tick(self, elapsed):
+        self._tick_times.append(elapsed)
+
+    # Called once per rendered frame. Frame time is the interval between frames, so it includes
+    # the time Qt spent painting and handling events in between.
+    def end_frame(self):
+        now = self._clock()
+        if self._last_frame is not None:
+            self._frame_times.append(now - self._last_frame)
+        self._last_frame = now
+
+    @property
+    def spans(self):
+        return list(self._spans)
+
+    @property
+    def frame_times(self):
+        return list(self._frame_times)
+
+    @property
+    def tick_times(self):
+        return list(self._tick_times)
+
+    def frame_stats(self):
+        frames, ticks = self._frame_times, self._tick_times
+        return {
+            "frames": len(frames),
+            "last_frame_time": frames[-1] if frames else 0.0,
+            "average_frame_time": sum(frames) / len(frames) if frames else 0.0,
+            "max_frame_time": max(frames, default=0.0),
+            "last_tick_time": ticks[-1] if ticks else 0.0,
+            "average_tick_time": sum(ticks) / len(ticks) if ticks else 0.0,
+            "max_tick_time": max(ticks, default=0.0),
+        }
+
+    # Frame counts per HISTOGRAM_BOUNDS bucket over the frame history
+    def histogram(self):
+        counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        for frame_time in self._frame_times:
+            milliseconds = frame_time * 1000.0
+            bucket = 0
+            while bucket < len(HISTOGRAM_BOUNDS) and milliseconds > HISTOGRAM_BOUNDS[bucket]:
+                bucket += 1
+            counts[bucket] += 1
+        return counts
+
+    # Count, total and max time per span over the buffered spans, heaviest first
+    def summary(self):
+        totals = {}
+        for category, name, start, end, _ in list(self._spans):
+            entry = totals.setdefault(f"{category}/{name}", {"count": 0, "time": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["time"] += end - start
+            entry["max"] = max(entry["max"], end - start)
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["time"]))
+
+    def report(self, limit=15):
+        lines = ["Profile (ms):", f"  {'count':>7} {'total':>9} {'max':>8}  span"]
+        for name, entry in list(self.summary().items())[:limit]:
+            lines.append(f"  {entry['count']:7d} {entry['time'] * 1000:9.2f} {entry['max'] * 1000:8.2f}  {name}")
+        return "\n".join(lines)
+
+    # Spans as complete ("X") events of the Chrome trace event format, times in microseconds
+    def chrome_trace(self):
+        process_id = os.getpid()
+        thread_ids = {}
+        events = []
+        for category, name, start, end, thread in list(self._spans):
+            events.append({"name": name, "cat": category, "ph": "X", "pid": process_id,
+                           "tid": thread_ids.setdefault(thread, len(thread_ids)),
+                           "ts": (start - self._origin) * 1e6, "dur": (end - start) * 1e6})
+        main_thread = threading.main_thread().ident
+        for thread, tid in thread_ids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": process_id, "tid": tid,
+                           "args": {"name": "main" if thread == main_thread else f"worker {tid}"}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, file_path):
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as trace_file:
+            json.dump(self.chrome_trace(), trace_file)
+
+
+# Shared profiler for the whole engine
+profiler = Profiler()
+
+
+# Time every call of a function as a span while the profiler is enabled
+def profiled(category, name=None):
+    def decorate(function):
+        span_name = name or function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            start = profiler.now()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler.add_span(category, span_name, start, profiler.now())
+        return wrapper
+    return decorate
@@ -0,0 +1,236 @@
+import json
+import mmap
+import os
+import struct
+
+from .game_utils import get_file_path
+
+### Resource archive: the resources tree packed into one indexed file and read through a memory map ###
+#
+# Layout, little endian, in the spirit of SCUMM's indexed data files:
+#   header  magic b"PQSCUMM\0", version u32, entry count u32
+#   index   per entry: id length u16, id (UTF-8 path relative to resources/, "/" separated),
+#           type u8, offset u64, length u64
+#   data    the resources' bytes, each starting on an ARCHIVE_ALIGNMENT boundary
+#
+# Code keeps naming resources by their loose file path (get_file_path("resources", ...)). Lookups map
+# the path to its id in the archive and fall back to the loose file when there is no archive or it
+# lacks the resource, e.g. one added since the archive was built. Set PYQTSCUMM_LOOSE_FILES=1 to
+# ignore the archive altogether, or PYQTSCUMM_ARCHIVE to use an archive other than resources.pak.
+
+ARCHIVE_MAGIC = b"PQSCUMM\0"
+ARCHIVE_VERSION = 1
+ARCHIVE_FILE = "resources.pak"
+ARCHIVE_ALIGNMENT = 16
+
+HEADER = struct.Struct("<8sII")
+ID_LENGTH = struct.Struct("<H")
+ENTRY = struct.Struct("<BQQ")
+
+RESOURCE_TYPES = ("other", "data", "image", "audio", "font")
+TYPES_BY_EXTENSION = {".json": "data", ".png": "image", ".bmp": "image", ".mp3": "audio", ".wav": "audio",
+                      ".ogg": "audio", ".ttf": "font", ".otf": "font"}
+
+
+def resource_type(file_name):
+    return TYPES_BY_EXTENSION.get(os.path.splitext(file_name)[1].lower(), "other")
+
+
+class ArchiveEntry:
+    __slots__ = ("id", "type", "offset", "length")
+
+    def __init__(self, resource_id, type_name, offset, length):
+        self.id = resource_id
+        self.type = type_name
+        self.offset = offset
+        self.length = length
+
+
+# An archive opened once and mapped into memory. Reads are memoryview slices of the map, so no bytes
+# are copied until a decoder consumes them.
+class ResourceArchive:
+
+    def __init__(self, file_path):
+        self._file_path = file_path
+        with open(file_path, "rb") as archive_file:
+            self._map = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)  # keeps its own handle
+        self._view = memoryview(self._map)
+        try:
+            self._entries = self._read_index()
+        except Exception:
+            self.close()
+            raise
+
+    def _read_index(self):
+        magic, version, count = HEADER.unpack_from(self._view, 0)
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError(f"{self._file_path} is not a resource archive")
+        if version != ARCHIVE_VERSION:
+            raise ValueError(f"{self._file_path} is archive version {version}, expected {ARCHIVE_VERSION}")
+
+        entries = {}
+        position = HEADER.size
+        for _ in range(count):
+            (id_length,) = ID_LENGTH.unpack_from(self._view, position)
+            position += ID_LENGTH.size
+            resource_id = bytes(self._view[position:position + id_length]).decode("utf-8")
+            position += id_length
+            type_code, offset, length = ENTRY.unpack_from(self._view, position)
+            position += ENTRY.size
+            entries[resource_id] = ArchiveEntry(resource_id, RESOURCE_TYPES[type_code], offset, length)
+        return entries
+
+    @property
+    def file_path(self):
+        return self._file_path
+
+    @property
+    def entries(self):
+        return dict(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, resource_id):
+        return resource_id in self._entries
+
+    def entry(self, resource_id):
+        return self._entries.get(resource_id)
+
+    def read(self, resource_id):
+        entry = self._entries[resource_id]
+        return self._view[entry.offset:entry.offset + entry.length]
+
+    # While slices handed out are still alive the map stays open, and is unmapped with the last of them
+    def close(self):
+        if self._map is None:
+            return
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            pass
+        self._view = None
+        self._map = None
+
+
+# Pack every file under a directory into an archive. Ids are paths relative to the directory. The
+# archive is written next to its destination and moved into place, so a running game never sees a
+# half written archive.
+def build_archive(source_directory, file_path):
+    files = []
+    for directory, directory_names, file_names in os.walk(source_directory):
+        directory_names.sort()
+        for file_name in sorted(file_names):
+            full_path = os.path.join(directory, file_name)
+            files.append((os.path.relpath(full_path, source_directory).replace(os.sep, "/"), full_path))
+
+    index_size = HEADER.size + sum(ID_LENGTH.size + len(resource_id.encode("utf-8")) + ENTRY.size for resource_id, _ in files)
+    offset = align(index_size)
+    layout = []
+    for resource_id, full_path in files:
+        length = os.path.getsize(full_path)
+        layout.append((resource_id, full_path, offset, length))
+        offset = align(offset + length)
+
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, "wb") as archive_file:
+        archive_file.write(HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, len(layout)))
+        for resource_id, full_path, offset, length in layout:
+            encoded = resource_id.encode("utf-8")
+            archive_file.write(ID_LENGTH.pack(len(encoded)))
+            archive_file.write(encoded)
+            archive_file.write(ENTRY.pack(RESOURCE_TYPES.index(resource_type(resource_id)), offset, length))
+
+        for resource_id, full_path, offset, length in layout:
+            archive_file.write(b"\0" * (offset - archive_file.tell()))
+            with open(full_path, "rb") as resource_file:
+                archive_file.write(resource_file.read())
+    os.replace(temp_path, file_path)
+    return {"entries": len(layout), "bytes": os.path.getsize(file_path)}
+
+
+def align(offset):
+    return (offset + ARCHIVE_ALIGNMENT - 1) // ARCHIVE_ALIGNMENT * ARCHIVE_ALIGNMENT
+
+
+# Resource access for the whole game: the archive when there is one, loose files otherwise
+class Resources:
+
+    def __init__(self, root_directory=None, archive_path=None):
+        self._root = os.path.join(root_directory or get_file_path("resources"), "")
+        self._archive = None
+        self.archive_reads = 0
+        self.loose_reads = 0
+        if archive_path is not None:
+            self.open_archive(archive_path)
+
+    # Use the archive at the default location unless loose files are forced
+    def open_default(self):
+        archive_path = os.environ.get("PYQTSCUMM_ARCHIVE") or get_file_path(ARCHIVE_FILE)
+        if not os.environ.get("PYQTSCUMM_LOOSE_FILES") and os.path.exists(archive_path):
+            try:
+                self.open_archive(archive_path)
+            except (OSError, ValueError) as error:
+                print(f"Warning: using loose resource files, could not open {archive_path}: {error}")
+        return self
+
+    def open_archive(self, archive_path):
+        self.close()
+        self._archive = ResourceArchive(archive_path)
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    @property
+    def archive(self):
+        return self._archive
+
+    @property
+    def mode(self):
+        return "archive" if self._archive is not None else "loose"
+
+    # Archive id of a file path under the resources directory, or None for paths outside it
+    def resource_id(self, file_path):
+        if file_path.startswith(self._root):
+            return file_path[len(self._root):].replace(os.sep, "/")
+        return None
+
+    # A slice of the archive for a resource it holds, otherwise None
+    def archived(self, file_path):
+        if self._archive is not None:
+            resource_id = self.resource_id(file_path)
+            if resource_id in self._archive:
+                self.archive_reads += 1
+                return self._archive.read(resource_id)
+        return None
+
+    def exists(self, file_path):
+        return self.archived(file_path) is not None or os.path.exists(file_path)
+
+    # Bytes of a resource: a zero-copy slice from the archive or the contents of the loose file
+    def read(self, file_path):
+        data = self.archived(file_path)
+        if data is not None:
+            return data
+        self.loose_reads += 1
+        with open(file_path, "rb") as resource_file:
+            return resource_file.read()
+
+    def load_json(self, file_path):
+        data = self.archived(file_path)
+        if data is not None:
+            return json.loads(bytes(data).decode("utf-8"))
+        self.loose_reads += 1
+        with open(file_path, "r", encoding="utf-8") as resource_file:
+            return json.load(resource_file)
+
+    def stats(self):
+        return {"mode": self.mode, "entries": len(self._archive) if self._archive is not None else 0,
+                "archive_reads": self.archive_reads, "loose_reads": self.loose_reads}
+
+
+# Shared resources, backed by resources.pak in the project root when it has been built
+resources = Resources().open_default()
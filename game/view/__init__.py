@@ -1,3 +1,10 @@
 from .game_view import GameView
-from .game_view_helpers import GameScene, SayTextItem, InfoLabel, StyledButton, InventoryScrollArea, InventoryLabel, Prop, Hotspot
-from .game_view_utils import get_file_path, calculate_scale_factor
\ No newline at end of file
+from .game_view_helpers import GameScene, GameGraphicsView, PaintStats, SayTextItem, InfoLabel, StyledButton, InventoryScrollArea, InventoryLabel, Prop, Hotspot, PixmapCache, pixmap_cache, AlphaMask, HitTestGrid
+from .game_view_text import GlyphAtlas, TextLayout, get_glyph_atlas
+from .game_view_animation import AnimationClip, SpriteSheet, AnimatedProp, ActorItem, Animator, load_sprite_sheet
+from .game_view_palette import PaletteCycle, IndexedImage, IndexedBackgroundItem, get_indexed_image
+from .game_view_input import InputManager
+from .game_view_audio import AudioManager, PcmCache, PcmBuffer
+from .game_view_profiler import ProfilerOverlay
+from .game_view_rooms import RoomManager, Room
+from .game_view_utils import get_file_path, calculate_scale_factor, get_font
\ No newline at end of file
@@ -1,11 +1,14 @@
-from PyQt6.QtCore import pyqtProperty, pyqtSignal, Qt, QPointF
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QGraphicsView, QGraphicsPixmapItem
-from PyQt6.QtGui import QPixmap, QCursor 
-from PyQt6.QtMultimedia import QAudioOutput, QMediaPlayer
-from PyQt6.QtCore import QUrl
-
-from .game_view_helpers import GameScene, SayTextItem, InfoLabel, StyledButton, InventoryScrollArea, Hotspot, Prop
-from .game_view_utils import get_file_path
+from PyQt6.QtCore import pyqtProperty, pyqtSignal, Qt, QPointF, QTimer
+from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout
+
+from ..utils.game_utils import START_ROOM, startup_trace
+from ..utils.game_utils_profiler import profiler, profiled
+from .game_view_animation import ActorItem, AnimatedProp, Animator, load_sprite_sheet
+from .game_view_audio import AudioManager
+from .game_view_input import InputManager
+from .game_view_profiler import ProfilerOverlay
+from .game_view_helpers import GameGraphicsView, SayTextItem, InfoLabel, StyledButton, InventoryScrollArea
+from .game_view_rooms import RoomManager
 
 class GameView(QMainWindow):  
 
@@ -17,6 +20,10 @@ class GameView(QMainWindow):
     hotspot_entered = pyqtSignal(str) 
     hotspot_left = pyqtSignal(str) 
     hotspot_clicked = pyqtSignal(str)
+    exit_clicked = pyqtSignal(str)
+    walk_clicked = pyqtSignal(float, float)
+    default_verb_clicked = pyqtSignal(str, str)  # target type ("prop", "hotspot" or "exit"), target
+    first_frame_shown = pyqtSignal()
 
     def __init__(self):
         super().__init__()
@@ -27,78 +34,177 @@ class GameView(QMainWindow):
         self.setWindowTitle("PyQtSCUMM: The Secret of Monkey Island")
         self.setStyleSheet("background-color: black;")
 
-        # Create media player for music
-        self._player = QMediaPlayer()
-        self._audio_output = QAudioOutput()
-        self._player.setAudioOutput(self._audio_output)
-        self._audio_output.setVolume(50)
+        # Audio output is created on first use, so QtMultimedia stays out of startup.
+        # Music queued before the first frame is painted starts right after it.
+        self._audio = AudioManager()
+        self._profiler_overlay = None  # created when first shown
+        self._overlay_enabled_profiler = False
+        self._first_frame = False
+        self._pending_music = None
 
         # Setup screen layout
-        self.setup_scene()
-        self.setup_widgets()
-        screen_layout = self.setup_layout()
+        with startup_trace.span("assets", "setup_scene"):
+            self.setup_scene()
+        with startup_trace.span("widgets", "setup_widgets"):
+            self.setup_widgets()
+            screen_layout = self.setup_layout()
         
-        # Set the main widget and show the window
-        widget = QWidget()
-        widget.setLayout(screen_layout)
-        self.setCentralWidget(widget)
-       
-        # TODO: should be part of the scene load
-        self.play_audio("scumm_bar.mp3")
+            # Set the main widget and show the window
+            widget = QWidget()
+            widget.setLayout(screen_layout)
+            self.setCentralWidget(widget)
 
 
-    # Update UI components based on game tick
-    def update_view(self):
-        
-        # Set cursor to crosshair if over the view. 
-        # TODO: Probably could have been done with hover event but proves game tick is working...
-        # TODO: Event trigger to controller to update active verb. Other changes needed to support Walk.
-        if self.is_cursor_over_view():
-            self.setCursor(QCursor(Qt.CursorShape.CrossCursor))
-    
-        else:
-            self.unsetCursor()
+    def paintEvent(self, event):
+        super().paintEvent(event)
 
-    # Setup the scene
-    # TODO: load and refresh from game state
-    def setup_scene(self):
-
-        self._scene = GameScene()
+        if not self._first_frame:
+            self._first_frame = True
+            startup_trace.mark("first_frame")
+            self.first_frame_shown.emit()
+            QTimer.singleShot(0, self.start_pending_audio)
 
-        # Load example background image
-        background_image = QPixmap(get_file_path("resources", "scenes", "scummbar_ega.png"))
-        background_item = QGraphicsPixmapItem(background_image)
-        self._scene.addItem(background_item)
-
-        # TODO: Replace this basic say text solution
-        self._say_text = SayTextItem()
-        self._say_text.setPos(QPointF(20,50))
-        self._scene.addItem(self._say_text)
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_F3:
+            self.show_profiler_overlay(self._profiler_overlay is None or not self._profiler_overlay.isVisible())
+        else:
+            super().keyPressEvent(event)
+
+    # The overlay shows what the profiler records, so showing it turns profiling on. Hiding it only
+    # turns profiling off again if the overlay was what turned it on.
+    def show_profiler_overlay(self, visible=True):
+        if visible:
+            if self._profiler_overlay is not None and self._profiler_overlay.isVisible():
+                return
+            self._overlay_enabled_profiler = not profiler.enabled
+            profiler.enable()
+            if self._profiler_overlay is None:
+                self._profiler_overlay = ProfilerOverlay(self._view.paint_stats, self)
+            self._profiler_overlay.move(0, 0)
+            self._profiler_overlay.show()
+            self._profiler_overlay.raise_()
+        elif self._profiler_overlay is not None:
+            self._profiler_overlay.hide()
+            if self._overlay_enabled_profiler:
+                profiler.disable()
+
+    def start_pending_audio(self):
+        if self._pending_music is not None:
+            self.play_audio(self._pending_music)
+            self._pending_music = None
+
+    # Update UI components based on game tick. Game time comes from the game loop and drives animation.
+    # Input is event driven (see InputManager), so there is no per-tick input work here.
+    @profiled("view")
+    def update_view(self, game_time=0.0):
+        self._view.paint_stats.end_frame()
+        self._animator.update(game_time)
+        self._audio.update(game_time)
+        if self._profiler_overlay is not None and self._profiler_overlay.isVisible():
+            self._profiler_overlay.refresh(game_time)
+        if self._room.background is not None and self._room.background.update_cycles(game_time):
+            self._scene.invalidate_background()
+
+    # Setup the view the room scenes are shown in and load the starting room
+    def setup_scene(self):
 
-        # Create bucket prop
-        bucket_image = QPixmap(get_file_path("resources", "inventory", "bucket.png"))
-        self._bucket_prop = Prop("bucket", bucket_image)
-        self._bucket_prop.setPos(110, 125)
-        self._bucket_prop.clicked.connect(self.handle_prop_click)
-        self._bucket_prop.entered.connect(self.handle_prop_enter)
-        self._bucket_prop.left.connect(self.handle_prop_leave)
-        self._scene.addItem(self._bucket_prop)
-
-        # Create pirate1 hotspot
-        self._pirate1_hotspot = Hotspot("Pirate", 80, 80, 40, 40)
-        self._pirate1_hotspot.clicked.connect(self.handle_hotspot_click)
-        self._pirate1_hotspot.entered.connect(self.handle_hotspot_enter)
-        self._pirate1_hotspot.left.connect(self.handle_hotspot_leave)
-        self._scene.addItem(self._pirate1_hotspot)
+        self._room_manager = RoomManager()
+        self._animator = Animator()
+        self._actor_items = {}  # actor store row -> ActorItem
+        self._room = None
+        self._music = None
+        self._say_text = None
 
         # Place in view
-        self._view = QGraphicsView(self._scene)
+        self._view = GameGraphicsView()
 
         # Remove scroll bars
         self._view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self._view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self._view.setAlignment(Qt.AlignmentFlag.AlignTop)
         self._view.setContentsMargins(0,0,0,0)
+        self._input = InputManager(self._view)  # hover and clicks are resolved by the scene from mouse events
+
+        self.load_room(START_ROOM)
+
+    # Build a room's scene from its data file and connect its props and hotspots
+    def load_room(self, room_name):
+
+        self._room = self._room_manager.load_room(room_name)
+        self._scene = self._room.scene
+
+        # A line still being spoken carries over into the new room
+        self._say_text = SayTextItem(self._say_text.text if self._say_text is not None else None)
+        self._say_text.setPos(QPointF(20,50))
+        self._scene.addItem(self._say_text)
+
+        self._props = dict(self._room.props)
+        self._actor_items = {}  # the model marks every actor dirty, so they are added back on the next sync
+        self._animator.clear()
+        for prop in self._props.values():
+            prop.clicked.connect(self.handle_prop_click)
+            prop.entered.connect(self.handle_prop_enter)
+            prop.left.connect(self.handle_prop_leave)
+            if isinstance(prop, AnimatedProp) and prop.clip is not None:
+                self._animator.play(prop)
+
+        for hotspot_name, hotspot in self._room.hotspots.items():
+            if hotspot_name in self._room.exits:
+                hotspot.clicked.connect(self.handle_exit_click)
+            else:
+                hotspot.clicked.connect(self.handle_hotspot_click)
+            hotspot.entered.connect(self.handle_hotspot_enter)
+            hotspot.left.connect(self.handle_hotspot_leave)
+
+        self._scene.background_clicked.connect(self.walk_clicked)
+        self._scene.default_verb_clicked.connect(self.handle_default_verb_click)
+        self._view.setScene(self._scene)
+
+        # Effects the room uses are decoded in the background before they are first played
+        self._audio.preload(self._room.sounds)
+
+        # Keep the music playing across rooms that share a cue. The audio manager crossfades cues.
+        if self._room.music and self._room.music != self._music:
+            self._music = self._room.music
+            if self._first_frame:
+                self.play_audio(self._music)
+            else:
+                self._pending_music = self._music
+
+    # Actor rows the model changed since the last frame, as (row, name, sprite sheet, x, y, mirrored,
+    # walk frame, visible). Name is None for a removed actor. Actors without a sprite sheet are not drawn.
+    def sync_actors(self, states):
+        for row, name, sheet, x, y, mirrored, frame, visible in states:
+            item = self._actor_items.get(row)
+            if item is not None and item.name != name:
+                self._scene.removeItem(item)
+                del self._actor_items[row]
+                item = None
+            if name is None or sheet is None:
+                continue
+            if item is None:
+                item = self._actor_items[row] = ActorItem(name, load_sprite_sheet(sheet))
+                self._scene.addItem(item)
+            item.set_state(x, y, mirrored, frame, visible, self._scene.scale_factor)
+
+    @property
+    def actor_items(self):
+        return dict(self._actor_items)
+
+    @property
+    def room_manager(self):
+        return self._room_manager
+
+    @property
+    def animator(self):
+        return self._animator
+
+    # Paint calls, time and area per frame, plus how often the static layer was rebuilt
+    @property
+    def paint_stats(self):
+        stats = self._view.paint_stats.as_dict()
+        stats["static_layer_builds"] = self._scene.static_layer_builds
+        return stats
 
     # Setup standalone widgets. Excludes verbs and inventory which are handled in setup_layout. 
     def setup_widgets(self):
@@ -110,7 +216,6 @@ class GameView(QMainWindow):
         self._options_button = StyledButton("Options")
         self._options_button.setEnabled(False)
         self._save_button = StyledButton("Save")
-        self._save_button.setEnabled(False)
         self._quit_button = StyledButton("Quit")
 
         # Inventory Scroll
@@ -128,9 +233,12 @@ class GameView(QMainWindow):
         
         # Interate verbs to place within 3x3 grid
         verb_layout = QGridLayout()
+        self._verb_buttons = {}
+        self._highlighted_verb = ""
         row, col = 0, 0
         for verb in verbs:
             verb_button = StyledButton(verb)
+            self._verb_buttons[verb] = verb_button
             verb_button.clicked.connect(self.handle_verb_button_click) # signal handled in view to streamline with controller
             verb_layout.addWidget(verb_button, row, col)
             col += 1
@@ -149,8 +257,11 @@ class GameView(QMainWindow):
         inv_scroll_layout.addWidget(self._inv_scrollup_button)
         inv_scroll_layout.addWidget(self._inv_scrolldwn_button)
 
-        # Create a scroll area for the inventory
+        # Create a scroll area for the inventory, scrolled a row at a time by the Up/Down buttons
         self._inv_scroll_area = InventoryScrollArea()
+        self._inv_scroll_area.scroll_changed.connect(self.handle_inventory_scroll_changed)
+        self._inv_scrollup_button.clicked.connect(self._inv_scroll_area.scroll_up)
+        self._inv_scrolldwn_button.clicked.connect(self._inv_scroll_area.scroll_down)
        
         # Place gui layouts together horizontally
         gui_layout = QHBoxLayout()
@@ -171,27 +282,52 @@ class GameView(QMainWindow):
     def quit_button(self):
         return self._quit_button
 
+    @pyqtProperty(str)
+    def save_button(self):
+        return self._save_button
+
     @pyqtProperty(str)
     def inv_scroll_area(self):
         return self._inv_scroll_area
 
-    def is_cursor_over_view(self):
-        view_rect = self._view.geometry()
-        cursor_pos = self.mapFromGlobal(QCursor.pos())
-
-        return view_rect.contains(cursor_pos)
+    @property
+    def input_manager(self):
+        return self._input
 
     # Functions to handle view changes based on events passed from controller
 
     def display_info(self, info):
         self._info_label.setText(info)
 
+    # Highlight the default verb of what is under the mouse. Only restyles when the verb changes.
+    def highlight_verb(self, verb):
+        if verb == self._highlighted_verb:
+            return
+        previous = self._verb_buttons.get(self._highlighted_verb)
+        if previous is not None:
+            previous.set_highlighted(False)
+        button = self._verb_buttons.get(verb)
+        if button is not None:
+            button.set_highlighted(True)
+        self._highlighted_verb = verb
+
     def display_inventory(self, inventory_list):
         self._inv_scroll_area.display_inventory(inventory_list)
                                              
 
+    def handle_inventory_scroll_changed(self, can_scroll_up, can_scroll_down):
+        self._inv_scrollup_button.setEnabled(can_scroll_up)
+        self._inv_scrolldwn_button.setEnabled(can_scroll_down)
+
+    def remove_prop(self, prop_name):
+        prop = self._props.pop(prop_name, None)
+        if prop is not None:
+            self._animator.stop(prop)
+            self._scene.removeItem(prop)
+            prop.deleteLater()
+
     def display_character_say(self, text):
-        self._say_text.setPlainText(text)
+        self._say_text.set_text(text)
 
     # Functions to handle user interactions and pass them to the controller
 
@@ -205,13 +341,6 @@ class GameView(QMainWindow):
         prop_name = sender.name
         self.prop_clicked.emit(prop_name)
 
-        # TODO: Not where or how I  want to handle, but for now. Bug fix needed to only remove bucket if matching verb.
-        # likely have to signal back grame model to remove it.
-      
-        if prop_name == "bucket":
-            self._scene.removeItem(sender)
-            sender.deleteLater()
-
     def handle_prop_enter(self):
         sender = self.sender()
         prop_name = sender.name
@@ -227,6 +356,18 @@ class GameView(QMainWindow):
         hotspot_name = sender.name
         self.hotspot_clicked.emit(hotspot_name)
 
+    def handle_exit_click(self):
+        sender = self.sender()
+        self.exit_clicked.emit(self._room.exits[sender.name])
+
+    def handle_default_verb_click(self, item):
+        if item.name in self._room.exits:
+            self.default_verb_clicked.emit("exit", self._room.exits[item.name])
+        elif item.name in self._props:
+            self.default_verb_clicked.emit("prop", item.name)
+        else:
+            self.default_verb_clicked.emit("hotspot", item.name)
+
     def handle_hotspot_enter(self):
         sender = self.sender()
         hotspot_name = sender.name
@@ -237,18 +378,17 @@ class GameView(QMainWindow):
         hotspot_name = sender.name
         self.hotspot_left.emit(hotspot_name)
 
-    
     # Audio functions
-    # Todo: Custom audio class to to remove setup here
 
-    def play_audio(self, file_name):
-
-        # Load audio file
-        file_path = get_file_path("resources", "audio", file_name)
-        audio_file = QUrl.fromLocalFile(file_path)
+    @property
+    def audio(self):
+        return self._audio
 
-        self._player.setSource(audio_file)
-        self._player.play()
+    def play_audio(self, file_name):
+        self._audio.play_music(file_name)
 
     def pause_audio(self):
-        self._player.pause()
+        self._audio.pause_music()
+
+    def play_sound(self, name):
+        self._audio.play_sound(name)
@@ -0,0 +1,313 @@
+import heapq
+
+from PyQt6.QtCore import QRect, QRectF, Qt
+from PyQt6.QtGui import QImage, QPainter, QPixmap
+from PyQt6.QtWidgets import QGraphicsItem
+
+from ..utils.game_utils_profiler import profiled
+from ..utils.game_utils_resources import resources
+from .game_view_helpers import AlphaMask, Prop
+from .game_view_utils import get_file_path, load_image
+
+### Sprite sheet animation. Frames of a sheet live in one atlas pixmap and clips are defined in data. ###
+#
+# Sheet files live in resources/sprites/<name>.json:
+#   {"image": "sprites/guybrush.png",            a grid of equally sized frames, or
+#    "frames": ["sprites/walk0.png", ...],        separate frame images packed into an atlas at load
+#    "frame_width": 32, "frame_height": 48,
+#    "clips": {"walk": {"frames": [0, 1, 2, 3], "fps": 8, "loop": true}}}
+
+SHEET_ATLAS_WIDTH = 1024
+
+
+class AnimationClip:
+
+    def __init__(self, name, frames, fps=8.0, loop=True):
+        self.name = name
+        self.frames = list(frames)
+        self.frame_duration = 1.0 / fps
+        self.loop = loop
+
+    @classmethod
+    def from_data(cls, name, data):
+        return cls(name, data["frames"], data.get("fps", 8.0), data.get("loop", True))
+
+
+# Frames of equal size in one pixmap, addressed by index. Hit masks are built per frame on first use.
+class SpriteSheet:
+
+    def __init__(self, image, frame_width, frame_height, frame_count=None, clips=None):
+        self._image = image
+        self._pixmap = QPixmap.fromImage(image)
+        self._frame_width = frame_width
+        self._frame_height = frame_height
+
+        columns = max(1, image.width() // frame_width)
+        rows = max(1, image.height() // frame_height)
+        if frame_count is None:
+            frame_count = columns * rows
+        self._frames = [QRect((index % columns) * frame_width, (index // columns) * frame_height, frame_width, frame_height)
+                        for index in range(frame_count)]
+        self._masks = {}
+        self._clips = dict(clips or {})
+
+    # Pack separate frame images into one atlas, in rows as wide as SHEET_ATLAS_WIDTH allows
+    @classmethod
+    def pack(cls, images, frame_width, frame_height, clips=None):
+        columns = max(1, SHEET_ATLAS_WIDTH // frame_width)
+        rows = -(-len(images) // columns)  # ceiling division
+        atlas = QImage(min(len(images), columns) * frame_width, rows * frame_height, QImage.Format.Format_ARGB32_Premultiplied)
+        atlas.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(atlas)
+        for index, image in enumerate(images):
+            painter.drawImage((index % columns) * frame_width, (index // columns) * frame_height, image)
+        painter.end()
+        return cls(atlas, frame_width, frame_height, len(images), clips)
+
+    @classmethod
+    def from_file(cls, file_path):
+        data = resources.load_json(file_path)
+
+        clips = {name: AnimationClip.from_data(name, clip) for name, clip in data.get("clips", {}).items()}
+        frame_width, frame_height = data["frame_width"], data["frame_height"]
+        if "frames" in data:
+            images = [load_image(get_file_path("resources", *path.split("/"))) for path in data["frames"]]
+            return cls.pack(images, frame_width, frame_height, clips)
+
+        image = load_image(get_file_path("resources", *data["image"].split("/")))
+        return cls(image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied), frame_width, frame_height, data.get("frame_count"), clips)
+
+    @property
+    def pixmap(self):
+        return self._pixmap
+
+    @property
+    def frame_width(self):
+        return self._frame_width
+
+    @property
+    def frame_height(self):
+        return self._frame_height
+
+    @property
+    def frame_count(self):
+        return len(self._frames)
+
+    @property
+    def clips(self):
+        return self._clips
+
+    def clip(self, name):
+        return self._clips[name]
+
+    def frame_rect(self, index):
+        return self._frames[index]
+
+    def mask(self, index):
+        mask = self._masks.get(index)
+        if mask is None:
+            mask = self._masks[index] = AlphaMask.from_image(self._image.copy(self._frames[index]))
+        return mask
+
+
+_sheets = {}
+
+# Sheets are shared by every prop or actor using them
+@profiled("assets")
+def load_sprite_sheet(name):
+    sheet = _sheets.get(name)
+    if sheet is None:
+        sheet = _sheets[name] = SpriteSheet.from_file(get_file_path("resources", "sprites", f"{name}.json"))
+    return sheet
+
+
+# A prop drawn from one frame of a sprite sheet. Changing frame only invalidates the prop's own rect.
+# Hit tests go against the mask of the frame currently shown.
+class AnimatedProp(Prop):
+
+    def __init__(self, name, sheet, clip=None):
+        super().__init__(name)
+        self._sheet = sheet
+        self._frame = 0
+        self._clip = sheet.clip(clip) if isinstance(clip, str) else clip
+
+    @property
+    def sheet(self):
+        return self._sheet
+
+    @property
+    def clip(self):
+        return self._clip
+
+    @property
+    def frame(self):
+        return self._frame
+
+    def set_frame(self, frame):
+        if frame != self._frame:
+            self._frame = frame
+            self.update()
+
+    def boundingRect(self):
+        return QRectF(0, 0, self._sheet.frame_width, self._sheet.frame_height)
+
+    def paint(self, painter, option, widget=None):
+        self.draw_sprite(painter)
+        if self._hovered:
+            painter.fillRect(self.boundingRect(), self._color)
+
+    def draw_sprite(self, painter):
+        painter.drawPixmap(self.boundingRect(), self._sheet.pixmap, QRectF(self._sheet.frame_rect(self._frame)))
+
+    # The prop is its own hit mask, so the hit grid always tests the current frame
+    @property
+    def hit_mask(self):
+        return self
+
+    def test(self, x, y):
+        return self._sheet.mask(self._frame).test(x, y)
+
+
+# An actor drawn from its sprite sheet, anchored at its feet and stacked by how far down the room it
+# stands. The model's walk cycle frame indexes the sheet's "walk" clip when it has one. Actors facing
+# west are drawn mirrored. Actors are not interactive yet, so this is a plain item.
+class ActorItem(QGraphicsItem):
+
+    def __init__(self, name, sheet):
+        super().__init__()
+        self._name = name
+        self._sheet = sheet
+        self._walk = sheet.clips.get("walk")
+        self._frame = 0
+        self._mirrored = False
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def frame(self):
+        return self._frame
+
+    # Position in logical room coordinates, walk cycle frame and visibility as the model has them
+    def set_state(self, x, y, mirrored, frame, visible, scale_factor):
+        self.setPos(x * scale_factor, y * scale_factor)
+        self.setZValue(y)
+        self.setVisible(visible)
+        frame = self._walk.frames[frame % len(self._walk.frames)] if self._walk is not None else frame % self._sheet.frame_count
+        if frame != self._frame or mirrored != self._mirrored:
+            self._frame = frame
+            self._mirrored = mirrored
+            self.update()
+
+    def boundingRect(self):
+        return QRectF(-self._sheet.frame_width / 2, -self._sheet.frame_height, self._sheet.frame_width, self._sheet.frame_height)
+
+    def paint(self, painter, option, widget=None):
+        if self._mirrored:
+            painter.scale(-1, 1)
+        painter.drawPixmap(self.boundingRect(), self._sheet.pixmap, QRectF(self._sheet.frame_rect(self._frame)))
+
+
+# Playback state of one clip on one item
+class Animation:
+
+    def __init__(self, item, clip, start_time, on_finished=None):
+        self.item = item
+        self.clip = clip
+        self.position = 0          # index into the clip's frames
+        self.due = start_time + clip.frame_duration
+        self.on_finished = on_finished
+        self.active = True
+
+
+# Advances every playing animation from the game loop's clock. Animations wait in a heap ordered by
+# when their next frame is due, so an update only touches the items whose frame actually changes.
+# Late updates skip frames rather than slowing the animation down.
+class Animator:
+
+    def __init__(self):
+        self._heap = []            # (due time, sequence, Animation)
+        self._animations = {}      # item -> Animation
+        self._sequence = 0
+        self._time = 0.0
+
+        self.frame_updates = 0     # frame changes since the counters were reset
+        self.repaint_area = 0.0    # scene area invalidated by frame changes, in screen pixels
+        self.last_frame_updates = 0
+        self.last_repaint_area = 0.0
+
+    def __len__(self):
+        return len(self._animations)
+
+    # Start a clip on an item, replacing whatever it was playing
+    def play(self, item, clip=None, on_finished=None):
+        clip = item.sheet.clip(clip) if isinstance(clip, str) else (clip or item.clip)
+        self.stop(item)
+        animation = self._animations[item] = Animation(item, clip, self._time, on_finished)
+        item.set_frame(clip.frames[0])
+        self._push(animation)
+
+    def stop(self, item):
+        animation = self._animations.pop(item, None)
+        if animation is not None:
+            animation.active = False  # its heap entry is skipped when it comes up
+
+    def clear(self):
+        self._heap.clear()
+        self._animations.clear()
+
+    def reset_counters(self):
+        self.frame_updates = 0
+        self.repaint_area = 0.0
+
+    def update(self, now):
+        self._time = now
+        frame_updates = 0
+        repaint_area = 0.0
+
+        while self._heap and self._heap[0][0] <= now:
+            _, _, animation = heapq.heappop(self._heap)
+            if not animation.active:
+                continue
+
+            clip = animation.clip
+            steps = 1 + int((now - animation.due) / clip.frame_duration)
+            position = animation.position + steps
+            animation.due += steps * clip.frame_duration
+
+            if position >= len(clip.frames):
+                if clip.loop:
+                    position %= len(clip.frames)
+                else:
+                    position = len(clip.frames) - 1
+                    animation.active = False
+                    self._animations.pop(animation.item, None)
+
+            if position != animation.position:
+                animation.position = position
+                previous = animation.item.frame
+                animation.item.set_frame(clip.frames[position])
+                if animation.item.frame != previous:
+                    frame_updates += 1
+                    rect = animation.item.sceneBoundingRect()
+                    repaint_area += rect.width() * rect.height()
+
+            if animation.active:
+                self._push(animation)
+            elif animation.on_finished is not None:
+                animation.on_finished(animation.item)
+
+        self.last_frame_updates = frame_updates
+        self.last_repaint_area = repaint_area
+        self.frame_updates += frame_updates
+        self.repaint_area += repaint_area
+
+    def stats(self):
+        return {"animations": len(self._animations), "frame_updates": self.frame_updates, "repaint_area": self.repaint_area,
+                "last_frame_updates": self.last_frame_updates, "last_repaint_area": self.last_repaint_area}
+
+    def _push(self, animation):
+        self._sequence += 1
+        heapq.heappush(self._heap, (animation.due, self._sequence, animation))
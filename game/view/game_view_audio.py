@@ -0,0 +1,407 @@
+import io
+import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QUrl
+
+from ..utils.game_utils import startup_trace
+from ..utils.game_utils_assets import baked_assets, widen_pcm24
+from ..utils.game_utils_profiler import profiled
+from ..utils.game_utils_resources import resources
+from .game_view_utils import get_file_path
+
+### Audio: a music channel with crossfades and a pool of sound effect voices fed from decoded PCM ###
+#
+# Files live in resources/audio. Music is streamed by QMediaPlayer, which decodes on its own threads.
+# Sound effects are WAV files decoded once on a worker thread into PCM buffers, so starting one is only
+# a copy into a voice. Rooms name their music cue and the effects to decode ahead of time:
+#   "music": "scumm_bar.mp3", "sounds": ["door_open.wav", "footstep.wav"]
+#
+# QtMultimedia is only imported when the first sound or music cue plays, to keep it out of startup.
+
+MUSIC_VOLUME = 0.5
+MUSIC_FADE_TIME = 1.0         # seconds to crossfade between music cues
+SOUND_VOICES = 8
+PCM_CACHE_BUDGET = 16 * 1024 * 1024  # bytes of decoded sound effects kept in memory
+SOUND_MAX_DELAY = 0.25        # seconds a sound still waiting on its decode is worth starting late
+SAMPLE_WIDTHS = (1, 2, 4)     # bytes per sample the audio sink plays: UInt8, Int16 and Int32
+
+
+# Decoded samples of a sound effect, as stored in the WAV file
+class PcmBuffer:
+
+    def __init__(self, data, sample_rate, channels, sample_width):
+        self.data = data
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width  # bytes per sample
+
+    @property
+    def nbytes(self):
+        return len(self.data)
+
+    @property
+    def duration(self):
+        return len(self.data) / (self.sample_rate * self.channels * self.sample_width)
+
+    @property
+    def format_key(self):
+        return (self.sample_rate, self.channels, self.sample_width)
+
+
+# Runs on the decode worker, so it must not touch anything Qt beyond plain data. Effects the asset
+# pipeline converted to the common format are read from the converted copy. 24-bit samples are widened
+# to 32-bit, as the audio sink has no 24-bit format; other widths it cannot play fail the decode.
+@profiled("assets")
+def decode_wav(file_path):
+    file_path = baked_assets.converted(file_path) or file_path
+    data = resources.archived(file_path)
+    with wave.open(io.BytesIO(data) if data is not None else file_path, "rb") as wav_file:
+        frames, width = wav_file.readframes(wav_file.getnframes()), wav_file.getsampwidth()
+        if width == 3:
+            frames, width = widen_pcm24(frames), 4
+        elif width not in SAMPLE_WIDTHS:
+            raise ValueError(f"unsupported sample width {width}")
+        return PcmBuffer(frames, wav_file.getframerate(), wav_file.getnchannels(), width)
+
+
+# Decoded sound effects by file path, least recently used first. Decodes run on a worker thread and
+# are collected by the GUI thread when done. Buffers beyond the memory budget are dropped oldest
+# first; a voice still playing one keeps its own copy of the samples.
+class PcmCache:
+
+    def __init__(self, budget=PCM_CACHE_BUDGET, max_workers=1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audio-decoder")
+        self._buffers = OrderedDict()  # file path -> PcmBuffer
+        self._pending = {}             # file path -> future of PcmBuffer
+        self._failed = set()           # file paths that could not be decoded, not retried
+        self._budget = budget
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def __contains__(self, file_path):
+        return file_path in self._buffers
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    @property
+    def budget(self):
+        return self._budget
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # Start decoding a file unless it is cached, already being decoded or known to fail
+    def request(self, file_path):
+        if file_path not in self._buffers and file_path not in self._pending and file_path not in self._failed:
+            self._pending[file_path] = self._executor.submit(decode_wav, file_path)
+
+    # The decoded buffer, or None while it is still being decoded (or failed to decode)
+    def get(self, file_path):
+        buffer = self._buffers.get(file_path)
+        if buffer is not None:
+            self._buffers.move_to_end(file_path)
+            self.hits += 1
+            return buffer
+
+        self.misses += 1
+        future = self._pending.get(file_path)
+        if future is not None and future.done():
+            return self._collect(file_path)
+        return None
+
+    # Move finished decodes into the cache
+    def collect(self):
+        for file_path in [file_path for file_path, future in self._pending.items() if future.done()]:
+            self._collect(file_path)
+
+    # Block until every requested decode has finished, e.g. before a cutscene that must not skip sounds
+    def wait(self):
+        for future in list(self._pending.values()):
+            future.exception()
+        self.collect()
+
+    def is_pending(self, file_path):
+        return file_path in self._pending
+
+    def has_failed(self, file_path):
+        return file_path in self._failed
+
+    def _collect(self, file_path):
+        future = self._pending.pop(file_path)
+        try:
+            buffer = future.result()
+        except Exception as error:
+            print(f"Warning: could not decode sound {file_path}: {error!r}")
+            self._failed.add(file_path)
+            self.errors += 1
+            return None
+
+        self._buffers[file_path] = buffer
+        self._bytes += buffer.nbytes
+        while self._bytes > self._budget and len(self._buffers) > 1:
+            _, evicted = self._buffers.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+        return buffer
+
+    def stats(self):
+        return {"buffers": len(self._buffers), "pending": len(self._pending), "bytes": self._bytes, "budget": self._budget,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions, "errors": self.errors}
+
+
+# One sound effect channel: an audio sink pulling from an in-memory buffer. The sink is only
+# recreated when a sound with a different sample format comes along.
+class SoundVoice:
+
+    def __init__(self, multimedia):
+        self._multimedia = multimedia
+        self._sink = None
+        self._format_key = None
+        self._buffer = QBuffer()
+        self.name = None
+        self.started = 0.0
+        self.ends = 0.0
+
+    def busy(self, now):
+        return self.name is not None and now < self.ends
+
+    def play(self, name, pcm, volume, now):
+        if self._sink is not None:
+            self._sink.stop()
+        if pcm.format_key != self._format_key:
+            self._sink = self._multimedia.QAudioSink(self.audio_format(pcm))
+            self._format_key = pcm.format_key
+
+        self._buffer.close()
+        self._buffer.setData(QByteArray(pcm.data))
+        self._buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        self._sink.setVolume(volume)
+        self._sink.start(self._buffer)
+
+        self.name = name
+        self.started = now
+        self.ends = now + pcm.duration
+
+    def stop(self):
+        if self._sink is not None:
+            self._sink.stop()
+        self.name = None
+
+    def audio_format(self, pcm):
+        sample_formats = {1: self._multimedia.QAudioFormat.SampleFormat.UInt8,
+                          2: self._multimedia.QAudioFormat.SampleFormat.Int16,
+                          4: self._multimedia.QAudioFormat.SampleFormat.Int32}
+        audio_format = self._multimedia.QAudioFormat()
+        audio_format.setSampleRate(pcm.sample_rate)
+        audio_format.setChannelCount(pcm.channels)
+        audio_format.setSampleFormat(sample_formats[pcm.sample_width])
+        return audio_format
+
+
+# A media player and its output, one of the two decks of the music channel
+class MusicDeck:
+
+    def __init__(self, multimedia):
+        self.player = multimedia.QMediaPlayer()
+        self.output = multimedia.QAudioOutput()
+        self.player.setAudioOutput(self.output)
+        self.player.setLoops(multimedia.QMediaPlayer.Loops.Infinite)
+        self.cue = None
+        self.source = None  # buffer the player streams an archived cue from
+        self.volume = 0.0
+        self.target = 0.0
+        self.fade_speed = 0.0  # volume change per second
+
+    # Archived cues are streamed from an in-memory buffer, loose ones from their file
+    def start(self, cue):
+        self.cue = cue
+        file_path = get_file_path("resources", "audio", cue)
+        data = resources.archived(file_path)
+        if data is not None:
+            self.source = QBuffer()
+            self.source.setData(QByteArray(data))
+            self.source.open(QIODevice.OpenModeFlag.ReadOnly)
+            self.player.setSourceDevice(self.source, QUrl(cue))
+        else:
+            self.source = None
+            self.player.setSource(QUrl.fromLocalFile(file_path))
+        self.player.play()
+
+    def fade_to(self, target, fade_time):
+        self.target = target
+        if fade_time <= 0:
+            self.set_volume(target)
+        else:
+            self.fade_speed = abs(target - self.volume) / fade_time
+
+    def set_volume(self, volume):
+        self.volume = volume
+        self.output.setVolume(volume)
+        if volume <= 0.0 and self.target <= 0.0 and self.cue is not None:
+            self.player.stop()
+            self.cue = None
+
+    # Step the fade by the elapsed time. Returns True while still fading.
+    def update(self, elapsed):
+        if self.volume == self.target:
+            return False
+        step = self.fade_speed * elapsed
+        if abs(self.target - self.volume) <= step:
+            self.set_volume(self.target)
+        else:
+            self.set_volume(self.volume + step if self.target > self.volume else self.volume - step)
+        return self.volume != self.target
+
+
+# Owns all audio output. Music cues crossfade between two decks. Sound effects play on a fixed pool of
+# voices, taking a free voice or else the one that has played longest. Fades and sounds waiting on
+# their decode are advanced from the game loop's clock.
+class AudioManager:
+
+    def __init__(self, voices=SOUND_VOICES, budget=PCM_CACHE_BUDGET):
+        self._multimedia = None
+        self._voice_count = voices
+        self._voices = []
+        self._decks = []
+        self._active_deck = None
+        self._paused = False
+        self._cache = PcmCache(budget)
+        self._waiting = []  # (name, volume, time requested) of sounds still being decoded
+        self._time = 0.0
+
+        self.sounds_played = 0
+        self.sounds_stolen = 0
+        self.sounds_dropped = 0
+
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def music(self):
+        return self._active_deck.cue if self._active_deck is not None else None
+
+    @property
+    def initialised(self):
+        return self._multimedia is not None
+
+    def init_audio(self):
+        if self._multimedia is None:
+            with startup_trace.span("import", "QtMultimedia"):
+                from PyQt6 import QtMultimedia
+            self._multimedia = QtMultimedia
+            self._decks = [MusicDeck(QtMultimedia), MusicDeck(QtMultimedia)]
+            self._voices = [SoundVoice(QtMultimedia) for _ in range(self._voice_count)]
+
+    def shutdown(self):
+        self._cache.shutdown()
+
+    # Switch to a music cue, crossfading from the one playing. The same cue keeps playing untouched.
+    def play_music(self, cue, fade_time=MUSIC_FADE_TIME):
+        self.init_audio()
+        if self._paused:
+            self.resume_music()
+        if self._active_deck is not None and self._active_deck.cue == cue:
+            return
+
+        previous = self._active_deck
+        deck = self._decks[1] if previous is self._decks[0] else self._decks[0]
+        if previous is None:
+            fade_time = 0.0  # nothing to fade from
+        else:
+            previous.fade_to(0.0, fade_time)
+
+        deck.set_volume(0.0)
+        deck.start(cue)
+        deck.fade_to(MUSIC_VOLUME, fade_time)
+        self._active_deck = deck
+
+    def stop_music(self, fade_time=MUSIC_FADE_TIME):
+        if self._active_deck is not None:
+            self._active_deck.fade_to(0.0, fade_time)
+            self._active_deck = None
+
+    def pause_music(self):
+        self._paused = True
+        for deck in self._decks:
+            if deck.cue is not None:
+                deck.player.pause()
+
+    def resume_music(self):
+        self._paused = False
+        for deck in self._decks:
+            if deck.cue is not None:
+                deck.player.play()
+
+    # Decode sound effects ahead of use, e.g. those a room lists. Does not initialise audio output.
+    def preload(self, names):
+        for name in names:
+            self._cache.request(self.sound_path(name))
+
+    @staticmethod
+    def sound_path(name):
+        return get_file_path("resources", "audio", name)
+
+    # Play a sound effect. A decoded sound starts at once, otherwise it starts when its decode
+    # finishes if that is within SOUND_MAX_DELAY.
+    def play_sound(self, name, volume=1.0):
+        file_path = self.sound_path(name)
+        pcm = self._cache.get(file_path)
+        if pcm is not None:
+            self.init_audio()
+            self._start_voice(name, pcm, volume)
+            return True
+
+        if not self._cache.has_failed(file_path):
+            self._cache.request(file_path)
+            self._waiting.append((name, volume, self._time))
+        return False
+
+    def _start_voice(self, name, pcm, volume):
+        now = self._time
+        voice = next((voice for voice in self._voices if not voice.busy(now)), None)
+        if voice is None:
+            voice = min(self._voices, key=lambda voice: voice.started)
+            self.sounds_stolen += 1
+        voice.play(name, pcm, volume, now)
+        self.sounds_played += 1
+
+    def stop_sounds(self):
+        self._waiting.clear()
+        for voice in self._voices:
+            voice.stop()
+
+    def update(self, now):
+        elapsed = max(0.0, now - self._time)
+        self._time = now
+
+        for deck in self._decks:
+            deck.update(elapsed)
+
+        if self._waiting:
+            self._cache.collect()
+            waiting, self._waiting = self._waiting, []
+            for name, volume, requested in waiting:
+                file_path = self.sound_path(name)
+                if now - requested > SOUND_MAX_DELAY:
+                    self.sounds_dropped += 1
+                elif file_path in self._cache:
+                    self.init_audio()
+                    self._start_voice(name, self._cache.get(file_path), volume)
+                elif self._cache.is_pending(file_path):
+                    self._waiting.append((name, volume, requested))
+                else:
+                    self.sounds_dropped += 1  # failed to decode
+
+    def stats(self):
+        return {"music": self.music, "voices_busy": sum(voice.busy(self._time) for voice in self._voices),
+                "waiting": len(self._waiting), "sounds_played": self.sounds_played, "sounds_stolen": self.sounds_stolen,
+                "sounds_dropped": self.sounds_dropped, "cache": self._cache.stats()}
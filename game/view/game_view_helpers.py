@@ -1,62 +1,584 @@
-from PyQt6.QtCore import pyqtProperty, pyqtSignal, QRectF, Qt
-from PyQt6.QtWidgets import QWidget, QGraphicsScene, QGraphicsTextItem, QPushButton, QScrollArea, QGridLayout, QLabel, QGraphicsObject
-from PyQt6.QtGui import QPixmap, QColor, QFont
+import math
+import time
+from bisect import insort
+from collections import OrderedDict
 
-from .game_view_utils import get_file_path, calculate_scale_factor
+from PyQt6.QtCore import pyqtProperty, pyqtSignal, QEvent, QRectF, Qt
+from PyQt6.QtWidgets import (QWidget, QGraphicsScene, QGraphicsItem, QGraphicsTextItem, QGraphicsView, QPushButton, QScrollArea, QGridLayout,
+                             QLabel, QGraphicsObject, QStyleOptionGraphicsItem)
+from PyQt6.QtGui import QPixmap, QImage, QColor, QPainter
+
+from ..utils.game_utils_assets import baked_assets
+from ..utils.game_utils_profiler import profiler
+from .game_view_palette import IndexedBackgroundItem
+from .game_view_text import get_glyph_atlas
+from .game_view_utils import get_file_path, calculate_scale_factor, get_font, load_pixmap, SCUMM_TEXT_FONT, SCUMM_GUI_FONT
 
 
 # Constants
+SCREEN_RESOLUTION_WIDTH = 320
 SCREEN_RESOLUTION_HEIGHT = 180
+INVENTORY_COLUMNS = 4
+INVENTORY_ROWS = 1
+SAY_TEXT_SIZE = 6         # logical pixels
+SAY_TEXT_WIDTH = 280      # logical pixels before a line wraps
+INFO_TEXT_SIZE = 8
 
-# Create a QFont instance with the loaded font family
-scumm_text = QFont(get_file_path("resources", "fonts", "lucasarts-scumm-solid.ttf"), 24 )
-scumm_gui = QFont(get_file_path("resources", "fonts", "lucasarts-scumm-menu-solid.ttf"), 24 )
 
 ### All classes supporting the GameView ###
 
+# Shared cache of decoded sprites keyed by resource path and scale factor. Each file is decoded
+# once and scaled variants are created with nearest-neighbour sampling to keep the pixel art crisp.
+# Least recently used entries are evicted once the memory budget (in bytes) is exceeded.
+class PixmapCache:
+
+    def __init__(self, memory_budget=64 * 1024 * 1024):
+        self._memory_budget = memory_budget
+        self._entries = OrderedDict()
+        self._masks = {}  # file path -> hit mask of the sprite, dropped with its unscaled pixmap
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def memory_budget(self):
+        return self._memory_budget
+
+    @memory_budget.setter
+    def memory_budget(self, memory_budget):
+        self._memory_budget = memory_budget
+        self._evict()
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get_pixmap(self, file_path, scale_factor=1.0):
+        key = (file_path, scale_factor)
+        pixmap = self._entries.get(key)
+        if pixmap is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pixmap
+
+        self.misses += 1
+        baked_path = baked_assets.variant(file_path, scale_factor) if scale_factor != 1.0 else None
+        if scale_factor == 1.0:
+            pixmap = load_pixmap(file_path)
+        elif baked_path is not None:
+            pixmap = QPixmap(baked_path)  # pre-scaled by the asset pipeline
+        else:
+            source = self.get_pixmap(file_path)
+            pixmap = source.scaled(int(source.width() * scale_factor), int(source.height() * scale_factor),
+                                   Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.FastTransformation)
+        self.insert(key, pixmap)
+        return pixmap
+
+    # Hit mask of a sprite file: the one baked by the asset pipeline, otherwise extracted from the pixmap
+    def get_mask(self, file_path):
+        self.get_pixmap(file_path)  # the mask lives as long as this entry
+        mask = self._masks.get(file_path)
+        if mask is None:
+            mask = AlphaMask.from_file(file_path)
+            if mask is None:
+                mask = AlphaMask.from_image(self._entries[(file_path, 1.0)].toImage())
+            self._masks[file_path] = mask
+        return mask
+
+    def insert(self, key, pixmap):
+        if key in self._entries:
+            self._bytes -= self.pixmap_bytes(self._entries.pop(key))
+        self._entries[key] = pixmap
+        self._bytes += self.pixmap_bytes(pixmap)
+        self._evict()
+
+    def clear(self):
+        self._entries.clear()
+        self._masks.clear()
+        self._bytes = 0
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self._bytes, "memory_budget": self._memory_budget,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    @staticmethod
+    def pixmap_bytes(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the budget
+        while self._bytes > self._memory_budget and len(self._entries) > 1:
+            (file_path, scale_factor), pixmap = self._entries.popitem(last=False)
+            self._bytes -= self.pixmap_bytes(pixmap)
+            if scale_factor == 1.0:
+                self._masks.pop(file_path, None)
+            self.evictions += 1
+
+# Single cache shared by props, inventory and scene backgrounds
+pixmap_cache = PixmapCache()
+
+# Per-pixel hit mask for a sprite. Each row is packed into a single int, one bit per pixel,
+# set where the pixel is not fully transparent. Masks of sprite files are kept by the PixmapCache.
+class AlphaMask:
+
+    # Masks shared between props using the same pixmap, by pixmap cache key, least recently used first
+    _masks = OrderedDict()
+    MASK_CACHE_SIZE = 64
+
+    def __init__(self, width, height, rows):
+        self._width = width
+        self._height = height
+        self._rows = rows
+
+    @classmethod
+    def from_pixmap(cls, pixmap):
+        key = pixmap.cacheKey()
+        mask = cls._masks.get(key)
+        if mask is not None:
+            cls._masks.move_to_end(key)
+            return mask
+
+        mask = cls._masks[key] = cls.from_image(pixmap.toImage())
+        if len(cls._masks) > cls.MASK_CACHE_SIZE:
+            cls._masks.popitem(last=False)
+        return mask
+
+    # Mask baked by the asset pipeline for a sprite file, or None when there is none
+    @classmethod
+    def from_file(cls, file_path):
+        baked = baked_assets.mask(file_path)
+        return cls(*baked) if baked is not None else None
+
+    @classmethod
+    def from_image(cls, image):
+        image = image.convertToFormat(QImage.Format.Format_Alpha8)
+        width, height, stride = image.width(), image.height(), image.bytesPerLine()
+        data = image.constBits()
+        data.setsize(image.sizeInBytes())
+        data = bytes(data)
+
+        rows = []
+        for y in range(height):
+            bits = 0
+            for x, alpha in enumerate(data[y * stride:y * stride + width]):
+                if alpha:
+                    bits |= 1 << x
+            rows.append(bits)
+        return cls(width, height, rows)
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    def test(self, x, y):
+        if 0 <= x < self._width and 0 <= y < self._height:
+            return (self._rows[y] >> x) & 1 == 1
+        return False
+
+
+# Uniform grid over the logical room space for hover and click resolution. Each cell lists the entries
+# overlapping it, top-most first, so a lookup is one cell fetch plus a rect and mask test per overlap.
+class HitTestGrid:
+
+    def __init__(self, width=SCREEN_RESOLUTION_WIDTH, height=SCREEN_RESOLUTION_HEIGHT, cell_size=16):
+        self._cell_size = cell_size
+        self._columns = -(-width // cell_size)  # ceiling division
+        self._rows = -(-height // cell_size)
+        self._cells = [[] for _ in range(self._columns * self._rows)]
+        self._entries = {}  # item -> (x, y, width, height, mask, z, cells)
+        self._order = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item):
+        return item in self._entries
+
+    def insert(self, item, x, y, width, height, mask=None, z=0.0):
+        self.remove(item)
+
+        # Later insertions win ties, matching the scene stacking order
+        self._order += 1
+        first_column, last_column = self._clamp_column(x), self._clamp_column(x + width - 1)
+        first_row, last_row = self._clamp_row(y), self._clamp_row(y + height - 1)
+        cells = [row * self._columns + column for row in range(first_row, last_row + 1) for column in range(first_column, last_column + 1)]
+
+        entry = (x, y, width, height, mask, (-z, -self._order), cells)
+        self._entries[item] = entry
+        for cell in cells:
+            insort(self._cells[cell], item, key=lambda other: self._entries[other][5])
+
+    def remove(self, item):
+        entry = self._entries.pop(item, None)
+        if entry is not None:
+            for cell in entry[6]:
+                self._cells[cell].remove(item)
+
+    def clear(self):
+        self._entries.clear()
+        for bucket in self._cells:
+            bucket.clear()
+
+    # Top-most item at a logical position, or None
+    def hit(self, x, y):
+        column, row = int(x // self._cell_size), int(y // self._cell_size)
+        if not (0 <= column < self._columns and 0 <= row < self._rows):
+            return None
+
+        for item in self._cells[row * self._columns + column]:
+            item_x, item_y, width, height, mask, _, _ = self._entries[item]
+            local_x, local_y = math.floor(x - item_x), math.floor(y - item_y)
+            if 0 <= local_x < width and 0 <= local_y < height:
+                if mask is None or mask.test(local_x, local_y):
+                    return item
+        return None
+
+    def _clamp_column(self, x):
+        return min(max(int(x // self._cell_size), 0), self._columns - 1)
+
+    def _clamp_row(self, y):
+        return min(max(int(y // self._cell_size), 0), self._rows - 1)
+
+
+# Scene in logical room coordinates scaled up to the screen. Hover and clicks on props and hotspots are
+# resolved through a HitTestGrid instead of per-item hover events, emitting the items' own signals.
+# The background and static props are composited once, at screen resolution, into a static layer drawn
+# as the scene background. Only dynamic items (animation, hover overlays, text) are painted as items.
+# A background with palette cycles is kept out of the layer and painted under it, exposed rect only, so
+# a cycle step repaints the background without compositing the layer again.
 class GameScene(QGraphicsScene):
+    background_clicked = pyqtSignal(float, float)  # logical room coordinates
+    default_verb_clicked = pyqtSignal(QGraphicsObject)  # right click on a prop or hotspot
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self.setBackgroundBrush(QColor("black"))
-        
+
+        self._scale_factor = calculate_scale_factor()
+        self._hit_grid = HitTestGrid()
+        self._hovered = None
+        self._static_items = []
+        self._static_layer = None
+        self._cycling_background = None
+        self.static_layer_builds = 0
+
+    @property
+    def scale_factor(self):
+        return self._scale_factor
+
+    @property
+    def hit_grid(self):
+        return self._hit_grid
+
+    @property
+    def hovered(self):
+        return self._hovered
+
     def addItem(self, item):
         super().addItem(item)
 
-        scale_factor = calculate_scale_factor()
-        item.setPos(item.pos() * scale_factor)
+        logical_pos = item.pos()
+        item.setPos(logical_pos * self._scale_factor)
+
+        # Text and indexed backgrounds are rasterised at screen resolution already
+        if not isinstance(item, (QGraphicsTextItem, SayTextItem, IndexedBackgroundItem)):
+            item.setScale(self._scale_factor)
+
+        if isinstance(item, (Prop, Hotspot)):
+            self.update_hit_item(item)
+
+    def removeItem(self, item):
+        if item is self._hovered:
+            self.set_hovered(None)
+        self._hit_grid.remove(item)
+        if item in self._static_items:
+            self._static_items.remove(item)
+            self.invalidate_static_layer()
+        if item is self._cycling_background:
+            self._cycling_background = None
+            self.invalidate_static_layer()
+        super().removeItem(item)
+
+    # Add an item that does not change on its own to the static layer. Props keep painting their hover
+    # overlay; anything else is hidden and only drawn into the layer.
+    def add_static_item(self, item):
+        self.addItem(item)
+        if isinstance(item, IndexedBackgroundItem) and item.cycles:
+            self._cycling_background = item
+        else:
+            self._static_items.append(item)
+        if isinstance(item, Prop):
+            item.set_baked(True)
+        else:
+            item.hide()
+        self.invalidate_static_layer()
+
+    @property
+    def static_items(self):
+        return list(self._static_items)
+
+    # Rebuild the static layer on next paint, e.g. after a static prop moved
+    def invalidate_static_layer(self):
+        self._static_layer = None
+        self.invalidate(self.sceneRect(), QGraphicsScene.SceneLayer.BackgroundLayer)
+
+    # Repaint the cycling background after a palette step, keeping the static layer
+    def invalidate_background(self):
+        if self._cycling_background is None:
+            self.invalidate_static_layer()
+        else:
+            self.invalidate(self._cycling_background.sceneBoundingRect(), QGraphicsScene.SceneLayer.BackgroundLayer)
+
+    # Transparent when a cycling background is painted under it
+    def build_static_layer(self):
+        layer = QPixmap(math.ceil(SCREEN_RESOLUTION_WIDTH * self._scale_factor), math.ceil(SCREEN_RESOLUTION_HEIGHT * self._scale_factor))
+        layer.fill(self.backgroundBrush().color() if self._cycling_background is None else QColor(Qt.GlobalColor.transparent))
+
+        painter = QPainter(layer)
+        option = QStyleOptionGraphicsItem()
+        for item in sorted(self._static_items, key=lambda item: item.zValue()):
+            painter.save()
+            painter.setTransform(item.sceneTransform())
+            if isinstance(item, Prop):
+                item.draw_sprite(painter)
+            else:
+                option.exposedRect = item.boundingRect()
+                item.paint(painter, option, None)
+            painter.restore()
+        painter.end()
+
+        self.static_layer_builds += 1
+        return layer
+
+    def drawBackground(self, painter, rect):
+        if self._static_layer is None:
+            self._static_layer = self.build_static_layer()
+
+        painter.fillRect(rect, self.backgroundBrush())
+        if self._cycling_background is not None:
+            background = self._cycling_background
+            option = QStyleOptionGraphicsItem()
+            option.exposedRect = background.mapRectFromScene(rect)
+            painter.save()
+            painter.setTransform(background.sceneTransform(), True)
+            background.paint(painter, option, None)
+            painter.restore()
+        source = rect.intersected(QRectF(self._static_layer.rect()))
+        if not source.isEmpty():
+            painter.drawPixmap(source, self._static_layer, source)
+
+    # Register or refresh an interactive item in the hit grid, e.g. after moving it
+    def update_hit_item(self, item):
+        logical_pos = item.pos() / self._scale_factor
+        rect = item.boundingRect()
+        self._hit_grid.insert(item, logical_pos.x(), logical_pos.y(), int(rect.width()), int(rect.height()), item.hit_mask, item.zValue())
+
+    def item_at(self, scene_pos):
+        return self._hit_grid.hit(scene_pos.x() / self._scale_factor, scene_pos.y() / self._scale_factor)
+
+    # Move hover to a new item (or None), emitting left/entered only on a change
+    def set_hovered(self, item):
+        if item is self._hovered:
+            return
+
+        previous, self._hovered = self._hovered, item
+        if previous is not None:
+            previous.set_hovered(False)
+            previous.left.emit(previous)
+        if item is not None:
+            item.set_hovered(True)
+            item.entered.emit(item)
+
+    # Pointer input in logical room coordinates, as delivered by the InputManager
+    def hover_at(self, x, y):
+        self.set_hovered(self._hit_grid.hit(x, y))
+
+    # The primary button uses the active verb, the other the default verb of the item
+    def press_at(self, x, y, primary=True):
+        item = self._hit_grid.hit(x, y)
+        if item is None:
+            if primary:
+                self.background_clicked.emit(x, y)
+        elif primary:
+            item.clicked.emit(item)
+        else:
+            self.default_verb_clicked.emit(item)
+
+    # Used when the scene is shown in a view without an InputManager
+    def mouseMoveEvent(self, event):
+        scene_pos = event.scenePos()
+        self.hover_at(scene_pos.x() / self._scale_factor, scene_pos.y() / self._scale_factor)
+        super().mouseMoveEvent(event)
+
+    def mousePressEvent(self, event):
+        scene_pos = event.scenePos()
+        event.accept()
+        self.press_at(scene_pos.x() / self._scale_factor, scene_pos.y() / self._scale_factor, event.button() == Qt.MouseButton.LeftButton)
+
+    def event(self, event):
+        # Sent by the view when the mouse leaves it
+        if event.type() == QEvent.Type.GraphicsSceneLeave:
+            self.set_hovered(None)
+        return super().event(event)
+
+
+# Paint counters of the game view. Paints are attributed to the frame in which they happen; end_frame
+# is called once per view update to close the frame.
+class PaintStats:
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.paints = 0
+        self.paint_time = 0.0
+        self.painted_area = 0
+        self.frame_paints = 0
+        self.frame_paint_time = 0.0
+        self.frame_painted_area = 0
+        self.last_frame_paints = 0
+        self.last_frame_paint_time = 0.0
+        self.last_frame_painted_area = 0
+
+    def add_paint(self, elapsed, area):
+        self.paints += 1
+        self.paint_time += elapsed
+        self.painted_area += area
+        self.frame_paints += 1
+        self.frame_paint_time += elapsed
+        self.frame_painted_area += area
+
+    def end_frame(self):
+        self.frames += 1
+        self.last_frame_paints = self.frame_paints
+        self.last_frame_paint_time = self.frame_paint_time
+        self.last_frame_painted_area = self.frame_painted_area
+        self.frame_paints = 0
+        self.frame_paint_time = 0.0
+        self.frame_painted_area = 0
+
+    def as_dict(self):
+        return {
+            "frames": self.frames,
+            "paints": self.paints,
+            "paint_time": self.paint_time,
+            "painted_area": self.painted_area,
+            "last_frame_paints": self.last_frame_paints,
+            "last_frame_paint_time": self.last_frame_paint_time,
+            "last_frame_painted_area": self.last_frame_painted_area,
+        }
+
+
+# View onto a GameScene tuned for the static layer: the background is cached by the view, only changed
+# regions are repainted and painter state is not saved around items that do not need it.
+class GameGraphicsView(QGraphicsView):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._paint_stats = PaintStats()
 
-        if not isinstance(item, QGraphicsTextItem):
-            item.setScale(scale_factor)
+        self.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing)
 
+    @property
+    def paint_stats(self):
+        return self._paint_stats
 
-class SayTextItem(QGraphicsTextItem):
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        super().paintEvent(event)
+        end = time.perf_counter()
+        rect = event.rect()
+        self._paint_stats.add_paint(end - start, rect.width() * rect.height())
+        if profiler.enabled:
+            profiler.add_span("view", "scene paint", start, end)
+
+
+# Character speech drawn from the SCUMM text font glyph atlas. Setting the same text again is free
+# and a changed line only costs a layout lookup, which is memoised per string.
+class SayTextItem(QGraphicsItem):
     def __init__(self, text=None, parent=None):
-        super().__init__(text, parent)
+        super().__init__(parent)
+
+        self._atlas = get_glyph_atlas(SCUMM_TEXT_FONT, SAY_TEXT_SIZE, "white")
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)  # a line stays up for seconds
+        self._max_width = int(SAY_TEXT_WIDTH * calculate_scale_factor())
+        self._text = None
+        self._layout = None
+        self.set_text(text or "")
+
+    @property
+    def text(self):
+        return self._text
+
+    def set_text(self, text):
+        if text != self._text:
+            self.prepareGeometryChange()
+            self._text = text
+            self._layout = self._atlas.layout(text, self._max_width, centered=True)
+
+    def boundingRect(self):
+        return QRectF(0, 0, self._layout.width, self._layout.height)
 
-        self.setFont(scumm_text)
-        self.setDefaultTextColor(QColor("white")) 
+    def paint(self, painter, option, widget=None):
+        self._atlas.draw(painter, 0, 0, self._layout)
 
 
+# Sentence line under the scene. Strings are drawn from the GUI font glyph atlas, and each distinct
+# string is rendered once, so per-tick updates with unchanged or recurring text are cheap.
 class InfoLabel(QLabel):
     def __init__(self, text=None, parent=None):
-        super().__init__(text, parent)
+        super().__init__(parent)
         
-        self.setFont(scumm_gui) 
-        self.setStyleSheet("background-color: black; color: teal;") # border: 2px solid white
+        self._atlas = get_glyph_atlas(SCUMM_GUI_FONT, INFO_TEXT_SIZE, "teal")
+        self._text = None
+        self.setStyleSheet("background-color: black;") # border: 2px solid white
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.setMargin(0)
+        self.setMinimumHeight(self._atlas.line_height)
+        self.setText(text or "")
+
+    def text(self):
+        return self._text
+
+    def setText(self, text):
+        if text != self._text:
+            self._text = text
+            self.setPixmap(self._atlas.render(text))
 
 class StyledButton(QPushButton):
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
         
-        self.setFont(scumm_gui)
+        self.setFont(get_font(SCUMM_GUI_FONT))
         self.setStyleSheet("background-color: black; color: green;") # border: 2px solid white
+        self._highlighted = False
 
+    def set_highlighted(self, highlighted):
+        if highlighted != self._highlighted:
+            self._highlighted = highlighted
+            self.setStyleSheet(f"background-color: black; color: {'lime' if highlighted else 'green'};")
 
+
+# Shows a window of the inventory, INVENTORY_COLUMNS x INVENTORY_ROWS items at a time. Only labels for the
+# visible window exist. Updates are diffed against what is already shown and labels are reused from a pool.
 class InventoryScrollArea(QScrollArea):
     inventory_label_clicked = pyqtSignal(str)
+    scroll_changed = pyqtSignal(bool, bool)  # can scroll up, can scroll down
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -69,89 +591,183 @@ class InventoryScrollArea(QScrollArea):
         self.setFixedSize(int(152 * scale_factor) , int (22 * scale_factor))
         self.scroll_content = QWidget()
         self.inventory_layout = QGridLayout()
+        self.inventory_layout.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
         self.scroll_content.setLayout(self.inventory_layout)
         self.setWidget(self.scroll_content)
 
-    def display_inventory(self, inventory_list):
+        self._inventory_list = []
+        self._first_row = 0
+        self._slots = [None] * (INVENTORY_COLUMNS * INVENTORY_ROWS)  # label shown in each visible cell
+        self._label_pool = []
+
+    @property
+    def first_row(self):
+        return self._first_row
+
+    @property
+    def max_first_row(self):
+        rows = -(-len(self._inventory_list) // INVENTORY_COLUMNS)  # ceiling division
+        return max(0, rows - INVENTORY_ROWS)
 
-        row, col = 0, 0
-        for item in inventory_list:
-            inventory_label = InventoryLabel(item, get_file_path("resources", "inventory", f"{item}.png"))
-            inventory_label.clicked.connect(self.handle_inventory_label_click)
-            self.inventory_layout.addWidget(inventory_label, row, col)
-            col += 1    
-            if col > 3:
-                col = 0 
-                row += 1
+    def can_scroll_up(self):
+        return self._first_row > 0
+
+    def can_scroll_down(self):
+        return self._first_row < self.max_first_row
+
+    def display_inventory(self, inventory_list):
+        # Copy, as the model passes its own list
+        self._inventory_list = list(inventory_list)
+        self._first_row = min(self._first_row, self.max_first_row)
+        self.refresh_window()
+
+    def scroll_up(self):
+        if self.can_scroll_up():
+            self._first_row -= 1
+            self.refresh_window()
+
+    def scroll_down(self):
+        if self.can_scroll_down():
+            self._first_row += 1
+            self.refresh_window()
+
+    # Bring the visible cells in line with the inventory window, touching only the cells that changed
+    def refresh_window(self):
+        start = self._first_row * INVENTORY_COLUMNS
+        visible = self._inventory_list[start:start + len(self._slots)]
+
+        for index, label in enumerate(self._slots):
+            name = visible[index] if index < len(visible) else None
+            if (label.name if label is not None else None) == name:
+                continue
+
+            if name is None:
+                self.release_label(label)
+                self._slots[index] = None
+                continue
+
+            if label is None:
+                label = self.acquire_label()
+                self._slots[index] = label
+                self.inventory_layout.addWidget(label, index // INVENTORY_COLUMNS, index % INVENTORY_COLUMNS)
+                label.show()
+            label.set_item(name, get_file_path("resources", "inventory", f"{name}.png"))
+
+        self.scroll_changed.emit(self.can_scroll_up(), self.can_scroll_down())
+
+    def acquire_label(self):
+        if self._label_pool:
+            return self._label_pool.pop()
+
+        inventory_label = InventoryLabel()
+        inventory_label.clicked.connect(self.handle_inventory_label_click)
+        return inventory_label
+
+    def release_label(self, inventory_label):
+        self.inventory_layout.removeWidget(inventory_label)
+        inventory_label.hide()
+        inventory_label.clear_item()
+        self._label_pool.append(inventory_label)
 
     def handle_inventory_label_click(self):
         sender = self.sender()
-        inventory_name = sender.text()
+        inventory_name = sender.name
         self.inventory_label_clicked.emit(inventory_name)
 
-# TODO - Created custom class but may not actually be required
+# Pooled label showing a single inventory item sprite. The item it shows is swapped with set_item.
 class InventoryLabel(QLabel):
-    clicked = pyqtSignal(QGraphicsObject)
+    clicked = pyqtSignal(QLabel)
 
-    def __init__(self, text, sprite_file_path):
-        super().__init__(text)
-        self._sprite_file_path = sprite_file_path
-        
-        # Set pixmap with scaled sprite
-        scale_factor = calculate_scale_factor()
-        sprite = QPixmap(self._sprite_file_path)
-        new_width = int(sprite.width() * scale_factor)
-        new_height = int(sprite.height() * scale_factor)
-        self.setPixmap(sprite.scaled(new_width, new_height))
+    def __init__(self, text=None, sprite_file_path=None):
+        super().__init__()
+        self._name = None
+        self._sprite_file_path = None
 
         # Remove padding
         self.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)  # Align content to top-left
         self.setMargin(0) 
 
+        if text is not None:
+            self.set_item(text, sprite_file_path)
+
+    def set_item(self, name, sprite_file_path):
+        self._name = name
+        if sprite_file_path != self._sprite_file_path:
+            self._sprite_file_path = sprite_file_path
+
+            # Set pixmap with scaled sprite
+            self.setPixmap(pixmap_cache.get_pixmap(self._sprite_file_path, calculate_scale_factor()))
+
+    def clear_item(self):
+        self._name = None
+        self._sprite_file_path = None
+        self.clear()
+
+    @pyqtProperty(str)
+    def name(self):
+        return self._name
+
     @pyqtProperty(str)
     def sprite(self):
-        return self._sprite
+        return self._sprite_file_path
 
     def mousePressEvent(self, event):
-        self.clicked.emit(self)
-
-# Provides an interactive prop for any object displayed independently from the scene background
+        if self._name is not None:
+            self.clicked.emit(self)
+
+# Provides an interactive prop for any object displayed independently from the scene background.
+# Accepts either a pixmap or a sprite file path, which is loaded through the shared pixmap cache.
+# Hover and clicks are resolved by the GameScene against the sprite's alpha mask, the one baked by the
+# asset pipeline when given, otherwise extracted from the pixmap. Subclasses that draw something other
+# than a single pixmap, such as AnimatedProp, pass no pixmap and override the drawing and hit mask.
 class Prop(QGraphicsObject):
     clicked = pyqtSignal(QGraphicsObject)
     entered = pyqtSignal(QGraphicsObject)
     left = pyqtSignal(QGraphicsObject)
     
-    def __init__(self, name, pixmap):
+    def __init__(self, name, pixmap=None, hit_mask=None):
         super().__init__()
         self._name = name
+        if pixmap is not None and not isinstance(pixmap, QPixmap):
+            hit_mask = hit_mask or pixmap_cache.get_mask(pixmap)
+            pixmap = pixmap_cache.get_pixmap(pixmap)
         self._pixmap = pixmap
+        self._hit_mask = hit_mask or (AlphaMask.from_pixmap(pixmap) if pixmap is not None else None)
         self._color = QColor(0, 0, 0, 0)  # transparent
-     
-        self.setAcceptHoverEvents(True) # was False by default
+        self._hovered = False
+        self._baked = False  # sprite drawn into the scene's static layer
 
     def boundingRect(self):
         return QRectF(self._pixmap.rect())
 
-    def paint(self, painter, option, widget=None):
-        painter.drawPixmap(self.boundingRect().toRect(), self._pixmap)
-        painter.fillRect(self.boundingRect(), self._color)
-
-    def mousePressEvent(self, event):
-        self.clicked.emit(self)
-
-    def hoverEnterEvent(self, event):
+    def set_baked(self, baked):
+        if baked != self._baked:
+            self._baked = baked
+            self.update()
 
-        self._color = QColor(0, 0, 255, 128)  # Red, Green, Blue, Alpha
-        self.update()  # Refresh the paint when entering hover
+    def draw_sprite(self, painter):
+        painter.drawPixmap(self.boundingRect().toRect(), self._pixmap)
 
-        self.entered.emit(self)
+    # Only the hover overlay is painted once the sprite is part of the static layer
+    def paint(self, painter, option, widget=None):
+        if not self._baked:
+            self.draw_sprite(painter)
+        if self._hovered:
+            painter.fillRect(self.boundingRect(), self._color)
 
-    def hoverLeaveEvent(self, event):
+    def set_hovered(self, hovered):
+        if hovered != self._hovered:
+            self._hovered = hovered
+            self._color = QColor(0, 0, 255, 128) if hovered else QColor(0, 0, 0, 0)  # Red, Green, Blue, Alpha
+            self.update()  # Refresh the paint when hover changes
 
-        self._color = QColor(0, 0, 0, 0)  # transparent
-        self.update()  # Refresh the paint when leaving hover
+    @property
+    def hovered(self):
+        return self._hovered
 
-        self.left.emit(self)
+    @property
+    def hit_mask(self):
+        return self._hit_mask
 
     @pyqtProperty(str)
     def name(self):
@@ -170,33 +786,33 @@ class Hotspot(QGraphicsObject):
         self._width = width
         self._height = height
         self._color = QColor(0, 0, 0, 0)  # transparent
+        self._hovered = False
         
         self.setPos(x, y)
-        self.setAcceptHoverEvents(True) # was False by default
 
     def boundingRect(self):
         return QRectF(0, 0, self._width, self._height)
 
+    # Nothing to draw unless hovered
     def paint(self, painter, option, widget=None):
-        painter.fillRect(self.boundingRect(), self._color)
-
-    def mousePressEvent(self, event):
-        self.clicked.emit(self)
-
-    def hoverEnterEvent(self, event):
-        
-        self._color = QColor(0, 0, 255, 128)  # Red, Green, Blue, Alpha
-        self.update()  # Refresh the paint when entering hover
-
-        self.entered.emit(self)
+        if self._hovered:
+            painter.fillRect(self.boundingRect(), self._color)
 
-    def hoverLeaveEvent(self, event):
+    def set_hovered(self, hovered):
+        if hovered != self._hovered:
+            self._hovered = hovered
+            self._color = QColor(0, 0, 255, 128) if hovered else QColor(0, 0, 0, 0)  # Red, Green, Blue, Alpha
+            self.update()  # Refresh the paint when hover changes
 
-        self._color = QColor(0, 0, 0, 0)  # transparent
-        self.update()  # Refresh the paint when leaving hover
+    @property
+    def hovered(self):
+        return self._hovered
 
-        self.left.emit(self)
+    # Hotspots are plain rectangles
+    @property
+    def hit_mask(self):
+        return None
 
     @pyqtProperty(str)
     def name(self):
-        return self._name
\ No newline at end of file
+        return self._name
@@ -0,0 +1,63 @@
+from PyQt6.QtCore import QEvent, QObject, Qt
+
+### Pointer input for the room view ###
+
+POINTER_EVENTS = (QEvent.Type.MouseMove, QEvent.Type.MouseButtonPress, QEvent.Type.Enter, QEvent.Type.Leave)
+
+# Handles mouse events on the view's viewport directly. Each event is mapped to logical room
+# coordinates once and passed to the scene, bypassing the generic graphics scene event path. The
+# crosshair cursor is set on the viewport once, so Qt switches it on enter and leave by itself and
+# nothing is polled per tick.
+class InputManager(QObject):
+
+    def __init__(self, view):
+        super().__init__(view)
+        self._view = view
+        self._inside = False
+        self.events = {"move": 0, "press": 0, "enter": 0, "leave": 0}
+
+        viewport = view.viewport()
+        viewport.setMouseTracking(True)
+        viewport.setCursor(Qt.CursorShape.CrossCursor)
+        viewport.installEventFilter(self)
+
+    @property
+    def inside(self):
+        return self._inside
+
+    # Viewport position to logical room coordinates
+    def to_logical(self, position):
+        scene = self._view.scene()
+        scene_pos = self._view.mapToScene(position.toPoint())
+        return scene_pos.x() / scene.scale_factor, scene_pos.y() / scene.scale_factor
+
+    def eventFilter(self, watched, event):
+        # Check the type before touching the view, the viewport still sends events while it is destroyed
+        event_type = event.type()
+        if event_type not in POINTER_EVENTS:
+            return False
+        scene = self._view.scene()
+        if scene is None:
+            return False
+
+        if event_type == QEvent.Type.MouseMove:
+            self.events["move"] += 1
+            scene.hover_at(*self.to_logical(event.position()))
+            return True
+
+        if event_type == QEvent.Type.MouseButtonPress:
+            button = event.button()
+            if button not in (Qt.MouseButton.LeftButton, Qt.MouseButton.RightButton):
+                return False
+            self.events["press"] += 1
+            scene.press_at(*self.to_logical(event.position()), primary=button == Qt.MouseButton.LeftButton)
+            return True
+
+        if event_type == QEvent.Type.Enter:
+            self.events["enter"] += 1
+            self._inside = True
+        else:
+            self.events["leave"] += 1
+            self._inside = False
+            scene.set_hovered(None)
+        return False
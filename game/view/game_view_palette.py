@@ -0,0 +1,170 @@
+import numpy as np
+
+from PyQt6.QtCore import QRectF
+from PyQt6.QtGui import QImage
+from PyQt6.QtWidgets import QGraphicsItem
+
+from .game_view_utils import load_image
+
+### Indexed colour backgrounds with palette cycling ###
+#
+# Rooms can cycle ranges of their background palette, e.g. for water or fire:
+#   "palette_cycles": [{"start": 9, "end": 11, "fps": 4}, {"start": 12, "end": 14, "fps": 8, "reverse": true}]
+
+PALETTE_SIZE = 256
+
+
+# A range of palette entries rotated by one step fps times a second
+class PaletteCycle:
+
+    def __init__(self, start, end, fps, reverse=False):
+        self.start = start
+        self.end = end
+        self.fps = fps
+        self.reverse = reverse
+
+    @classmethod
+    def from_data(cls, data):
+        return cls(data["start"], data["end"], data.get("fps", 4.0), data.get("reverse", False))
+
+    @property
+    def length(self):
+        return self.end - self.start + 1
+
+    def shift(self, now):
+        steps = int(now * self.fps) % self.length
+        return -steps if self.reverse else steps
+
+
+# An 8-bit image and its colour table, kept indexed at every scale. Scaled copies are made once per
+# scale factor with nearest-neighbour sampling. Changing colours only swaps the colour tables, the
+# pixels are never decoded or scaled again.
+class IndexedImage:
+
+    def __init__(self, image):
+        self._image = image
+        colors = image.colorTable()
+        self._base_palette = np.zeros(PALETTE_SIZE, dtype=np.uint32)
+        self._base_palette[:len(colors)] = colors
+        self._palette = self._base_palette.copy()
+        self._scaled = {}  # scale factor -> indexed QImage
+
+    # Indexed copy of a decoded image, or None if it is not an indexed image to begin with.
+    # Converting true colour art would dither it.
+    @classmethod
+    def from_image(cls, image):
+        if image.format() not in (QImage.Format.Format_Indexed8, QImage.Format.Format_Mono, QImage.Format.Format_MonoLSB):
+            return None
+        return cls(image.convertToFormat(QImage.Format.Format_Indexed8))
+
+    @property
+    def image(self):
+        return self._image
+
+    @property
+    def base_palette(self):
+        return self._base_palette
+
+    @property
+    def palette(self):
+        return self._palette
+
+    @property
+    def bytes(self):
+        return sum(image.sizeInBytes() for image in self._scaled.values()) + self._image.sizeInBytes()
+
+    def indices(self):
+        width, height, stride = self._image.width(), self._image.height(), self._image.bytesPerLine()
+        data = self._image.constBits()
+        data.setsize(self._image.sizeInBytes())
+        return np.frombuffer(data, dtype=np.uint8).reshape(height, stride)[:, :width]
+
+    def scaled(self, scale_factor):
+        image = self._scaled.get(scale_factor)
+        if image is None:
+            width, height = round(self._image.width() * scale_factor), round(self._image.height() * scale_factor)
+            rows = np.arange(height) * self._image.height() // height
+            columns = np.arange(width) * self._image.width() // width
+
+            stride = (width + 3) & ~3  # QImage rows are 32-bit aligned
+            pixels = np.zeros((height, stride), dtype=np.uint8)
+            pixels[:, :width] = self.indices()[rows[:, None], columns[None, :]]
+
+            # Copy so the image owns its pixels rather than pointing into the array
+            image = QImage(pixels.tobytes(), width, height, stride, QImage.Format.Format_Indexed8).copy()
+            image.setColorTable(self._palette.tolist())
+            self._scaled[scale_factor] = image
+        return image
+
+    def set_palette(self, palette):
+        self._palette = palette
+        colors = palette.tolist()
+        self._image.setColorTable(colors)
+        for image in self._scaled.values():
+            image.setColorTable(colors)
+
+
+_indexed_images = {}
+
+def has_indexed_image(file_path):
+    return file_path in _indexed_images
+
+
+# Indexed backgrounds are shared by every visit to a room, so the scaled copies are only built once
+def get_indexed_image(file_path, image=None):
+    indexed = _indexed_images.get(file_path)
+    if indexed is None:
+        indexed = IndexedImage.from_image(image if image is not None else load_image(file_path))
+        if indexed is not None:
+            _indexed_images[file_path] = indexed
+    return indexed
+
+
+# Room background drawn from an indexed image pre-scaled to the screen. Palette cycles are applied by
+# rotating ranges of the colour table with a single NumPy gather, then repainting the item.
+class IndexedBackgroundItem(QGraphicsItem):
+
+    def __init__(self, indexed_image, scale_factor, cycles=None, parent=None):
+        super().__init__(parent)
+        self._indexed_image = indexed_image
+        self._image = indexed_image.scaled(scale_factor)
+        self._cycles = list(cycles or [])
+        self._shifts = None
+        self.palette_updates = 0
+
+        # Positions in the palette of each cycled entry, for building the rotated lookup in one go
+        self._ranges = [np.arange(cycle.start, cycle.end + 1) for cycle in self._cycles]
+
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)  # paint only the exposed rect
+
+    @property
+    def indexed_image(self):
+        return self._indexed_image
+
+    @property
+    def cycles(self):
+        return self._cycles
+
+    def update_cycles(self, now):
+        if not self._cycles:
+            return False
+
+        shifts = tuple(cycle.shift(now) for cycle in self._cycles)
+        if shifts == self._shifts:
+            return False
+        self._shifts = shifts
+
+        lookup = np.arange(PALETTE_SIZE)
+        for positions, shift in zip(self._ranges, shifts):
+            lookup[positions] = np.roll(positions, -shift)
+        self._indexed_image.set_palette(self._indexed_image.base_palette[lookup])
+        self.palette_updates += 1
+        self.update()
+        return True
+
+    def boundingRect(self):
+        return QRectF(0, 0, self._image.width(), self._image.height())
+
+    def paint(self, painter, option, widget=None):
+        rect = option.exposedRect.toAlignedRect().intersected(self._image.rect())
+        painter.drawImage(rect, self._image, rect)
@@ -0,0 +1,72 @@
+from PyQt6.QtCore import QRect, Qt
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtWidgets import QWidget
+
+from ..utils.game_utils_profiler import profiler, HISTOGRAM_BOUNDS
+from .game_view_text import get_glyph_atlas
+from .game_view_utils import SCUMM_GUI_FONT
+
+### In-game profiler overlay, toggled with F3 ###
+
+OVERLAY_TEXT_SIZE = 6
+OVERLAY_REFRESH = 0.25  # seconds of game time between redraws
+OVERLAY_WIDTH = 120     # logical pixels, scaled like the text
+HISTOGRAM_HEIGHT = 24
+
+
+# Frame time, tick time and a frame time histogram over the profiler's frame history. The widget is
+# opaque, so redrawing it never repaints the scene underneath, and it is only redrawn every
+# OVERLAY_REFRESH seconds.
+class ProfilerOverlay(QWidget):
+
+    def __init__(self, paint_stats=None, parent=None):
+        super().__init__(parent)
+        self._atlas = get_glyph_atlas(SCUMM_GUI_FONT, OVERLAY_TEXT_SIZE, "lime")
+        self._paint_stats = paint_stats
+        self._last_refresh = None
+        self._lines = []
+        self._histogram = []
+
+        self._scale = max(1, self._atlas.line_height // OVERLAY_TEXT_SIZE)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.resize(OVERLAY_WIDTH * self._scale, self._atlas.line_height * 5 + (HISTOGRAM_HEIGHT + 4) * self._scale)
+
+    def refresh(self, game_time):
+        if self._last_refresh is not None and game_time - self._last_refresh < OVERLAY_REFRESH:
+            return
+        self._last_refresh = game_time
+
+        stats = profiler.frame_stats()
+        frame_time = stats["average_frame_time"]
+        self._lines = [
+            f"fps {1.0 / frame_time if frame_time else 0.0:5.1f}",
+            f"frame {frame_time * 1000:5.1f} max {stats['max_frame_time'] * 1000:5.1f}",
+            f"tick  {stats['average_tick_time'] * 1000:5.2f} max {stats['max_tick_time'] * 1000:5.2f}",
+        ]
+        if self._paint_stats is not None:
+            self._lines.append(f"paint {self._paint_stats.last_frame_paint_time * 1000:5.2f} x{self._paint_stats.last_frame_paints}")
+        self._lines.append("ms " + " ".join(f"{bound:.0f}" for bound in HISTOGRAM_BOUNDS) + "+")
+        self._histogram = profiler.histogram()
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+
+        y = 0
+        for line in self._lines:
+            self._atlas.draw(painter, 2 * self._scale, y, self._atlas.layout(line))
+            y += self._atlas.line_height
+
+        # One bar per bucket, height relative to the fullest bucket. Slow buckets are drawn in red.
+        if self._histogram:
+            top = y + 2 * self._scale
+            height = HISTOGRAM_HEIGHT * self._scale
+            width = (self.width() - 4 * self._scale) // len(self._histogram)
+            most = max(max(self._histogram), 1)
+            for bucket, count in enumerate(self._histogram):
+                bar = height * count // most
+                color = QColor("lime") if bucket < 2 else QColor("orange") if bucket < 4 else QColor("red")
+                painter.fillRect(QRect(2 * self._scale + bucket * width, top + height - bar, width - self._scale, bar), color)
+        painter.end()
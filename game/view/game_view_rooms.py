@@ -0,0 +1,177 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QGraphicsPixmapItem
+
+from ..utils.game_utils import startup_trace
+from ..utils.game_utils_assets import baked_assets
+from ..utils.game_utils_profiler import profiled
+from ..utils.game_utils_resources import resources
+from .game_view_animation import AnimatedProp, load_sprite_sheet
+from .game_view_helpers import GameScene, Prop, Hotspot, pixmap_cache
+from .game_view_palette import IndexedBackgroundItem, PaletteCycle, get_indexed_image, has_indexed_image
+from .game_view_utils import get_file_path, load_image
+
+### Builds GameScenes from the room data files in resources/rooms ###
+
+# Decode an image file off the GUI thread. QImage (unlike QPixmap) is safe to use from worker threads.
+# Converting to the pixmap-native format here leaves only a cheap upload for the GUI thread.
+@profiled("assets")
+def decode_image(file_path):
+    image = load_image(file_path)
+    return image.convertToFormat(QImage.Format.Format_ARGB32_Premultiplied)
+
+
+# Backgrounds are decoded as stored, so indexed images stay indexed. Art the asset pipeline converted
+# to an indexed image is read from the converted copy.
+@profiled("assets")
+def decode_background(file_path):
+    return load_image(baked_assets.converted(file_path) or file_path)
+
+
+# A built room: the scene plus the interactive items the view needs to connect to
+class Room:
+
+    def __init__(self, name, data, scene, props, hotspots, exits):
+        self.name = name
+        self.data = data
+        self.scene = scene
+        self.props = props          # prop name -> Prop or AnimatedProp
+        self.hotspots = hotspots    # hotspot name -> Hotspot
+        self.exits = exits          # exit hotspot name -> room name
+        self.background = None      # IndexedBackgroundItem when the background is indexed
+
+    @property
+    def music(self):
+        return self.data.get("music")
+
+    @property
+    def sounds(self):
+        return self.data.get("sounds", [])
+
+
+class RoomManager:
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="room-loader")
+        self._room_data = {}
+        self._pending_images = {}  # file path -> future of decoded QImage
+        self._load_times = {}      # room name -> list of load latencies in seconds
+        self._last_load_time = 0.0
+
+    @property
+    def last_load_time(self):
+        return self._last_load_time
+
+    @property
+    def load_times(self):
+        return {name: list(times) for name, times in self._load_times.items()}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def room_data(self, name):
+        data = self._room_data.get(name)
+        if data is None:
+            data = self._room_data[name] = resources.load_json(get_file_path("resources", "rooms", f"{name}.json"))
+        return data
+
+    # Resource paths in room data are relative to the resources folder
+    @staticmethod
+    def resource_path(relative_path):
+        return get_file_path("resources", *relative_path.split("/"))
+
+    def room_images(self, name):
+        return [self.resource_path(prop["sprite"]) for prop in self.room_data(name).get("props", []) if "sprite" in prop]
+
+    # Start decoding a room's images on the worker pool so a later load_room does not stall
+    def prefetch(self, name):
+        background = self.room_data(name).get("background")
+        if background:
+            file_path = self.resource_path(background)
+            if not has_indexed_image(file_path) and (file_path, 1.0) not in pixmap_cache and file_path not in self._pending_images:
+                self._pending_images[file_path] = self._executor.submit(decode_background, file_path)
+
+        for file_path in self.room_images(name):
+            if (file_path, 1.0) not in pixmap_cache and file_path not in self._pending_images:
+                self._pending_images[file_path] = self._executor.submit(decode_image, file_path)
+
+    def prefetch_exits(self, name):
+        for exit_data in self.room_data(name).get("exits", []):
+            self.prefetch(exit_data["room"])
+
+    # Pixmap for an image path, waiting on the worker if it is already being decoded
+    def get_pixmap(self, file_path):
+        future = self._pending_images.pop(file_path, None)
+        if future is not None and (file_path, 1.0) not in pixmap_cache:
+            pixmap_cache.insert((file_path, 1.0), QPixmap.fromImage(future.result()))
+        return pixmap_cache.get_pixmap(file_path)
+
+    # Scene item for a background: indexed images keep their colour table so it can be cycled,
+    # anything else is shown as a plain pixmap
+    def get_background(self, file_path, scale_factor, cycles):
+        future = self._pending_images.pop(file_path, None)
+        indexed = get_indexed_image(file_path, future.result() if future is not None else None)
+        if indexed is not None:
+            return IndexedBackgroundItem(indexed, scale_factor, cycles)
+
+        if future is not None and (file_path, 1.0) not in pixmap_cache:
+            pixmap_cache.insert((file_path, 1.0), QPixmap.fromImage(future.result()))
+        return QGraphicsPixmapItem(pixmap_cache.get_pixmap(file_path))
+
+    @profiled("assets")
+    def load_room(self, name):
+        start = time.perf_counter()
+
+        data = self.room_data(name)
+        self.prefetch(name)  # decode everything not yet cached in parallel
+
+        scene = GameScene()
+        background = None
+        if data.get("background"):
+            cycles = [PaletteCycle.from_data(cycle) for cycle in data.get("palette_cycles", [])]
+            background = self.get_background(self.resource_path(data["background"]), scene.scale_factor, cycles)
+            scene.add_static_item(background)
+
+        props = {}
+        for prop_data in data.get("props", []):
+            # Animated props name a sprite sheet and the clip to start with instead of a sprite
+            animation = prop_data.get("animation")
+            if animation is not None:
+                prop = AnimatedProp(prop_data["name"], load_sprite_sheet(animation["sheet"]), animation.get("clip"))
+            else:
+                sprite_path = self.resource_path(prop_data["sprite"])
+                prop = Prop(prop_data["name"], self.get_pixmap(sprite_path), pixmap_cache.get_mask(sprite_path))
+            prop.setPos(prop_data["x"], prop_data["y"])
+            if isinstance(prop, AnimatedProp):
+                scene.addItem(prop)
+            else:
+                scene.add_static_item(prop)
+            props[prop.name] = prop
+
+        hotspots = {}
+        for hotspot_data in data.get("hotspots", []):
+            hotspot = Hotspot(hotspot_data["name"], hotspot_data["x"], hotspot_data["y"], hotspot_data["width"], hotspot_data["height"])
+            scene.addItem(hotspot)
+            hotspots[hotspot.name] = hotspot
+
+        exits = {}
+        for exit_data in data.get("exits", []):
+            hotspot = Hotspot(exit_data["name"], exit_data["x"], exit_data["y"], exit_data["width"], exit_data["height"])
+            scene.addItem(hotspot)
+            hotspots[hotspot.name] = hotspot
+            exits[hotspot.name] = exit_data["room"]
+
+        # Rooms reachable from here are decoded in the background while the player looks around
+        self.prefetch_exits(name)
+
+        end = time.perf_counter()
+        self._last_load_time = end - start
+        self._load_times.setdefault(name, []).append(self._last_load_time)
+        startup_trace.add_span("assets", f"room {name}", start, end)
+
+        room = Room(name, data, scene, props, hotspots, exits)
+        if isinstance(background, IndexedBackgroundItem):
+            room.background = background
+        return room
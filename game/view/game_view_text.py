@@ -0,0 +1,177 @@
+from collections import OrderedDict
+
+from PyQt6.QtCore import QPointF, QRect, QRectF, Qt
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QImage, QPainter, QPixmap
+
+from .game_view_utils import calculate_scale_factor, get_font
+
+### Bitmap text drawn from pre-rendered glyph atlases ###
+
+# Characters rasterised into every atlas. Anything else is drawn as FALLBACK_GLYPH.
+ATLAS_CHARACTERS = "".join(chr(code) for code in range(32, 127)) + "".join(chr(code) for code in range(160, 256))
+FALLBACK_GLYPH = "?"
+ATLAS_WIDTH = 1024
+
+
+# Measured layout of a string: where each glyph is drawn (x, y, atlas source rect) and the overall size
+class TextLayout:
+
+    def __init__(self, runs, width, height):
+        self.runs = runs
+        self.width = width
+        self.height = height
+
+
+# The glyphs of a font rasterised once, in one colour, at a pixel size that is a whole multiple of the
+# screen scale factor. Text is drawn by copying glyph rects out of the atlas. Layouts and rendered
+# strings are memoised, so showing the same text again does no shaping at all.
+class GlyphAtlas:
+
+    def __init__(self, font_file, pixel_size, color, layout_cache_size=256, render_cache_size=64):
+        self._font = QFont(get_font(font_file))
+        self._font.setPixelSize(pixel_size)
+        self._font.setStyleStrategy(QFont.StyleStrategy.NoAntialias)  # pixel font, keep the edges hard
+        self._color = QColor(color)
+
+        metrics = QFontMetrics(self._font)
+        self._line_height = metrics.height()
+        self._ascent = metrics.ascent()
+        self._glyphs = {}  # character -> (source rect, advance)
+        self._pixmap = self._rasterise(metrics)
+
+        self._layouts = OrderedDict()
+        self._layout_cache_size = layout_cache_size
+        self._renders = OrderedDict()
+        self._render_cache_size = render_cache_size
+        self.layout_hits = 0
+        self.layout_misses = 0
+        self.render_hits = 0
+        self.render_misses = 0
+
+    @property
+    def pixmap(self):
+        return self._pixmap
+
+    @property
+    def line_height(self):
+        return self._line_height
+
+    def _rasterise(self, metrics):
+        # Pack glyph cells left to right in rows of line height
+        x = y = 0
+        for character in ATLAS_CHARACTERS:
+            advance = metrics.horizontalAdvance(character)
+            width = max(advance, metrics.boundingRect(character).right() + 1, 1)
+            if x + width > ATLAS_WIDTH:
+                x, y = 0, y + self._line_height
+            self._glyphs[character] = (QRect(x, y, width, self._line_height), advance)
+            x += width
+
+        image = QImage(ATLAS_WIDTH, y + self._line_height, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.setFont(self._font)
+        painter.setPen(self._color)
+        for character, (rect, _) in self._glyphs.items():
+            painter.drawText(rect.x(), rect.y() + self._ascent, character)
+        painter.end()
+        return QPixmap.fromImage(image)
+
+    def glyph(self, character):
+        return self._glyphs.get(character) or self._glyphs[FALLBACK_GLYPH]
+
+    def text_width(self, text):
+        return sum(self.glyph(character)[1] for character in text)
+
+    # Lines broken at explicit newlines and, given a max width in pixels, greedily between words
+    def wrap(self, text, max_width=None):
+        lines = []
+        for paragraph in text.split("\n"):
+            if max_width is None:
+                lines.append(paragraph)
+                continue
+
+            line = ""
+            for word in paragraph.split(" "):
+                candidate = f"{line} {word}" if line else word
+                if line and self.text_width(candidate) > max_width:
+                    lines.append(line)
+                    line = word
+                else:
+                    line = candidate
+            lines.append(line)
+        return lines
+
+    def layout(self, text, max_width=None, centered=False):
+        key = (text, max_width, centered)
+        layout = self._layouts.get(key)
+        if layout is not None:
+            self._layouts.move_to_end(key)
+            self.layout_hits += 1
+            return layout
+
+        self.layout_misses += 1
+        lines = self.wrap(text, max_width)
+        widths = [self.text_width(line) for line in lines]
+        width = max(widths, default=0)
+
+        runs = []
+        for index, line in enumerate(lines):
+            x = (width - widths[index]) // 2 if centered else 0
+            y = index * self._line_height
+            for character in line:
+                rect, advance = self.glyph(character)
+                if character != " ":
+                    runs.append((x, y, rect))
+                x += advance
+
+        layout = TextLayout(runs, width, len(lines) * self._line_height)
+        self._layouts[key] = layout
+        if len(self._layouts) > self._layout_cache_size:
+            self._layouts.popitem(last=False)
+        return layout
+
+    # Blit a layout's glyph runs with the painter, top-left at x, y
+    def draw(self, painter, x, y, layout):
+        for run_x, run_y, rect in layout.runs:
+            painter.drawPixmap(QPointF(x + run_x, y + run_y), self._pixmap, QRectF(rect))
+
+    # Text as a ready-made pixmap, for widgets that show a string as a whole
+    def render(self, text, max_width=None, centered=False):
+        key = (text, max_width, centered)
+        pixmap = self._renders.get(key)
+        if pixmap is not None:
+            self._renders.move_to_end(key)
+            self.render_hits += 1
+            return pixmap
+
+        self.render_misses += 1
+        layout = self.layout(text, max_width, centered)
+        pixmap = QPixmap(max(layout.width, 1), max(layout.height, 1))
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        self.draw(painter, 0, 0, layout)
+        painter.end()
+
+        self._renders[key] = pixmap
+        if len(self._renders) > self._render_cache_size:
+            self._renders.popitem(last=False)
+        return pixmap
+
+    def stats(self):
+        return {"glyphs": len(self._glyphs), "layouts": len(self._layouts), "renders": len(self._renders),
+                "layout_hits": self.layout_hits, "layout_misses": self.layout_misses,
+                "render_hits": self.render_hits, "render_misses": self.render_misses}
+
+
+_atlases = {}
+
+# Shared atlas for a font and colour. The size is given in logical pixels and rasterised at the current
+# scale factor, rounded to a whole multiple so the pixel font stays crisp.
+def get_glyph_atlas(font_file, logical_size, color):
+    pixel_size = logical_size * max(1, round(calculate_scale_factor()))
+    key = (font_file, pixel_size, QColor(color).rgba())
+    atlas = _atlases.get(key)
+    if atlas is None:
+        atlas = _atlases[key] = GlyphAtlas(font_file, pixel_size, color)
+    return atlas
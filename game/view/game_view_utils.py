@@ -1,16 +1,53 @@
-import os
-from PyQt6.QtGui import QGuiApplication
+from PyQt6.QtCore import QByteArray
+from PyQt6.QtGui import QGuiApplication, QFont, QFontDatabase, QImage, QPixmap
+
+from ..utils.game_utils import get_file_path
+from ..utils.game_utils_resources import resources
 
 # Constants
 SCREEN_RESOLUTION_HEIGHT = 180
+SCUMM_TEXT_FONT = "lucasarts-scumm-solid.ttf"
+SCUMM_GUI_FONT = "lucasarts-scumm-menu-solid.ttf"
 
-def get_file_path(*path_segments):
-    root_directory = os.path.dirname(os.path.abspath(__file__))
-    root_directory = os.path.abspath(os.path.join(root_directory, "..", ".."))  # Move two levels up
-    file_path = os.path.join(root_directory, *path_segments)
-    return file_path
+_font_families = {}
+_fonts = {}
 
 def calculate_scale_factor():
     primary_screen = QGuiApplication.primaryScreen()
     screen_geometry = primary_screen.availableGeometry()
-    return screen_geometry.height() / SCREEN_RESOLUTION_HEIGHT
\ No newline at end of file
+    return screen_geometry.height() / SCREEN_RESOLUTION_HEIGHT
+
+# Font from resources/font, registered with the application font database the first time it is used.
+# Needs a QGuiApplication, which is why fonts are not created at import.
+def get_font(file_name, point_size=24):
+    font = _fonts.get((file_name, point_size))
+    if font is None:
+        family = _font_families.get(file_name)
+        if family is None:
+            file_path = get_file_path("resources", "font", file_name)
+            data = resources.archived(file_path)
+            if data is not None:
+                font_id = QFontDatabase.addApplicationFontFromData(QByteArray(data))
+            else:
+                font_id = QFontDatabase.addApplicationFont(file_path)
+            families = QFontDatabase.applicationFontFamilies(font_id) if font_id != -1 else []
+            family = families[0] if families else QFont().family()
+            _font_families[file_name] = family
+        font = _fonts[(file_name, point_size)] = QFont(family, point_size)
+    return font
+
+
+# Images are decoded straight from the resource archive when it holds them, otherwise from the loose
+# file. QImage is safe to use on worker threads, QPixmap only on the GUI thread.
+def load_image(file_path):
+    data = resources.archived(file_path)
+    return QImage.fromData(data) if data is not None else QImage(file_path)
+
+
+def load_pixmap(file_path):
+    data = resources.archived(file_path)
+    if data is None:
+        return QPixmap(file_path)
+    pixmap = QPixmap()
+    pixmap.loadFromData(data)
+    return pixmap
@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+
+# No display is needed. Must be set before any Qt import.
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QCoreApplication
+
+from game.controller.game_controller_headless import HeadlessRunner, load_script
+from game.controller.game_controller_replay import InputRecorder, load_replay, play_replay
+from game.utils import profiler
+
+### Runs scripted playthroughs or recorded replays without a window, as fast as the CPU allows ###
+
+# Replays every run and exits with 1 if any of them did not reproduce the recorded state
+def run_replays(args):
+    replay = load_replay(args.script)
+    diverged = 0
+    ticks = 0
+    elapsed = 0.0
+    for _ in range(args.runs):
+        result = play_replay(replay, args.speed or None)
+        ticks += result["ticks"]
+        elapsed += result["elapsed"]
+        if result["divergences"]:
+            diverged += 1
+    print(f"{args.runs} replays, {ticks} ticks in {elapsed:.3f} s: {ticks / elapsed if elapsed > 0 else float('inf'):.0f} ticks/s, "
+          f"{diverged} diverged")
+    return 1 if diverged else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run scripted PyQtSCUMM playthroughs headless")
+    parser.add_argument("script", help="JSON list of scripted inputs, or a replay with --replay")
+    parser.add_argument("--runs", type=int, default=1, help="number of playthroughs")
+    parser.add_argument("--ticks", type=int, default=None, help="ticks per playthrough (default: until the last input)")
+    parser.add_argument("--tick-rate", type=int, default=100, help="simulated tick length in milliseconds")
+    parser.add_argument("--trace", default=None, help="write a Chrome trace of the runs to this file")
+    parser.add_argument("--record", default=None, help="record the scripted playthrough as a replay to this file")
+    parser.add_argument("--replay", action="store_true", help="play a recorded replay and check its state hashes")
+    parser.add_argument("--speed", type=float, default=0, help="replay speed, 1 for real time (default: uncapped)")
+    args = parser.parse_args()
+
+    if args.trace:
+        profiler.enable()
+
+    app = QCoreApplication(sys.argv)
+    exit_code = 0
+    if args.replay:
+        exit_code = run_replays(args)
+    else:
+        runner = HeadlessRunner(args.tick_rate)
+        script = load_script(args.script)
+
+        if args.record:
+            recorder = InputRecorder()
+            runner.run(script, args.ticks, recorder)
+            recorder.save(args.record)
+            print(f"Recorded {len(recorder.replay['inputs'])} inputs over {recorder.replay['ticks']} ticks to {args.record}")
+
+        result = runner.run_many(script, args.runs, args.ticks)
+        print(f"{result['runs']} runs, {result['ticks']} ticks in {result['elapsed']:.3f} s: "
+              f"{result['ticks_per_second']:.0f} ticks/s, {result['runs_per_minute']:.0f} runs/min")
+
+    if args.trace:
+        profiler.export_chrome_trace(args.trace)
+        print(profiler.report())
+    sys.exit(exit_code)
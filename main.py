@@ -1,17 +1,62 @@
+import time
+process_start = time.perf_counter()
 
+import os
+import signal
 import sys
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import QApplication
 
 from game.model import GameModel
 from game.view import GameView
-from game.controller import GameController
+from game.controller import GameController, InputRecorder, ReplayPlayer, load_replay
+from game.utils import startup_trace, profiler
+
+# Set PYQTSCUMM_STARTUP_TRACE=1 to print where startup time went once the first frame is shown
+def report_first_frame():
+    if os.environ.get("PYQTSCUMM_STARTUP_TRACE"):
+        print(startup_trace.report())
+
+# Set PYQTSCUMM_PROFILE=1 to profile from the start with the overlay shown (F3 toggles it at any time).
+# Set PYQTSCUMM_PROFILE_TRACE to a file path to write a Chrome trace of the session on exit.
+def export_profile():
+    trace_path = os.environ.get("PYQTSCUMM_PROFILE_TRACE")
+    if trace_path:
+        profiler.export_chrome_trace(trace_path)
+        print(profiler.report())
+
+# Set PYQTSCUMM_RECORD to a file path to record the session's inputs as a replay, written on exit.
+# Set PYQTSCUMM_REPLAY to a replay file to play it back at normal speed instead.
+def start_recording(game_model, game_controller):
+    recorder = InputRecorder()
+    recorder.attach(game_model, game_controller)
+    return recorder
+
+def report_replay(player):
+    print(f"Replay finished after {player.ticks} ticks, {len(player.divergences)} divergences")
 
 if __name__ == "__main__":
+    startup_trace.reset(process_start)
+    startup_trace.add_span("import", "modules", process_start, time.perf_counter())
+
     app = QApplication(sys.argv)
+    # Ctrl+C quits through the application too, so the replay and profile trace on aboutToQuit still get written
+    signal.signal(signal.SIGINT, lambda signum, frame: app.quit())
     game_logic_model = GameModel()
     game_view = GameView()
+    game_view.first_frame_shown.connect(report_first_frame)
+    if os.environ.get("PYQTSCUMM_PROFILE_TRACE"):
+        profiler.enable()
+    if os.environ.get("PYQTSCUMM_PROFILE"):
+        game_view.show_profiler_overlay()
+    app.aboutToQuit.connect(export_profile)
     game_view.showFullScreen()
     game_controller = GameController(game_logic_model, game_view)
+    if os.environ.get("PYQTSCUMM_REPLAY"):
+        replay_player = ReplayPlayer(load_replay(os.environ["PYQTSCUMM_REPLAY"]), on_finished=report_replay)
+        replay_player.attach(game_logic_model, game_controller)
+    elif os.environ.get("PYQTSCUMM_RECORD"):
+        recorder = start_recording(game_logic_model, game_controller)
+        app.aboutToQuit.connect(lambda: recorder.save(os.environ["PYQTSCUMM_RECORD"]))
     game_controller.start_game_loop()  # Start the game loop
     sys.exit(app.exec())
\ No newline at end of file